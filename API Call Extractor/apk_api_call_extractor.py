@@ -0,0 +1,133 @@
+import os
+import re
+import sys
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Toolkit", "Common"))
+from dex_reader import DexFile, INVOKE_OPCODES, OP_INVOKE_SUPER, OP_INVOKE_SUPER_RANGE, iter_apk_dex
+from batch_driver import iter_apk_files, output_base_for, run_batch, add_batch_arguments
+from result_sinks import FIELD_LIST, FileResultSink, add_sink_arguments, open_sink_from_args
+
+# Record fields of the corpus (ndjson / sqlite / parquet / matrix) sinks
+RESULT_FIELDS = {"api_calls": FIELD_LIST}
+
+# The calls the smali regex of apk_api_call_extractor_wapktool.extract_api_calls
+# selects: invoke-virtual / direct / static / interface (here with their
+# /range forms and invoke-polymorphic), on class and method names it accepts
+API_CALL_OPCODES = INVOKE_OPCODES - {OP_INVOKE_SUPER, OP_INVOKE_SUPER_RANGE}
+_CLASS_PATTERN = re.compile(r"L[a-zA-Z0-9/$]+;")
+_METHOD_PATTERN = re.compile(r"[a-zA-Z0-9_]+")
+
+def api_call_name(class_descriptor, method_name):
+    """'Landroid.app.Activity;->startActivity' for Android / Java API methods, else None"""
+    if not _CLASS_PATTERN.fullmatch(class_descriptor) or not _METHOD_PATTERN.fullmatch(method_name):
+        return None
+    class_name = class_descriptor.replace("/", ".")
+    # Filter for Android API classes (basic heuristic)
+    if class_name.startswith("Landroid") or class_name.startswith("Ljava"):
+        return f"{class_name}->{method_name}"
+    return None
+
+def extract_api_calls_from_dex(data):
+    """API calls invoked anywhere in one DEX file, decoded straight from its code items"""
+    api_calls = set()
+    with DexFile(data) as dex:
+        # Resolve each distinct method_ids entry once, however often it is invoked
+        for method_idx in dex.invoked_method_ids(API_CALL_OPCODES):
+            name = api_call_name(*dex.method_ref(method_idx))
+            if name is not None:
+                api_calls.add(name)
+    return api_calls
+
+def extract_api_calls(apk_path):
+    """Extract API calls from the classes*.dex of an APK without decompiling it"""
+    api_calls = set()
+    try:
+        for dex_name, data in iter_apk_dex(apk_path):
+            try:
+                api_calls |= extract_api_calls_from_dex(data)
+            except ValueError as e:
+                print(f"Error parsing {dex_name} in {apk_path}: {e}")
+    except Exception as e:
+        print(f"Error extracting API calls from {apk_path}: {e}")
+    return sorted(api_calls)
+
+def save_to_txt(api_calls, output_file):
+    try:
+        os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+        with open(output_file, "w", encoding="utf-8") as f:
+            for call in api_calls:
+                f.write(f"{call}\n")
+        print(f"Found {len(api_calls)} potential API calls. Results saved to {output_file}.")
+    except Exception as e:
+        print(f"Error saving to TXT: {e}")
+
+def extract_apk(apk_path):
+    """API calls of one APK as a result record; the worker run by the batch driver in directory mode."""
+    return {"api_calls": extract_api_calls(apk_path)}
+
+def save_results(apk_path, record, output_base):
+    """Per-APK TXT output of the default "files" sink."""
+    if not record["api_calls"]:
+        print(f"No API calls found or extraction failed for {apk_path}")
+        return
+
+    save_to_txt(record["api_calls"], f"{output_base}_api_calls.txt")
+
+def process_apk(apk_path, output_dir='./', sink=None):
+    """Process a single APK file"""
+    record = extract_apk(apk_path)
+
+    # Determine output path
+    if output_dir:
+        base_name = os.path.splitext(os.path.basename(apk_path))[0]
+        output_base = os.path.join(output_dir, base_name)
+    else:
+        input_dir = os.path.dirname(apk_path) or '.'  # Use current dir if no dir in path
+        base_name = os.path.splitext(os.path.basename(apk_path))[0]
+        output_base = os.path.join(input_dir, base_name)
+
+    (sink or FileResultSink(save_results)).write(apk_path, record, output_base)
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract Android / Java API calls from APK files by decoding their DEX bytecode.",
+                                     epilog="Example: python3 apk_api_call_extractor.py /path/to/apks/")
+    parser.add_argument("path", help="Path to an APK file or directory containing APKs")
+    add_batch_arguments(parser)
+    add_sink_arguments(parser)
+    args = parser.parse_args()
+
+    input_path = args.path
+
+    # Handle single file
+    if os.path.isfile(input_path) and input_path.endswith('.apk'):
+        with open_sink_from_args(args, os.path.splitext(os.path.basename(input_path))[0] + "_api_calls", RESULT_FIELDS, save_results) as sink:
+            process_apk(input_path, sink=sink)
+
+    # Handle directory
+    elif os.path.isdir(input_path):
+        # Create output directory with _api_calls suffix
+        input_dir = input_path.rstrip('/')  # Remove trailing slash if present
+        output_dir = f"{input_dir}_api_calls"
+
+        # Walk the directory lazily; results are saved as each APK finishes
+        apk_files = iter_apk_files(input_path, args.recursive, exclude=[output_dir])
+        found = False
+        with open_sink_from_args(args, output_dir, RESULT_FIELDS, save_results) as sink:
+            for apk_file, record, error in run_batch(extract_apk, apk_files, args.jobs):
+                found = True
+                if error is not None:
+                    print(f"Error processing {apk_file}: {error}")
+                    continue
+                sink.write(apk_file, record, output_base_for(apk_file, input_path, output_dir))
+
+        if not found:
+            print(f"No APK files found in {input_path}")
+            sys.exit(1)
+
+    else:
+        print("Invalid input: must be an APK file or a directory")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import os
+import sys
+import time
+import zipfile
+import argparse
+import multiprocessing
+
+from functools import partial
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Toolkit", "Common"))
+from apk_index import ApkIndex
+from dex_reader import dex_entry_names
+from batch_driver import iter_apk_files, output_base_for, run_batch, add_batch_arguments
+from result_sinks import FileResultSink, add_sink_arguments, open_sink_from_args
+from apk_api_call_extractor import API_CALL_OPCODES, RESULT_FIELDS, api_call_name, save_results
+
+try:
+    from androguard.core.dex import DEX
+except ImportError:
+    DEX = None
+
+# Library packages whose own code --skip-libraries leaves unanalyzed (calls into them are still reported)
+LIBRARY_PACKAGES = ("Landroidx/", "Lkotlin/", "Lcom/google/")
+
+def _require_androguard():
+    if DEX is None:
+        raise ImportError("Androguard is required for API call extraction.\nInstall with: pip install androguard")
+
+def analyze_dex(apk_path, dex_name, skip_libraries=False):
+    """
+    Worker: parse one classes*.dex of an APK as its own androguard DEX and
+    collect the methods its code invokes (the targets of its call xrefs),
+    as API call names.
+    """
+    _require_androguard()
+    with zipfile.ZipFile(apk_path) as apk:
+        dex = DEX(apk.read(dex_name))
+
+    api_calls = set()
+    for dex_class in dex.get_classes():
+        if skip_libraries and dex_class.get_name().startswith(LIBRARY_PACKAGES):
+            continue
+        for method in dex_class.get_methods():
+            for instruction in method.get_instructions():
+                if instruction.get_op_value() in API_CALL_OPCODES:
+                    class_name, method_name, _ = dex.get_cm_method(instruction.BBBB)
+                    name = api_call_name(class_name, method_name)
+                    if name is not None:
+                        api_calls.add(name)
+    return api_calls
+
+class DexAnalysisPool:
+    """
+    Worker processes that analyze the DEX files of one APK in parallel.
+    An APK that runs past its timeout has its workers killed (the pool is
+    restarted for the next APK) and raises TimeoutError.
+    """
+
+    def __init__(self, workers=None):
+        _require_androguard()
+        self.workers = workers or os.cpu_count() or 1
+        self._pool = multiprocessing.Pool(self.workers)
+
+    def extract_api_calls(self, apk_path, timeout=None, skip_libraries=False):
+        with ApkIndex(apk_path) as index:
+            dex_names = dex_entry_names(index)
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        pending = [(dex_name, self._pool.apply_async(analyze_dex, (str(apk_path), dex_name, skip_libraries)))
+                   for dex_name in dex_names]
+        api_calls = set()
+        for done, (dex_name, result) in enumerate(pending):
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                api_calls |= result.get(remaining)
+            except multiprocessing.TimeoutError:
+                self._restart()
+                raise TimeoutError(f"Timed out after {timeout}s with {done} of {len(dex_names)} DEX files analyzed") from None
+            except Exception as e:
+                print(f"Error analyzing {dex_name} in {apk_path}: {e}")
+        return sorted(api_calls)
+
+    def _restart(self):
+        self._pool.terminate()
+        self._pool.join()
+        self._pool = multiprocessing.Pool(self.workers)
+
+    def close(self):
+        self._pool.close()
+        self._pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def extract_apk(apk_path, pool, timeout=None, skip_libraries=False):
+    """API calls of one APK as a result record; the DEX files are spread over the pool's workers."""
+    return {"api_calls": pool.extract_api_calls(apk_path, timeout, skip_libraries)}
+
+def process_apk(apk_path, pool, output_dir='./', sink=None, timeout=None, skip_libraries=False):
+    """Process a single APK file"""
+    try:
+        record = extract_apk(apk_path, pool, timeout, skip_libraries)
+    except Exception as e:
+        print(f"Error extracting API calls from {apk_path}: {e}")
+        return
+
+    # Determine output path
+    if output_dir:
+        base_name = os.path.splitext(os.path.basename(apk_path))[0]
+        output_base = os.path.join(output_dir, base_name)
+    else:
+        input_dir = os.path.dirname(apk_path) or '.'  # Use current dir if no dir in path
+        base_name = os.path.splitext(os.path.basename(apk_path))[0]
+        output_base = os.path.join(input_dir, base_name)
+
+    (sink or FileResultSink(save_results)).write(apk_path, record, output_base)
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract Android / Java API calls from APK files using androguard, one process per DEX file.",
+                                     epilog="Example: python3 apk_api_call_extractor_wandroguard.py /path/to/apks/ --skip-libraries")
+    parser.add_argument("path", help="Path to an APK file or directory containing APKs")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Processes analyzing the DEX files of an APK (default: CPU count)")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="Seconds allowed per APK before its analysis is abandoned (default: no limit)")
+    parser.add_argument("--skip-libraries", action="store_true",
+                        help=f"Do not analyze the code of the {', '.join(p[1:-1] for p in LIBRARY_PACKAGES)} packages")
+    add_batch_arguments(parser, jobs=False)
+    add_sink_arguments(parser)
+    args = parser.parse_args()
+
+    input_path = args.path
+
+    with DexAnalysisPool(args.jobs) as pool:
+        # Handle single file
+        if os.path.isfile(input_path) and input_path.endswith('.apk'):
+            with open_sink_from_args(args, os.path.splitext(os.path.basename(input_path))[0] + "_api_calls", RESULT_FIELDS, save_results) as sink:
+                process_apk(input_path, pool, sink=sink, timeout=args.timeout, skip_libraries=args.skip_libraries)
+
+        # Handle directory
+        elif os.path.isdir(input_path):
+            # Create output directory with _api_calls suffix
+            input_dir = input_path.rstrip('/')  # Remove trailing slash if present
+            output_dir = f"{input_dir}_api_calls"
+
+            # APKs one at a time, each one's DEX files in parallel on the pool
+            apk_files = iter_apk_files(input_path, args.recursive, exclude=[output_dir])
+            worker = partial(extract_apk, pool=pool, timeout=args.timeout, skip_libraries=args.skip_libraries)
+            found = False
+            with open_sink_from_args(args, output_dir, RESULT_FIELDS, save_results) as sink:
+                for apk_file, record, error in run_batch(worker, apk_files, workers=1):
+                    found = True
+                    if error is not None:
+                        print(f"Error processing {apk_file}: {error}")
+                        continue
+                    sink.write(apk_file, record, output_base_for(apk_file, input_path, output_dir))
+
+            if not found:
+                print(f"No APK files found in {input_path}")
+                sys.exit(1)
+
+        else:
+            print("Invalid input: must be an APK file or a directory")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
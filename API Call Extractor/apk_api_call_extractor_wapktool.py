@@ -1,8 +1,22 @@
 import os
+import sys
+import mmap
+import heapq
 import subprocess
 import re
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Toolkit", "Common"))
+from batch_driver import iter_apk_files
+
+# invoke-virtual / direct / static / interface / polymorphic, with or without
+# /range, on Android / Java classes ("Landroid..." / "Ljava..." after the
+# slash-to-dot rewrite) so other calls never become match objects
+INVOKE_PATTERN = re.compile(rb'invoke-(?:virtual|direct|static|interface|polymorphic)(?:/range)?\s+\{[^}]*\},\s*(L(?:android|java)[a-zA-Z0-9/$]*;)->([a-zA-Z0-9_]+)\(')
+
+
 def check_apktool() -> bool:
     """Ensure apktool is installed."""
     try:
@@ -26,32 +40,75 @@ def decompile_apk(apk_path : Path, output_dir: Path) -> bool:
         return False
     return True
 
-def extract_api_calls(apk_path, apk_smali_dir):
-    """Extract potential API calls from smali files."""
+def scan_smali_file(file_path):
+    """API calls invoked in one smali file, scanned through an mmap of it."""
     api_calls = set()
-    
-    # Regex to match invoke instructions in smali
-    invoke_pattern = re.compile(r'invoke-(?:virtual|direct|static|interface)\s+{[^}]*},\s*(L[a-zA-Z0-9/$]+;)->([a-zA-Z0-9_]+)\(')
+    try:
+        with open(file_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return api_calls
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                # Cheap prefilter: most smali files of resource / R classes invoke nothing
+                start = m.find(b"invoke-")
+                if start < 0:
+                    return api_calls
+                # Decode each distinct (class, method) once, not once per invoke site
+                for class_name, method_name in set(INVOKE_PATTERN.findall(m, start)):
+                    api_calls.add(f"{class_name.decode('ascii').replace('/', '.')}->{method_name.decode('ascii')}")
+    except (OSError, ValueError) as e:
+        print(f"Error scanning {file_path}: {e}")
+    return api_calls
 
+def _scan_smali_shard(file_paths):
+    """Worker: the union of scan_smali_file over one shard of files."""
+    api_calls = set()
+    for file_path in file_paths:
+        api_calls |= scan_smali_file(file_path)
+    return api_calls
+
+def _shard_files_by_size(file_paths, shards):
+    """Split files into at most `shards` groups of roughly equal total size (largest first onto the lightest)."""
+    sized = []
+    for file_path in file_paths:
+        try:
+            sized.append((os.path.getsize(file_path), file_path))
+        except OSError:
+            continue
+    heap = [(0, n, []) for n in range(shards)]
+    for size, file_path in sorted(sized, reverse=True):
+        load, n, paths = heapq.heappop(heap)
+        paths.append(file_path)
+        heapq.heappush(heap, (load + size, n, paths))
+    return [paths for _, _, paths in heap if paths]
+
+def extract_api_calls(apk_path, apk_smali_dir, workers=None):
+    """
+    Extract potential API calls from smali files.  The files are sharded
+    by size across `workers` processes (default: one per CPU) and the
+    per-worker sets merged; workers=1 scans in this process.
+    """
+    workers = workers or os.cpu_count() or 1
     print(f"Analyzing {apk_path}:smali files for API calls...")
-    for root, _, files in os.walk(apk_smali_dir):
-        for file in files:
-            if file.endswith(".smali"):
-                file_path = Path(root) / file
-                with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                    content = f.read()
-                    matches = invoke_pattern.finditer(content)
-                    for match in matches:
-                        class_name = match.group(1).replace("/", ".")
-                        method_name = match.group(2)
-                        # Filter for Android API classes (basic heuristic)
-                        if class_name.startswith("Landroid") or class_name.startswith("Ljava"):
-                            api_calls.add(f"{class_name}->{method_name}")
+    smali_files = list(iter_apk_files(apk_smali_dir, extensions=(".smali",)))
+
+    if workers == 1 or len(smali_files) < 2:
+        return sorted(_scan_smali_shard(smali_files))
 
+    api_calls = set()
+    shards = _shard_files_by_size(smali_files, workers)
+    with ProcessPoolExecutor(max_workers=len(shards)) as pool:
+        for shard_calls in pool.map(_scan_smali_shard, shards):
+            api_calls |= shard_calls
     return sorted(api_calls)
 
 def main():
-    apk_path = Path("apks/cybersecurity-dev.apk")
+    parser = argparse.ArgumentParser(description="Extract Android / Java API calls from an APK decompiled with apktool.")
+    parser.add_argument("apk", nargs="?", default="apks/cybersecurity-dev.apk", help="Path to the APK file")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Processes scanning the smali files (default: one per CPU)")
+    args = parser.parse_args()
+
+    apk_path = Path(args.apk)
     filename = Path(apk_path).stem
     output_dir = f"decompiled_apk_{filename}"
     
@@ -66,7 +123,7 @@ def main():
         return
 
     # Extract API calls
-    api_calls = extract_api_calls(apk_path, output_dir)
+    api_calls = extract_api_calls(apk_path, output_dir, args.jobs)
 
     # Save results
     output_file = f"{filename}_api_calls.txt"
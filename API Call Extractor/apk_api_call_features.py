@@ -0,0 +1,182 @@
+import json
+import os
+import sys
+import argparse
+
+from array import array
+from functools import partial
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Toolkit", "Common"))
+from dex_reader import DexFile, iter_apk_dex
+from batch_driver import iter_apk_files, output_base_for, run_batch, add_batch_arguments
+from result_sinks import FIELD_COUNTS, FileResultSink, add_sink_arguments, open_sink_from_args
+from apk_api_call_extractor import API_CALL_OPCODES, api_call_name
+
+# Record fields of the corpus (ndjson / sqlite / parquet / matrix) sinks
+RESULT_FIELDS = {"api_counts": FIELD_COUNTS, "api_ngrams": FIELD_COUNTS}
+
+# Distinct n-grams kept per APK; n-grams first seen after that are dropped
+MAX_NGRAMS = 1 << 20
+
+_UNRESOLVED = 0xFFFFFFFF
+_NOT_API    = 0xFFFFFFFE
+
+class ApiVocabulary:
+    """API call names interned to consecutive integer IDs."""
+
+    def __init__(self, names=()):
+        self.ids: dict[str, int] = {}
+        self.names: list[str] = []
+        for name in names:
+            self.intern(name)
+
+    def intern(self, name: str) -> int:
+        api_id = self.ids.get(name)
+        if api_id is None:
+            api_id = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return api_id
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+# Shared by every APK a process extracts, so each API name is interned once per process
+_VOCABULARY = ApiVocabulary()
+
+def iter_method_api_sequences(dex, vocabulary):
+    """
+    (method_idx, array('I') of API IDs in code order) for every method of
+    a DexFile; invokes of non-API methods are left out.  Each method_ids
+    entry is resolved and interned the first time it is invoked.
+    """
+    api_ids = array("I", [_UNRESOLVED]) * dex.method_ids_size
+    for method_idx, calls in dex.iter_method_invokes(API_CALL_OPCODES):
+        sequence = array("I")
+        for callee in calls:
+            api_id = api_ids[callee]
+            if api_id == _UNRESOLVED:
+                name = api_call_name(*dex.method_ref(callee))
+                api_id = api_ids[callee] = _NOT_API if name is None else vocabulary.intern(name)
+            if api_id != _NOT_API:
+                sequence.append(api_id)
+        yield method_idx, sequence
+
+def extract_api_features(apk_path, ngram=2, vocabulary=None, max_ngrams=MAX_NGRAMS):
+    """
+    Per-API invocation counts and counts of the API n-grams (runs of
+    `ngram` consecutive API calls within one method) of an APK.  Methods
+    are streamed one at a time and counts kept per API ID, so memory
+    follows the number of distinct APIs and n-grams, not of invoke sites.
+    """
+    vocabulary = _VOCABULARY if vocabulary is None else vocabulary
+    counts = array("I")
+    # n-gram -> count, keyed by the bytes of its array('I') slice (smaller than a tuple of ints)
+    ngrams: dict[bytes, int] = {}
+    try:
+        for dex_name, data in iter_apk_dex(apk_path):
+            try:
+                with DexFile(data) as dex:
+                    for _, sequence in iter_method_api_sequences(dex, vocabulary):
+                        if len(counts) < len(vocabulary):
+                            counts.extend(array("I", bytes(4 * (len(vocabulary) - len(counts)))))
+                        for api_id in sequence:
+                            counts[api_id] += 1
+                        if ngram < 2:
+                            continue
+                        for i in range(len(sequence) - ngram + 1):
+                            key = sequence[i:i + ngram].tobytes()
+                            if key in ngrams:
+                                ngrams[key] += 1
+                            elif len(ngrams) < max_ngrams:
+                                ngrams[key] = 1
+            except ValueError as e:
+                print(f"Error parsing {dex_name} in {apk_path}: {e}")
+    except Exception as e:
+        print(f"Error extracting API features from {apk_path}: {e}")
+
+    names = vocabulary.names
+    return {
+        "api_counts": {names[api_id]: count for api_id, count in enumerate(counts) if count},
+        "api_ngrams": {" ".join(names[api_id] for api_id in array("I", key)): count for key, count in ngrams.items()},
+    }
+
+def save_to_json(record, output_file):
+    try:
+        os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+        with open(output_file, 'w') as f:
+            json.dump(record, f, indent=4)
+        print(f"API features saved to {output_file}")
+    except Exception as e:
+        print(f"Error saving to JSON: {e}")
+
+def extract_apk(apk_path, ngram=2):
+    """API features of one APK as a result record; the worker run by the batch driver in directory mode."""
+    return extract_api_features(apk_path, ngram)
+
+def save_results(apk_path, record, output_base):
+    """Per-APK JSON output of the default "files" sink."""
+    if not record["api_counts"]:
+        print(f"No API calls found or extraction failed for {apk_path}")
+        return
+
+    save_to_json(record, f"{output_base}_api_features.json")
+
+def process_apk(apk_path, output_dir='./', sink=None, ngram=2):
+    """Process a single APK file"""
+    record = extract_apk(apk_path, ngram)
+
+    # Determine output path
+    if output_dir:
+        base_name = os.path.splitext(os.path.basename(apk_path))[0]
+        output_base = os.path.join(output_dir, base_name)
+    else:
+        input_dir = os.path.dirname(apk_path) or '.'  # Use current dir if no dir in path
+        base_name = os.path.splitext(os.path.basename(apk_path))[0]
+        output_base = os.path.join(input_dir, base_name)
+
+    (sink or FileResultSink(save_results)).write(apk_path, record, output_base)
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract API-call frequency and n-gram features from the DEX bytecode of APK files.",
+                                     epilog="Example: python3 apk_api_call_features.py /path/to/apks/ --sink matrix")
+    parser.add_argument("path", help="Path to an APK file or directory containing APKs")
+    parser.add_argument("-n", "--ngram", type=int, default=2,
+                        help="Length of the per-method API n-grams (default: 2; 1 disables them)")
+    add_batch_arguments(parser)
+    add_sink_arguments(parser)
+    args = parser.parse_args()
+
+    input_path = args.path
+
+    # Handle single file
+    if os.path.isfile(input_path) and input_path.endswith('.apk'):
+        with open_sink_from_args(args, os.path.splitext(os.path.basename(input_path))[0] + "_api_features", RESULT_FIELDS, save_results) as sink:
+            process_apk(input_path, sink=sink, ngram=args.ngram)
+
+    # Handle directory
+    elif os.path.isdir(input_path):
+        # Create output directory with _api_features suffix
+        input_dir = input_path.rstrip('/')  # Remove trailing slash if present
+        output_dir = f"{input_dir}_api_features"
+
+        # Walk the directory lazily; results are saved as each APK finishes
+        apk_files = iter_apk_files(input_path, args.recursive, exclude=[output_dir])
+        found = False
+        with open_sink_from_args(args, output_dir, RESULT_FIELDS, save_results) as sink:
+            for apk_file, record, error in run_batch(partial(extract_apk, ngram=args.ngram), apk_files, args.jobs):
+                found = True
+                if error is not None:
+                    print(f"Error processing {apk_file}: {error}")
+                    continue
+                sink.write(apk_file, record, output_base_for(apk_file, input_path, output_dir))
+
+        if not found:
+            print(f"No APK files found in {input_path}")
+            sys.exit(1)
+
+    else:
+        print("Invalid input: must be an APK file or a directory")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
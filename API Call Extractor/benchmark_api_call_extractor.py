@@ -0,0 +1,149 @@
+import os
+import re
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+
+# Imported by name, so the scanner's worker function pickles into its process pool
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import apk_api_call_extractor
+import apk_api_call_extractor_wapktool
+import apk_api_call_extractor_wandroguard
+
+# The single-core scan extract_api_calls used before: os.walk, text reads, no /range forms
+_LEGACY_PATTERN = re.compile(r'invoke-(?:virtual|direct|static|interface)\s+{[^}]*},\s*(L[a-zA-Z0-9/$]+;)->([a-zA-Z0-9_]+)\(')
+
+def legacy_extract_api_calls(smali_dir):
+    api_calls = set()
+    for root, _, files in os.walk(smali_dir):
+        for file in files:
+            if file.endswith(".smali"):
+                with open(os.path.join(root, file), "r", encoding="utf-8", errors="ignore") as f:
+                    for match in _LEGACY_PATTERN.finditer(f.read()):
+                        class_name = match.group(1).replace("/", ".")
+                        if class_name.startswith("Landroid") or class_name.startswith("Ljava"):
+                            api_calls.add(f"{class_name}->{match.group(2)}")
+    return sorted(api_calls)
+
+def write_synthetic_tree(root, files: int, seed: int = 0):
+    """apktool-like smali tree: one in three files an invoke-free R / constants class."""
+    rnd = random.Random(seed)
+    kinds = ["invoke-virtual", "invoke-static", "invoke-direct", "invoke-interface",
+             "invoke-virtual/range", "invoke-static/range"]
+    targets = [f"Landroid/app/C{i};->m{i}" for i in range(500)] + \
+              [f"Ljava/util/K{i};->f{i}" for i in range(500)] + \
+              [f"Lcom/example/app/Z{i};->g{i}" for i in range(2000)]
+    for n in range(files):
+        directory = os.path.join(root, f"smali{'' if n % 4 else '_classes2'}", "com", "example", f"p{n % 50}")
+        os.makedirs(directory, exist_ok=True)
+        lines = [f".class public Lcom/example/p{n % 50}/C{n};", ".super Ljava/lang/Object;", ""]
+        if n % 3 == 0:
+            lines += [f".field public static final id{i}:I = 0x7f0{i:05x}" for i in range(200)]
+        else:
+            for m in range(20):
+                lines += [f".method public m{m}()V", "    .registers 6", ""]
+                for _ in range(10):
+                    kind = rnd.choice(kinds)
+                    if kind.endswith("/range"):
+                        # Targets only reached through /range, which the legacy regex skips
+                        target = f"Landroid/os/R{rnd.randrange(100)};->r"
+                        registers = "{v0 .. v4}"
+                    else:
+                        target = rnd.choice(targets)
+                        registers = "{v0, v1}"
+                    lines += ["    const/4 v0, 0x0", f"    {kind} {registers}, {target}(I)V", ""]
+                lines += ["    return-void", ".end method", ""]
+        with open(os.path.join(directory, f"C{n}.smali"), "w") as f:
+            f.write("\n".join(lines))
+
+def _timed(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return result, (time.perf_counter() - start) / repeat
+
+def benchmark_smali_scan(smali_dir, jobs: list[int], repeat: int = 1, apk=None):
+    """Print the time of the legacy scan, the mmap scanner at each worker count and, with apk, the DEX reader."""
+    files = total = 0
+    for root, _, names in os.walk(smali_dir):
+        for name in names:
+            if name.endswith(".smali"):
+                files += 1
+                total += os.path.getsize(os.path.join(root, name))
+    print(f"{files} smali files, {total / 2**20:.1f} MiB")
+
+    legacy, elapsed = _timed(lambda: legacy_extract_api_calls(smali_dir), repeat)
+    print(f"{'legacy':<13} {elapsed:8.3f} s {total / 2**20 / elapsed:8.1f} MiB/s {len(legacy):7d} calls")
+
+    scanned = None
+    for workers in jobs:
+        scanned, elapsed = _timed(lambda: apk_api_call_extractor_wapktool.extract_api_calls(smali_dir, smali_dir, workers), repeat)
+        print(f"{f'mmap -j {workers}':<13} {elapsed:8.3f} s {total / 2**20 / elapsed:8.1f} MiB/s {len(scanned):7d} calls")
+
+    if scanned is not None:
+        missing = set(legacy) - set(scanned)
+        if missing:
+            print(f"mmap scanner misses {len(missing)} calls of the legacy scan, e.g. {min(missing)}")
+        print(f"{len(set(scanned) - set(legacy))} calls found only through /range or invoke-polymorphic")
+
+    if apk is not None:
+        from_dex, elapsed = _timed(lambda: apk_api_call_extractor.extract_api_calls(apk), repeat)
+        print(f"{'dex':<13} {elapsed:8.3f} s {'':>14} {len(from_dex):7d} calls")
+        if scanned is not None and set(from_dex) != set(scanned):
+            print(f"dex reader and mmap scanner differ on {len(set(from_dex) ^ set(scanned))} calls")
+
+def compare_androguard(apk, workers=None, repeat: int = 1) -> bool:
+    """Time the androguard extractor on an APK and check it finds exactly the DEX reader's calls."""
+    with apk_api_call_extractor_wandroguard.DexAnalysisPool(workers) as pool:
+        from_androguard, elapsed = _timed(lambda: pool.extract_api_calls(apk), repeat)
+    print(f"{'androguard':<13} {elapsed:8.3f} s {'':>14} {len(from_androguard):7d} calls")
+
+    from_dex, elapsed = _timed(lambda: apk_api_call_extractor.extract_api_calls(apk), repeat)
+    print(f"{'dex':<13} {elapsed:8.3f} s {'':>14} {len(from_dex):7d} calls")
+
+    difference = set(from_androguard) ^ set(from_dex)
+    if difference:
+        print(f"androguard and dex reader differ on {len(difference)} calls, e.g. {min(difference)}")
+    return not difference
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the smali API-call scanners (legacy single-core scan vs. parallel mmap scan).")
+    parser.add_argument("path", nargs="?", help="apktool output directory (omit with --synthetic)")
+    parser.add_argument("-j", "--jobs", type=int, action="append",
+                        help="Worker count of the mmap scanner (repeatable; default: 1 and one per CPU)")
+    parser.add_argument("-r", "--repeat", type=int, default=1, help="Runs per scanner")
+    parser.add_argument("--synthetic", type=int, metavar="FILES",
+                        help="Benchmark on a generated tree of FILES smali files instead")
+    parser.add_argument("--apk", help="Also time the DEX reader on this APK (the one the tree was decompiled from)")
+    parser.add_argument("--androguard", action="store_true",
+                        help="Check the androguard extractor against the DEX reader on --apk (no smali tree needed)")
+    args = parser.parse_args()
+
+    jobs = args.jobs or sorted({1, os.cpu_count() or 1})
+    if args.androguard:
+        if not args.apk or not os.path.isfile(args.apk):
+            print(f"Error: --androguard needs an APK file in --apk")
+            sys.exit(1)
+        if not compare_androguard(args.apk, max(jobs), args.repeat):
+            sys.exit(1)
+        if not args.synthetic and not args.path:
+            return
+
+    if args.synthetic:
+        smali_dir = tempfile.mkdtemp(prefix="smali_benchmark_")
+        try:
+            write_synthetic_tree(smali_dir, args.synthetic)
+            benchmark_smali_scan(smali_dir, jobs, args.repeat, args.apk)
+        finally:
+            shutil.rmtree(smali_dir, ignore_errors=True)
+    elif args.path and os.path.isdir(args.path):
+        benchmark_smali_scan(args.path, jobs, args.repeat, args.apk)
+    else:
+        print(f"Error: {args.path} is not a directory!")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
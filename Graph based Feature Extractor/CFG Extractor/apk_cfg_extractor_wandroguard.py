@@ -1,4 +1,5 @@
 import os
+import sys
 import pydot
 import pygraphviz
 import networkx as nx
@@ -6,6 +7,9 @@ import json
 
 from pathlib import Path
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "Toolkit", "Common"))
+from analysis_cache import AnalysisCache
+
 try:
     from androguard.misc import AnalyzeAPK
     from androguard.core.analysis.analysis import DEXBasicBlock
@@ -101,43 +105,37 @@ def save_nxgraph_to_graphml(graph_object, out_path: Path) -> tuple[bool, Path |
             print(f"An error occurred during GraphML conversion: {e}")
             return False, None
 
-# -> nx.Graph | nx.DiGraph | nx.MultiGraph | nx.MultiDiGraph | None
-def apk_to_cfg(apk_path: Path) -> nx.DiGraph | None:
-    _require_androguard()
-    #APK object, DEX objects, Analysis Object
-    obj_apk, obj_dex, obj_analysis = AnalyzeAPK(apk_path)
+def cfg_from_analysis(analysis: dict) -> nx.DiGraph | None:
+    """Basic-block CFG of every method of a cached analysis (see analysis_cache)."""
     G = nx.DiGraph()
 
-    for method in obj_analysis.get_methods():
-        method_name = f"{method.class_name}->{method.name}{method.descriptor}"
-
-        bb = method.basic_blocks
-        if not bb:
-            continue
+    for method in analysis["methods"]:
+        method_name = f"{method['class']}->{method['name']}{method['descriptor']}"
 
-        for block in bb.get():
+        for start, instructions, children in method["blocks"]:
 
-            node_id = f"{method_name}_bb_{block.start}"
+            node_id = f"{method_name}_bb_{start}"
 
             # Add node with instructions
             G.add_node(node_id,
                        method=method_name,
-                       start=block.start,
-                       instructions=[str(ins) for ins in block.get_instructions()]
+                       start=start,
+                       instructions=instructions
                        )
 
             # Connect children
-            for (off, child, btype) in block.childs:
-
-                # Child may be block or integer offset
-                if hasattr(child, "start"):
-                    target_offset = child.start
-                else:
-                    target_offset = child   # int offset fallback
+            for (off, target_offset, btype) in children:
 
                 child_id = f"{method_name}_bb_{target_offset}"
 
                 # Add edge
                 G.add_edge(node_id, child_id, branch_type=btype)
 
-    return G if len(G.nodes) > 0 else None
\ No newline at end of file
+    return G if len(G.nodes) > 0 else None
+
+# -> nx.Graph | nx.DiGraph | nx.MultiGraph | nx.MultiDiGraph | None
+def apk_to_cfg(apk_path: Path, cache: AnalysisCache | None = None) -> nx.DiGraph | None:
+    _require_androguard()
+    # AnalyzeAPK runs only on the first call for an APK; later calls load its cached result
+    analysis = (cache or AnalysisCache()).load_or_analyze(apk_path)
+    return cfg_from_analysis(analysis)
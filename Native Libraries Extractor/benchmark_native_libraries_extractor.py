@@ -0,0 +1,53 @@
+import os
+import sys
+import time
+import zipfile
+import argparse
+
+from pathlib import Path
+
+from native_libraries_elf_metadata import extract_elf_metadata
+
+def _full_extraction(apk_path: Path) -> dict[str, int]:
+    """Decompress every lib/**.so entry in full, as a metadata pass without range reads would."""
+    totals = {"compressed_read": 0, "inflated": 0}
+    with zipfile.ZipFile(apk_path, "r") as apk:
+        for entry in apk.infolist():
+            if entry.filename.startswith("lib/") and entry.filename.endswith(".so"):
+                apk.read(entry)
+                totals["compressed_read"] += entry.compress_size
+                totals["inflated"] += entry.file_size
+    return totals
+
+def benchmark_elf_metadata(apk_path: Path):
+    """Print bytes read / inflated and wall time of the range-read ELF metadata pass against a full extraction."""
+    start = time.perf_counter()
+    full = _full_extraction(apk_path)
+    full_elapsed = time.perf_counter() - start
+
+    stats: dict[str, int] = {}
+    start = time.perf_counter()
+    metadata = extract_elf_metadata(apk_path, stats)
+    range_elapsed = time.perf_counter() - start
+
+    print(f"{'full':<6} {full['compressed_read'] / 1e6:10.1f} MB read {full['inflated'] / 1e6:10.1f} MB inflated "
+          f"{full_elapsed:8.3f} s")
+    print(f"{'range':<6} {stats['compressed_read'] / 1e6:10.1f} MB read {stats['inflated'] / 1e6:10.1f} MB inflated "
+          f"{range_elapsed:8.3f} s ({len(metadata)} ELF libraries)")
+    if full["compressed_read"]:
+        print(f"read {stats['compressed_read'] / full['compressed_read']:.1%} of the compressed bytes, "
+              f"inflated {stats['inflated'] / max(full['inflated'], 1):.1%} of the uncompressed bytes")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark range-read ELF metadata extraction on an APK.")
+    parser.add_argument("path", help="Path to an APK file")
+
+    args = parser.parse_args()
+    if not os.path.isfile(args.path):
+        print(f"Error: {args.path} does not exist!")
+        sys.exit(1)
+
+    benchmark_elf_metadata(Path(args.path))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+import os
+import sys
+import struct
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Toolkit", "Common"))
+from apk_index import ApkIndex, EntryRangeReader
+
+#---------------------------------------------------------
+# ELF CONSTANTS
+#---------------------------------------------------------
+
+_ELF_MAGIC = b"\x7fELF"
+_ELFCLASS32 = 1
+_ELFCLASS64 = 2
+_ELFDATA2MSB = 2
+
+_PT_LOAD    = 1
+_PT_DYNAMIC = 2
+_PT_NOTE    = 4
+
+_DT_NULL     = 0
+_DT_NEEDED   = 1
+_DT_HASH     = 4
+_DT_STRTAB   = 5
+_DT_SYMTAB   = 6
+_DT_STRSZ    = 10
+_DT_SONAME   = 14
+_DT_GNU_HASH = 0x6ffffef5
+
+_NT_GNU_BUILD_ID = 3
+
+_STB_GLOBAL = 1
+_STB_WEAK   = 2
+_STV_HIDDEN   = 2
+_STV_INTERNAL = 1
+_SHN_UNDEF  = 0
+
+# e_machine values of the Android ABIs (and a few older ones)
+ELF_MACHINES = {
+    3: "x86",
+    8: "MIPS",
+    40: "ARM",
+    62: "x86-64",
+    183: "AArch64",
+    243: "RISC-V",
+}
+
+# Per class: header fields, program header, dynamic entry, symbol layout
+_LAYOUTS = {
+    _ELFCLASS32: {
+        "header": ("I", 28, "H", 42),             # e_phoff type/offset, e_phentsize type/offset
+        "phdr": "8I",                             # type, offset, vaddr, paddr, filesz, memsz, flags, align
+        "dyn": "iI",
+        "sym": "IIIBBH",                          # name, value, size, info, other, shndx
+        "word": 4,
+    },
+    _ELFCLASS64: {
+        "header": ("Q", 32, "H", 54),
+        "phdr": "IIQQQQQQ",                       # type, flags, offset, vaddr, paddr, filesz, memsz, align
+        "dyn": "qQ",
+        "sym": "IBBHQQ",                          # name, info, other, shndx, value, size
+        "word": 8,
+    },
+}
+
+# The dynamic section is read this many entries at a time
+_DYN_BATCH = 64
+
+# Bytes kept from the start of a compressed entry (ELF header and program headers)
+_HEAD_SIZE = 4096
+
+#---------------------------------------------------------
+# ELF METADATA
+#---------------------------------------------------------
+
+def _abi_from_path(path: str) -> str | None:
+    parts = path.split("/")
+    return parts[1] if len(parts) >= 3 and parts[0] == "lib" else None
+
+def _c_string(table: bytes, offset: int) -> str | None:
+    if offset >= len(table):
+        return None
+    end = table.find(b"\x00", offset)
+    return table[offset:end if end >= 0 else len(table)].decode("utf-8", errors="replace")
+
+def _build_id(notes: bytes, order: str) -> str | None:
+    pos = 0
+    while pos + 12 <= len(notes):
+        name_size, desc_size, note_type = struct.unpack_from(order + "3I", notes, pos)
+        pos += 12
+        name_end = pos + (name_size + 3) // 4 * 4
+        desc_end = name_end + (desc_size + 3) // 4 * 4
+        if note_type == _NT_GNU_BUILD_ID and notes[pos:pos + name_size] == b"GNU\x00":
+            return notes[name_end:name_end + desc_size].hex()
+        pos = desc_end
+    return None
+
+def read_elf_metadata(reader: EntryRangeReader) -> dict | None:
+    """
+    ABI, e_machine, DT_NEEDED, SONAME, exported-symbol count and build-id of
+    one ELF entry.  Only the ELF header, the program headers, PT_NOTE, the
+    dynamic section and the tables it points to are read.  Returns None if
+    the entry is not an ELF file.
+    """
+    # Header and program headers; extended below to the first load segment
+    reader.retain(0, _HEAD_SIZE)
+    ident = reader.read(0, 64)
+    if len(ident) < 52 or ident[:4] != _ELF_MAGIC or ident[4] not in _LAYOUTS:
+        return None
+
+    elf_class = ident[4]
+    layout = _LAYOUTS[elf_class]
+    order = ">" if ident[5] == _ELFDATA2MSB else "<"
+    machine = struct.unpack_from(order + "H", ident, 18)[0]
+    phoff_type, phoff_at, phent_type, phent_at = layout["header"]
+    phoff = struct.unpack_from(order + phoff_type, ident, phoff_at)[0]
+    phentsize, phnum = struct.unpack_from(order + "HH", ident, phent_at)
+
+    phdr = struct.Struct(order + layout["phdr"])
+    table = reader.read(phoff, phentsize * phnum)
+    segments = []
+    for n in range(min(phnum, len(table) // max(phentsize, 1))):
+        fields = phdr.unpack_from(table, n * phentsize)
+        if elf_class == _ELFCLASS64:
+            p_type, _, p_offset, p_vaddr, _, p_filesz, _, _ = fields
+        else:
+            p_type, p_offset, p_vaddr, _, p_filesz, _, _, _ = fields
+        segments.append((p_type, p_offset, p_vaddr, p_filesz))
+
+    loads = sorted((seg for seg in segments if seg[0] == _PT_LOAD), key=lambda seg: seg[1])
+    dynamic = next((seg for seg in segments if seg[0] == _PT_DYNAMIC), None)
+
+    # The string / symbol / hash tables live in the first (read-only) load
+    # segment, before the dynamic section, so keep it while inflating past it.
+    if loads:
+        reader.retain(loads[0][1], loads[0][1] + loads[0][3])
+
+    metadata = {
+        "abi": _abi_from_path(reader.name),
+        "elf_class": 64 if elf_class == _ELFCLASS64 else 32,
+        "e_machine": machine,
+        "machine": ELF_MACHINES.get(machine, "unknown"),
+        "soname": None,
+        "needed": [],
+        "exported_symbols": None,
+        "build_id": None,
+    }
+
+    for p_type, p_offset, _, p_filesz in segments:
+        if p_type == _PT_NOTE and metadata["build_id"] is None:
+            metadata["build_id"] = _build_id(reader.read(p_offset, p_filesz), order)
+
+    if dynamic is None:
+        return metadata
+
+    def file_offset(vaddr: int) -> int | None:
+        for _, p_offset, p_vaddr, p_filesz in loads:
+            if p_vaddr <= vaddr < p_vaddr + p_filesz:
+                return p_offset + vaddr - p_vaddr
+        return None
+
+    dyn = struct.Struct(order + layout["dyn"])
+    tags: dict[int, int] = {}
+    needed: list[int] = []
+    pos, stop = dynamic[1], dynamic[1] + dynamic[3]
+    while pos < stop:
+        batch = reader.read(pos, min(dyn.size * _DYN_BATCH, stop - pos))
+        if len(batch) < dyn.size:
+            break
+        pos += len(batch)
+        for tag, value in dyn.iter_unpack(batch[:len(batch) // dyn.size * dyn.size]):
+            if tag == _DT_NULL:
+                pos = stop
+                break
+            if tag == _DT_NEEDED:
+                needed.append(value)
+            else:
+                tags.setdefault(tag, value)
+
+    strtab = file_offset(tags.get(_DT_STRTAB, -1))
+    if strtab is not None:
+        strings = reader.read(strtab, tags.get(_DT_STRSZ, 0))
+        metadata["needed"] = [name for name in (_c_string(strings, n) for n in needed) if name is not None]
+        if _DT_SONAME in tags:
+            metadata["soname"] = _c_string(strings, tags[_DT_SONAME])
+
+    symtab = file_offset(tags.get(_DT_SYMTAB, -1))
+    if symtab is not None:
+        count = _dynamic_symbol_count(reader, tags, file_offset, order, layout["word"])
+        if count is not None:
+            metadata["exported_symbols"] = _count_exported(reader.read(symtab, count * struct.calcsize(order + layout["sym"])),
+                                                           order, layout["sym"], elf_class)
+    return metadata
+
+def _dynamic_symbol_count(reader: EntryRangeReader, tags: dict[int, int], file_offset, order: str, word: int) -> int | None:
+    """Number of .dynsym entries, from DT_HASH (nchain) or by walking DT_GNU_HASH."""
+    hash_offset = file_offset(tags.get(_DT_HASH, -1))
+    if hash_offset is not None:
+        return struct.unpack(order + "2I", reader.read(hash_offset, 8))[1]
+
+    gnu_offset = file_offset(tags.get(_DT_GNU_HASH, -1))
+    if gnu_offset is None:
+        return None
+    nbuckets, symoffset, bloom_size, _ = struct.unpack(order + "4I", reader.read(gnu_offset, 16))
+    buckets_at = gnu_offset + 16 + bloom_size * word
+    buckets = struct.unpack(order + f"{nbuckets}I", reader.read(buckets_at, 4 * nbuckets))
+    last = max(buckets, default=0)
+    if last < symoffset:
+        return symoffset
+
+    # Walk the chain of the highest bucket to its end marker (low bit set)
+    chain_at = buckets_at + 4 * nbuckets + 4 * (last - symoffset)
+    while True:
+        value = reader.read(chain_at, 4)
+        if len(value) < 4:
+            return None
+        if struct.unpack(order + "I", value)[0] & 1:
+            return last + 1
+        last += 1
+        chain_at += 4
+
+def _count_exported(symbols: bytes, order: str, sym_format: str, elf_class: int) -> int:
+    """Defined GLOBAL/WEAK symbols with default or protected visibility."""
+    sym = struct.Struct(order + sym_format)
+    exported = 0
+    for fields in sym.iter_unpack(symbols[:len(symbols) // sym.size * sym.size]):
+        if elf_class == _ELFCLASS64:
+            _, info, other, shndx, _, _ = fields
+        else:
+            _, _, _, info, other, shndx = fields
+        if shndx != _SHN_UNDEF and info >> 4 in (_STB_GLOBAL, _STB_WEAK) \
+                and other & 3 not in (_STV_HIDDEN, _STV_INTERNAL):
+            exported += 1
+    return exported
+
+def extract_elf_metadata(apk_path, stats: dict | None = None) -> dict[str, dict]:
+    """
+    ELF metadata of every lib/**.so entry, keyed by entry path.  Entries are
+    located through the central directory (ApkIndex) and read with range
+    reads, so only the needed bytes are inflated.  If stats is given, it
+    receives the compressed / inflated byte counts and the full sizes.
+    """
+    results: dict[str, dict] = {}
+    totals = {"compressed_read": 0, "inflated": 0, "compressed_size": 0, "file_size": 0}
+    with ApkIndex(apk_path) as index:
+        for i, name in enumerate(index.names):
+            if not (name.startswith("lib/") and name.endswith(".so")):
+                continue
+            try:
+                reader = index.open_range_reader(i)
+                metadata = read_elf_metadata(reader)
+            except Exception as e:
+                print(f"Error reading ELF metadata of {name} in {apk_path}: {e}")
+                continue
+            if metadata is not None:
+                results[name] = metadata
+            totals["compressed_read"] += reader.compressed_read
+            totals["inflated"] += reader.inflated
+            totals["compressed_size"] += index.compressed_sizes[i]
+            totals["file_size"] += index.file_sizes[i]
+    if stats is not None:
+        stats.update(totals)
+    return results
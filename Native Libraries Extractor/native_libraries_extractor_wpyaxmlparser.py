@@ -1,12 +1,20 @@
 import json
 import os
 import sys
-import glob
 import argparse
 
 import xml.etree.ElementTree as ET
+from functools import partial
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Toolkit", "Common"))
+from apk_index import ApkIndex, native_library_names
+from batch_driver import iter_apk_files, output_base_for, run_batch, add_batch_arguments
+from result_sinks import FIELD_LIST, FileResultSink, add_sink_arguments, open_sink_from_args
 from pyaxmlparser import APK as PyaxAPK
 
+# Record fields of the corpus (ndjson / sqlite / parquet) sinks
+RESULT_FIELDS = {"native_libraries": FIELD_LIST}
+
 def extract_native_libs_wpyax(apk_path):
     """
     Extract native library names from an APK file using pyaxmlparser.
@@ -27,6 +35,18 @@ def extract_native_libs_wpyax(apk_path):
     
     return native_libs
 
+def extract_native_libs_windex(apk_path):
+    """
+    Extract native library names from the central directory only (ApkIndex),
+    without building a full APK object.
+    """
+    try:
+        with ApkIndex(apk_path) as index:
+            return native_library_names(index)
+    except Exception as e:
+        print(f"Error reading {apk_path}: {e}")
+        return []
+
 def save_to_json(libs, output_file):
     data = {"native_libraries": libs}
     try:
@@ -51,35 +71,49 @@ def save_to_xml(libs, output_file):
     except Exception as e:
         print(f"Error saving XML to {output_file}: {e}")
 
-def process_apk(apk_path, output_dir, verbose=False):
-    """
-    Process a single APK file and save results in the output directory.
-    """
-    apk_name = os.path.splitext(os.path.basename(apk_path))[0]
-    native_libs = extract_native_libs_wpyax(apk_path)
-    
-    if not native_libs:
+def extract_apk(apk_path, use_index=False):
+    """Native libraries of one APK as a result record; the worker run by the batch driver in directory mode."""
+    if use_index:
+        return {"native_libraries": extract_native_libs_windex(apk_path)}
+    return {"native_libraries": extract_native_libs_wpyax(apk_path)}
+
+def save_results(apk_path, record, output_base):
+    """Per-APK JSON + XML output of the default "files" sink."""
+    if not record["native_libraries"]:
         print(f"No native libraries found in {apk_path}")
         return
     
-    if verbose:
-        print(f"Found native libraries in {apk_path}: {native_libs}")
-    
-    json_output = os.path.join(output_dir, f"{apk_name}_libs.json")
-    xml_output = os.path.join(output_dir, f"{apk_name}_libs.xml")
-    
-    save_to_json(native_libs, json_output)
-    save_to_xml(native_libs, xml_output)
+    save_to_json(record["native_libraries"], f"{output_base}_libs.json")
+    save_to_xml(record["native_libraries"], f"{output_base}_libs.xml")
+
+def write_result(sink, apk_path, record, output_base, verbose=False):
+    if verbose and record["native_libraries"]:
+        print(f"Found native libraries in {apk_path}: {record['native_libraries']}")
+    sink.write(apk_path, record, output_base)
+
+def process_apk(apk_path, output_dir, verbose=False, use_index=False, sink=None):
+    """
+    Process a single APK file and save results in the output directory
+    (or to sink).
+    """
+    apk_name = os.path.splitext(os.path.basename(apk_path))[0]
+    record = extract_apk(apk_path, use_index)
+    write_result(sink or FileResultSink(save_results), apk_path, record, os.path.join(output_dir, apk_name), verbose)
 
 def main():
     parser = argparse.ArgumentParser(description="Extract native libraries from APK files.")
     parser.add_argument("path", help="Path to an APK file or directory containing APKs")
     parser.add_argument("-v", "--verbose", action="store_true", help="Print verbose output (list of libraries)")
+    parser.add_argument("--index", action="store_true",
+                        help="List libraries from the ZIP central directory instead of pyaxmlparser (much faster)")
+    add_batch_arguments(parser)
+    add_sink_arguments(parser)
     
     # Parse arguments
     args = parser.parse_args()
     input_path = args.path
     verbose = args.verbose
+    use_index = args.index
     
     if not os.path.exists(input_path):
         print(f"Error: {input_path} does not exist!")
@@ -88,7 +122,9 @@ def main():
     # If it's a single APK file
     if os.path.isfile(input_path) and input_path.endswith('.apk'):
         output_dir = os.path.dirname(input_path) or '.'
-        process_apk(input_path, output_dir, verbose)
+        apk_name = os.path.splitext(os.path.basename(input_path))[0]
+        with open_sink_from_args(args, os.path.join(output_dir, f"{apk_name}_libs"), RESULT_FIELDS, save_results) as sink:
+            process_apk(input_path, output_dir, verbose, use_index, sink)
     
     # If it's a directory
     elif os.path.isdir(input_path):
@@ -96,15 +132,20 @@ def main():
         output_dir = os.path.join(input_path, "apks_libs")
         os.makedirs(output_dir, exist_ok=True)
         
-        # Find all APK files in the directory
-        apk_files = glob.glob(os.path.join(input_path, "*.apk"))
-        if not apk_files:
+        # Walk the directory lazily; results are saved as each APK finishes
+        apk_files = iter_apk_files(input_path, args.recursive, exclude=[output_dir])
+        found = False
+        with open_sink_from_args(args, os.path.join(output_dir, "native_libraries"), RESULT_FIELDS, save_results) as sink:
+            for apk_file, record, error in run_batch(partial(extract_apk, use_index=use_index), apk_files, args.jobs):
+                found = True
+                if error is not None:
+                    print(f"Error processing {apk_file}: {error}")
+                    continue
+                write_result(sink, apk_file, record, output_base_for(apk_file, input_path, output_dir), verbose)
+        
+        if not found:
             print(f"No APK files found in {input_path}")
             sys.exit(1)
-        
-        # Process each APK
-        for apk_file in apk_files:
-            process_apk(apk_file, output_dir, verbose)
     
     else:
         print(f"Error: {input_path} is neither a valid APK file nor a directory!")
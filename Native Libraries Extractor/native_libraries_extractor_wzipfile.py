@@ -1,28 +1,35 @@
-import zipfile
 import json
 import os
 import sys
-import glob
 import argparse
 
 import xml.etree.ElementTree as ET
+from functools import partial
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Toolkit", "Common"))
+from apk_index import ApkIndex, native_library_names
+from native_libraries_elf_metadata import extract_elf_metadata
+from batch_driver import iter_apk_files, output_base_for, run_batch, add_batch_arguments
+from result_sinks import FIELD_JSON, FIELD_LIST, FileResultSink, add_sink_arguments, open_sink_from_args
+
+# Record fields of the corpus (ndjson / sqlite / parquet) sinks
+RESULT_FIELDS = {"native_libraries": FIELD_LIST, "elf_metadata": FIELD_JSON}
 
 def extract_native_libs(apk_path):
-    native_libs = []
+    # Only the central directory is parsed; no file data is decompressed
     try:
-        with zipfile.ZipFile(apk_path, 'r') as apk:
-            for file_info in apk.infolist():
-                if file_info.filename.startswith('lib/') and file_info.filename.endswith('.so'):
-                    lib_name = os.path.basename(file_info.filename)
-                    native_libs.append(lib_name)
+        with ApkIndex(apk_path) as index:
+            native_libs = native_library_names(index)
     except Exception as e:
         print(f"Error reading {apk_path}: {e}")
         return []
     
     return native_libs
 
-def save_to_json(libs, output_file):
+def save_to_json(libs, output_file, elf_metadata=None):
     data = {"native_libraries": libs}
+    if elf_metadata is not None:
+        data["elf_metadata"] = elf_metadata
     try:
         with open(output_file, 'w') as f:
             json.dump(data, f, indent=4)
@@ -30,13 +37,25 @@ def save_to_json(libs, output_file):
     except Exception as e:
         print(f"Error saving JSON to {output_file}: {e}")
 
-def save_to_xml(libs, output_file):
+def save_to_xml(libs, output_file, elf_metadata=None):
     root = ET.Element("native_libraries")
     
     for lib in libs:
         lib_elem = ET.SubElement(root, "library")
         lib_elem.text = lib
     
+    if elf_metadata is not None:
+        elf_root = ET.SubElement(root, "elf_metadata")
+        for path, metadata in elf_metadata.items():
+            lib_elem = ET.SubElement(elf_root, "library", path=path)
+            for key, value in metadata.items():
+                if key == "needed":
+                    needed_elem = ET.SubElement(lib_elem, "needed")
+                    for name in value:
+                        ET.SubElement(needed_elem, "library").text = name
+                elif value is not None:
+                    ET.SubElement(lib_elem, key).text = str(value)
+    
     tree = ET.ElementTree(root)
     try:
         ET.indent(tree, space="    ")
@@ -45,35 +64,59 @@ def save_to_xml(libs, output_file):
     except Exception as e:
         print(f"Error saving XML to {output_file}: {e}")
 
-def process_apk(apk_path, output_dir, verbose=False):
+def extract_apk(apk_path, elf=False):
     """
-    Process a single APK file and save results in the output directory.
+    Native libraries (and ELF metadata if elf is set) of one APK as a
+    result record; the worker run by the batch driver in directory mode.
     """
-    apk_name = os.path.splitext(os.path.basename(apk_path))[0]
     native_libs = extract_native_libs(apk_path)
     
-    if not native_libs:
+    elf_metadata = None
+    if elf and native_libs:
+        try:
+            elf_metadata = extract_elf_metadata(apk_path)
+        except Exception as e:
+            print(f"Error reading ELF metadata from {apk_path}: {e}")
+    
+    return {"native_libraries": native_libs, "elf_metadata": elf_metadata}
+
+def save_results(apk_path, record, output_base):
+    """Per-APK JSON + XML output of the default "files" sink."""
+    if not record["native_libraries"]:
         print(f"No native libraries found in {apk_path}")
         return
     
-    if verbose:
-        print(f"Found native libraries in {apk_path}: {native_libs}")
-    
-    json_output = os.path.join(output_dir, f"{apk_name}_libs.json")
-    xml_output = os.path.join(output_dir, f"{apk_name}_libs.xml")
-    
-    save_to_json(native_libs, json_output)
-    save_to_xml(native_libs, xml_output)
+    save_to_json(record["native_libraries"], f"{output_base}_libs.json", record["elf_metadata"])
+    save_to_xml(record["native_libraries"], f"{output_base}_libs.xml", record["elf_metadata"])
+
+def write_result(sink, apk_path, record, output_base, verbose=False):
+    if verbose and record["native_libraries"]:
+        print(f"Found native libraries in {apk_path}: {record['native_libraries']}")
+    sink.write(apk_path, record, output_base)
+
+def process_apk(apk_path, output_dir, verbose=False, elf=False, sink=None):
+    """
+    Process a single APK file and save results in the output directory
+    (or to sink).
+    """
+    apk_name = os.path.splitext(os.path.basename(apk_path))[0]
+    record = extract_apk(apk_path, elf)
+    write_result(sink or FileResultSink(save_results), apk_path, record, os.path.join(output_dir, apk_name), verbose)
 
 def main():
     parser = argparse.ArgumentParser(description="Extract native libraries from APK files.")
     parser.add_argument("path", help="Path to an APK file or directory containing APKs")
     parser.add_argument("-v", "--verbose", action="store_true", help="Print verbose output (list of libraries)")
+    parser.add_argument("--elf", action="store_true",
+                        help="Also report ABI, e_machine, DT_NEEDED, SONAME, exported symbols and build-id of each library")
+    add_batch_arguments(parser)
+    add_sink_arguments(parser)
     
     # Parse arguments
     args = parser.parse_args()
     input_path = args.path
     verbose = args.verbose
+    elf = args.elf
     
     if not os.path.exists(input_path):
         print(f"Error: {input_path} does not exist!")
@@ -82,7 +125,9 @@ def main():
     # If it's a single APK file
     if os.path.isfile(input_path) and input_path.endswith('.apk'):
         output_dir = os.path.dirname(input_path) or '.'
-        process_apk(input_path, output_dir, verbose)
+        apk_name = os.path.splitext(os.path.basename(input_path))[0]
+        with open_sink_from_args(args, os.path.join(output_dir, f"{apk_name}_libs"), RESULT_FIELDS, save_results) as sink:
+            process_apk(input_path, output_dir, verbose, elf, sink)
     
     # If it's a directory
     elif os.path.isdir(input_path):
@@ -90,15 +135,20 @@ def main():
         output_dir = os.path.join(input_path, "apks_libs")
         os.makedirs(output_dir, exist_ok=True)
         
-        # Find all APK files in the directory
-        apk_files = glob.glob(os.path.join(input_path, "*.apk"))
-        if not apk_files:
+        # Walk the directory lazily; results are saved as each APK finishes
+        apk_files = iter_apk_files(input_path, args.recursive, exclude=[output_dir])
+        found = False
+        with open_sink_from_args(args, os.path.join(output_dir, "native_libraries"), RESULT_FIELDS, save_results) as sink:
+            for apk_file, record, error in run_batch(partial(extract_apk, elf=elf), apk_files, args.jobs):
+                found = True
+                if error is not None:
+                    print(f"Error processing {apk_file}: {error}")
+                    continue
+                write_result(sink, apk_file, record, output_base_for(apk_file, input_path, output_dir), verbose)
+        
+        if not found:
             print(f"No APK files found in {input_path}")
             sys.exit(1)
-        
-        # Process each APK
-        for apk_file in apk_files:
-            process_apk(apk_file, output_dir, verbose)
     
     else:
         print(f"Error: {input_path} is neither a valid APK file nor a directory!")
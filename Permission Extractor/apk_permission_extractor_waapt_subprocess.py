@@ -1,25 +1,57 @@
 import subprocess
 import json
 import os
+import re
 import sys
-import glob
+import shutil
+import argparse
 import xml.etree.ElementTree as ET
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Toolkit", "Common"))
+from aapt2_daemon import Aapt2DaemonCrashed, Aapt2Error, get_shared_pool
+from batch_driver import iter_apk_files, output_base_for, run_batch, add_batch_arguments
+from result_sinks import FIELD_LIST, FileResultSink, add_sink_arguments, open_sink_from_args
+
+# "uses-permission: name='android.permission.X'" (aapt2 may append maxSdkVersion='N')
+_RE_PERMISSION_NAME = re.compile(r"name='([^']*)'")
+
+# Record fields of the corpus (ndjson / sqlite / parquet) sinks
+RESULT_FIELDS = {"permissions": FIELD_LIST}
+
+def get_aapt2_pool(workers=None, timeout=60.0):
+    """
+    Return the shared aapt2 daemon pool, or None if aapt2 is not on PATH
+    (extract_permissions then runs one aapt process per APK instead).
+    """
+    return get_shared_pool(workers, timeout)
+
+def _parse_permissions(lines):
+    permissions = []
+    for line in lines:
+        if line.startswith('uses-permission:'):
+            match = _RE_PERMISSION_NAME.search(line)
+            if match:
+                permissions.append(match.group(1))
+    return permissions
+
 def extract_permissions(apk_path):
-    """Extract permissions from an APK file using aapt"""
+    """Extract permissions from an APK file using aapt2 (daemon), or aapt if that is missing or fails"""
+    pool = get_aapt2_pool()
+    if pool is not None:
+        try:
+            # Not the shared badging pass: badging adds the permissions aapt2 infers
+            # (uses-implied-permission) and lists each name once
+            return _parse_permissions(pool.dump('permissions', apk_path))
+        except (Aapt2Error, Aapt2DaemonCrashed, TimeoutError, OSError) as e:
+            print(f"Error running aapt2 for {apk_path}: {e}; falling back to aapt")
+
     try:
         result = subprocess.run(['aapt', 'dump', 'permissions', apk_path], 
                               capture_output=True, 
                               text=True, 
                               check=True)
         
-        permissions = []
-        for line in result.stdout.split('\n'):
-            if line.startswith('uses-permission:'):
-                permission = line.split('name=')[1].strip("'")
-                permissions.append(permission)
-        
-        return permissions
+        return _parse_permissions(result.stdout.split('\n'))
     
     except subprocess.CalledProcessError as e:
         print(f"Error running aapt for {apk_path}: {e}")
@@ -52,13 +84,22 @@ def save_to_xml(permissions, output_file):
     except Exception as e:
         print(f"Error saving to XML: {e}")
 
-def process_apk(apk_path, output_dir='./'):
-    permissions = extract_permissions(apk_path)
-    
-    if not permissions:
+def extract_apk(apk_path):
+    """Permissions of one APK as a result record; the worker run by the batch driver in directory mode."""
+    return {"permissions": extract_permissions(apk_path)}
+
+def save_results(apk_path, record, output_base):
+    """Per-APK JSON + XML output of the default "files" sink."""
+    if not record["permissions"]:
         print(f"No permissions found or extraction failed for {apk_path}")
         return
 
+    save_to_json(record["permissions"], f"{output_base}_permissions.json")
+    save_to_xml(record["permissions"], f"{output_base}_permissions.xml")
+
+def process_apk(apk_path, output_dir='./', sink=None):
+    record = extract_apk(apk_path)
+
     # Determine output path
     if output_dir:
         base_name = os.path.splitext(os.path.basename(apk_path))[0]
@@ -67,29 +108,31 @@ def process_apk(apk_path, output_dir='./'):
         base_name = os.path.splitext(apk_path)[0]
         output_base = base_name
 
-    json_output = f"{output_base}_permissions.json"
-    xml_output = f"{output_base}_permissions.xml"
-
-    save_to_json(permissions, json_output)
-    save_to_xml(permissions, xml_output)
+    (sink or FileResultSink(save_results)).write(apk_path, record, output_base)
 
 def main():
-    # Check if aapt is available
-    if not subprocess.run(['which', 'aapt'], capture_output=True).stdout:
-        print("Please install Android SDK build-tools and ensure aapt is in your PATH")
-        return
+    parser = argparse.ArgumentParser(description="Extract permissions from APK files with aapt2 (daemon mode) or aapt.")
+    parser.add_argument("path", help="Path to an APK file or directory containing APKs")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="Number of aapt2 daemons (and APKs processed at once); defaults to the CPU count")
+    parser.add_argument("-t", "--timeout", type=float, default=60.0,
+                        help="Seconds allowed per APK before its aapt2 daemon is killed and restarted")
+    add_batch_arguments(parser, jobs=False)
+    add_sink_arguments(parser)
+    args = parser.parse_args()
 
-    if len(sys.argv) != 2:
-        print("Usage: python3 apk_permission_extractor.py <apk_file_or_directory>")
-        print("Example: python3 apk_permission_extractor.py app.apk")
-        print("Example: python3 apk_permission_extractor.py /path/to/apks/")
-        sys.exit(1)
+    # Check if aapt2 or aapt is available
+    pool = get_aapt2_pool(args.workers, args.timeout)
+    if pool is None and not shutil.which('aapt'):
+        print("Please install Android SDK build-tools and ensure aapt2 or aapt is in your PATH")
+        return
 
-    input_path = sys.argv[1]
+    input_path = args.path
 
     # Handle single file
     if os.path.isfile(input_path) and input_path.endswith('.apk'):
-        process_apk(input_path)
+        with open_sink_from_args(args, os.path.splitext(input_path)[0] + "_permissions", RESULT_FIELDS, save_results) as sink:
+            process_apk(input_path, sink=sink)
     
     # Handle directory
     elif os.path.isdir(input_path):
@@ -97,14 +140,22 @@ def main():
         input_dir = input_path.rstrip('/')  # Remove trailing slash if present
         output_dir = f"{input_dir}_permissions"
         
-        apk_files = glob.glob(os.path.join(input_path, '*.apk'))
+        # Walk the directory lazily; one APK per aapt2 daemon (or aapt process) at a
+        # time, on threads since the work happens in those processes
+        apk_files = iter_apk_files(input_path, args.recursive, exclude=[output_dir])
+        workers = pool.workers if pool is not None else args.workers
+        found = False
+        with open_sink_from_args(args, output_dir, RESULT_FIELDS, save_results) as sink:
+            for apk_file, record, error in run_batch(extract_apk, apk_files, workers, threads=True):
+                found = True
+                if error is not None:
+                    print(f"Error processing {apk_file}: {error}")
+                    continue
+                sink.write(apk_file, record, output_base_for(apk_file, input_path, output_dir))
         
-        if not apk_files:
+        if not found:
             print(f"No APK files found in {input_path}")
             sys.exit(1)
-
-        for apk_file in apk_files:
-            process_apk(apk_file, output_dir)
     
     else:
         print("Invalid input: must be an APK file or a directory")
@@ -1,11 +1,18 @@
 import json
 import os
 import sys
-import glob
+import argparse
 
 import xml.etree.ElementTree as ET
 from androguard.core.apk import APK
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Toolkit", "Common"))
+from batch_driver import iter_apk_files, output_base_for, run_batch, add_batch_arguments
+from result_sinks import FIELD_LIST, FileResultSink, add_sink_arguments, open_sink_from_args
+
+# Record fields of the corpus (ndjson / sqlite / parquet) sinks
+RESULT_FIELDS = {"permissions": FIELD_LIST}
+
 def extract_permissions_wandroguard(apk_path):
     """Extract permissions from an APK file using androguard"""
     try:
@@ -43,14 +50,23 @@ def save_to_xml(permissions, output_file):
     except Exception as e:
         print(f"Error saving to XML: {e}")
 
-def process_apk(apk_path, output_dir='./'):
-    """Process a single APK file"""
-    permissions = extract_permissions_wandroguard(apk_path)
-    
-    if not permissions:
+def extract_apk(apk_path):
+    """Permissions of one APK as a result record; the worker run by the batch driver in directory mode."""
+    return {"permissions": extract_permissions_wandroguard(apk_path)}
+
+def save_results(apk_path, record, output_base):
+    """Per-APK JSON + XML output of the default "files" sink."""
+    if not record["permissions"]:
         print(f"No permissions found or extraction failed for {apk_path}")
         return
 
+    save_to_json(record["permissions"], f"{output_base}_permissions.json")
+    save_to_xml(record["permissions"], f"{output_base}_permissions.xml")
+
+def process_apk(apk_path, output_dir='./', sink=None):
+    """Process a single APK file"""
+    record = extract_apk(apk_path)
+
     # Determine output path
     if output_dir:
         base_name = os.path.splitext(os.path.basename(apk_path))[0]
@@ -60,25 +76,22 @@ def process_apk(apk_path, output_dir='./'):
         base_name = os.path.splitext(os.path.basename(apk_path))[0]
         output_base = os.path.join(input_dir, base_name)
 
-    json_output = f"{output_base}_permissions.json"
-    xml_output = f"{output_base}_permissions.xml"
-
-    save_to_json(permissions, json_output)
-    save_to_xml(permissions, xml_output)
+    (sink or FileResultSink(save_results)).write(apk_path, record, output_base)
 
 def main():
-    # Check command line arguments
-    if len(sys.argv) != 2:
-        print("Usage: python3 apk_permission_extractor_wandroguard.py <apk_file_or_directory>")
-        print("Example: python3 apk_permission_extractor_wandroguard.py app.apk")
-        print("Example: python3 apk_permission_extractor_wandroguard.py /path/to/apks/")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Extract permissions from APK files using androguard.",
+                                     epilog="Example: python3 apk_permission_extractor_wandroguard.py /path/to/apks/")
+    parser.add_argument("path", help="Path to an APK file or directory containing APKs")
+    add_batch_arguments(parser)
+    add_sink_arguments(parser)
+    args = parser.parse_args()
 
-    input_path = sys.argv[1]
+    input_path = args.path
 
     # Handle single file
     if os.path.isfile(input_path) and input_path.endswith('.apk'):
-        process_apk(input_path)
+        with open_sink_from_args(args, os.path.splitext(os.path.basename(input_path))[0] + "_permissions", RESULT_FIELDS, save_results) as sink:
+            process_apk(input_path, sink=sink)
     
     # Handle directory
     elif os.path.isdir(input_path):
@@ -86,14 +99,20 @@ def main():
         input_dir = input_path.rstrip('/')  # Remove trailing slash if present
         output_dir = f"{input_dir}_permissions"
         
-        apk_files = glob.glob(os.path.join(input_path, '*.apk'))
+        # Walk the directory lazily; results are saved as each APK finishes
+        apk_files = iter_apk_files(input_path, args.recursive, exclude=[output_dir])
+        found = False
+        with open_sink_from_args(args, output_dir, RESULT_FIELDS, save_results) as sink:
+            for apk_file, record, error in run_batch(extract_apk, apk_files, args.jobs):
+                found = True
+                if error is not None:
+                    print(f"Error processing {apk_file}: {error}")
+                    continue
+                sink.write(apk_file, record, output_base_for(apk_file, input_path, output_dir))
         
-        if not apk_files:
+        if not found:
             print(f"No APK files found in {input_path}")
             sys.exit(1)
-
-        for apk_file in apk_files:
-            process_apk(apk_file, output_dir)
     
     else:
         print("Invalid input: must be an APK file or a directory")
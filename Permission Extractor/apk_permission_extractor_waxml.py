@@ -0,0 +1,143 @@
+import json
+import os
+import sys
+import argparse
+
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Toolkit", "Common"))
+from axml_reader import read_manifest_permissions
+from batch_driver import iter_apk_files, output_base_for, run_batch, add_batch_arguments
+from result_sinks import FIELD_JSON, FIELD_LIST, FileResultSink, add_sink_arguments, open_sink_from_args
+
+# Record fields of the corpus (ndjson / sqlite / parquet) sinks
+RESULT_FIELDS = {"permissions": FIELD_LIST, "permissions_sdk23": FIELD_LIST, "declared_permissions": FIELD_JSON}
+
+def _read_permissions(apk_path):
+    try:
+        return read_manifest_permissions(apk_path)
+    except Exception as e:
+        print(f"Error extracting permissions from {apk_path}: {e}")
+        return {"permissions": [], "permissions_sdk23": [], "declared_permissions": []}
+
+def extract_permissions_waxml(apk_path):
+    """
+    Extract <uses-permission> names by streaming the binary
+    AndroidManifest.xml (no androguard / pyaxmlparser APK object)
+    """
+    return _read_permissions(apk_path)["permissions"]
+
+def save_to_json(permissions, output_file, declared_permissions=None, permissions_sdk23=None):
+    try:
+        os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+        data = {"permissions": permissions}
+        if permissions_sdk23:
+            data["permissions_sdk23"] = permissions_sdk23
+        if declared_permissions:
+            data["declared_permissions"] = declared_permissions
+        with open(output_file, 'w') as f:
+            json.dump(data, f, indent=4)
+        print(f"Permissions saved to {output_file}")
+    except Exception as e:
+        print(f"Error saving to JSON: {e}")
+
+def save_to_xml(permissions, output_file, declared_permissions=None, permissions_sdk23=None):
+    try:
+        os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+        root = ET.Element("permissions")
+        for perm in permissions:
+            perm_elem = ET.SubElement(root, "permission")
+            perm_elem.text = perm
+
+        for perm in permissions_sdk23 or []:
+            perm_elem = ET.SubElement(root, "permission_sdk23")
+            perm_elem.text = perm
+
+        for declared in declared_permissions or []:
+            declared_elem = ET.SubElement(root, "declared_permission")
+            declared_elem.text = declared["name"]
+            if declared["protection_level"] is not None:
+                declared_elem.set("protection_level", str(declared["protection_level"]))
+
+        tree = ET.ElementTree(root)
+        ET.indent(tree, space="    ")
+        tree.write(output_file, encoding='utf-8', xml_declaration=True)
+        print(f"Permissions saved to {output_file}")
+    except Exception as e:
+        print(f"Error saving to XML: {e}")
+
+def extract_apk(apk_path):
+    """
+    Requested (plain and sdk-23) and declared permissions of one APK as a
+    result record; the worker run by the batch driver in directory mode.
+    """
+    return _read_permissions(apk_path)
+
+def save_results(apk_path, record, output_base):
+    """Per-APK JSON + XML output of the default "files" sink."""
+    if not record["permissions"] and not record["permissions_sdk23"] and not record["declared_permissions"]:
+        print(f"No permissions found or extraction failed for {apk_path}")
+        return
+
+    save_to_json(record["permissions"], f"{output_base}_permissions.json",
+                 record["declared_permissions"], record["permissions_sdk23"])
+    save_to_xml(record["permissions"], f"{output_base}_permissions.xml",
+                record["declared_permissions"], record["permissions_sdk23"])
+
+def process_apk(apk_path, output_dir='./', sink=None):
+    """Process a single APK file"""
+    record = extract_apk(apk_path)
+
+    # Determine output path
+    if output_dir:
+        base_name = os.path.splitext(os.path.basename(apk_path))[0]
+        output_base = os.path.join(output_dir, base_name)
+    else:
+        input_dir = os.path.dirname(apk_path) or '.'  # Use current dir if no dir in path
+        base_name = os.path.splitext(os.path.basename(apk_path))[0]
+        output_base = os.path.join(input_dir, base_name)
+
+    (sink or FileResultSink(save_results)).write(apk_path, record, output_base)
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract permissions from APK files by streaming the binary manifest.",
+                                     epilog="Example: python3 apk_permission_extractor_waxml.py /path/to/apks/")
+    parser.add_argument("path", help="Path to an APK file or directory containing APKs")
+    add_batch_arguments(parser)
+    add_sink_arguments(parser)
+    args = parser.parse_args()
+
+    input_path = args.path
+
+    # Handle single file
+    if os.path.isfile(input_path) and input_path.endswith('.apk'):
+        with open_sink_from_args(args, os.path.splitext(os.path.basename(input_path))[0] + "_permissions", RESULT_FIELDS, save_results) as sink:
+            process_apk(input_path, sink=sink)
+
+    # Handle directory
+    elif os.path.isdir(input_path):
+        # Create output directory with _permissions suffix
+        input_dir = input_path.rstrip('/')  # Remove trailing slash if present
+        output_dir = f"{input_dir}_permissions"
+
+        # Walk the directory lazily; results are saved as each APK finishes
+        apk_files = iter_apk_files(input_path, args.recursive, exclude=[output_dir])
+        found = False
+        with open_sink_from_args(args, output_dir, RESULT_FIELDS, save_results) as sink:
+            for apk_file, record, error in run_batch(extract_apk, apk_files, args.jobs):
+                found = True
+                if error is not None:
+                    print(f"Error processing {apk_file}: {error}")
+                    continue
+                sink.write(apk_file, record, output_base_for(apk_file, input_path, output_dir))
+
+        if not found:
+            print(f"No APK files found in {input_path}")
+            sys.exit(1)
+
+    else:
+        print("Invalid input: must be an APK file or a directory")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
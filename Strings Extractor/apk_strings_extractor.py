@@ -1,8 +1,57 @@
+import os
 import re
+import json
+import heapq
+import time
+import zlib
+import struct
+import sqlite3
+import sys
 import zipfile
 
+from array import array
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import List
+from typing import Callable, Iterator, List
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+#---------------------------------------------------------
+# ONE-PASS ASCII / UTF-8 / UTF-16LE SCANNER
+#---------------------------------------------------------
+
+@lru_cache(maxsize=32)
+def _text_run_pattern(min_len: int) -> re.Pattern:
+    # Runs of printable ASCII / UTF-8 text, then UTF-16LE runs of printable
+    # ASCII code units (unrolled, which the engine matches much faster than a
+    # counted group).  Invalid UTF-8 is decoded to U+FFFD, which ends a run
+    # like any C0/C1 control character.
+    unit = '[\x20-\x7e]\x00'
+    return re.compile('[^\ufffd\x00-\x1f\x7f-\x9f]{' + str(min_len) + ',}|' + unit * min_len + '(?:' + unit + ')*')
+
+def _find_text_runs(data: bytes, min_len: int = 5) -> List[str]:
+    """
+    Return the printable ASCII, UTF-8 and UTF-16LE strings of at least
+    min_len characters in data.
+
+    The bytes are decoded once with errors="replace" and a single regex finds
+    every kind of run, so there is no second pass over the raw bytes and no
+    per-match decoding except for the (rare) UTF-16LE runs.
+    """
+    runs = _text_run_pattern(min_len).findall(data.decode("utf-8", errors="replace"))
+    return [run.replace("\x00", "") if "\x00" in run else run for run in runs]
 
 def extract_strings_from_apk(apk_path: Path, min_length: int = 5) -> List[str] | None:
     strings = set()
@@ -12,21 +61,11 @@ def extract_strings_from_apk(apk_path: Path, min_length: int = 5) -> List[str] |
             for file_info in apk.filelist:
                 try:
                     data = apk.read(file_info.filename)
-                    try:
-                        # Try to decode as UTF-8 and extract printable strings
-                        text = data.decode('utf-8', errors='ignore')
-                        # Find sequences of printable ASCII characters
-                        found = re.findall(r'[\x20-\x7E]{' + str(min_length) + r',}', text)
-                        strings.update(found)
-                    except:
-                        pass
-                    
-                    # Also extract as raw bytes for binary files
-                    found = re.findall(b'[\x20-\x7E]{' + str(min_length).encode() + b',}', data)
-                    strings.update(s.decode('ascii', errors='ignore') for s in found)
-                    
                 except Exception as e:
                     continue # Skip files that can't be read
+
+                # ASCII, UTF-8 and UTF-16LE strings from one decode and one regex
+                strings.update(_find_text_runs(data, min_length))
     except Exception as e:
         #raise Exception(f"Error reading APK file: {e}")
         print(f"Error reading APK file: {e}")
@@ -35,34 +74,60 @@ def extract_strings_from_apk(apk_path: Path, min_length: int = 5) -> List[str] |
 
 #---------------------------------------------------------------------------------------------------------------------
 
+# Patterns of extract_important_strings_from_apk, compiled once.  Each one
+# only runs on strings that contain the characters all of its matches need
+# (see _important_candidates).
+_IMPORTANT_PATTERNS = {
+    'urls': re.compile(r'https?://[^\s<>"{}|\\^`\[\]]+'),
+    'ips': re.compile(r'\b(?:\d{1,3}\.){3}\d{1,3}\b'),
+    'emails': re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'),
+    'domains': re.compile(r'\b(?:[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?\.)+[a-zA-Z]{2,}\b'),
+    'api_keys': re.compile(r'(?:api[_-]?key|apikey|access[_-]?token|auth[_-]?token|secret[_-]?key)[\s:=]+["\']?([a-zA-Z0-9_\-]{20,})["\']?', re.IGNORECASE),
+    'file_paths': re.compile(r'(?:/[a-zA-Z0-9_.-]+)+/?|(?:[A-Z]:\\(?:[^\\\s]+\\)*[^\\\s]+)'),
+    # Whole base64 tokens of at least 16 characters.  The previous pattern
+    # had only optional parts, so it matched the empty string at every
+    # position and every 4-letter word.
+    'base64': re.compile(r'(?<![A-Za-z0-9+/])(?:[A-Za-z0-9+/]{4}){4,}(?:[A-Za-z0-9+/]{2}==|[A-Za-z0-9+/]{3}=)?(?![A-Za-z0-9+/=])'),
+    'crypto_keys': re.compile(r'-----BEGIN [A-Z ]+-----[\s\S]+?-----END [A-Z ]+-----|MII[A-Za-z0-9+/=]{100,}')
+}
+
+_IMPORTANT_API_KEY_LABELS = ("api", "token", "secret")
+
+def _important_candidates(string: str) -> list[str]:
+    """Categories of _IMPORTANT_PATTERNS that can match the string at all."""
+    candidates = []
+    if "://" in string:
+        candidates.append('urls')
+    if "." in string:
+        candidates.append('ips')
+        candidates.append('domains')
+        if "@" in string:
+            candidates.append('emails')
+    # IGNORECASE folding of non-ASCII text is not mirrored by str.lower()
+    if not string.isascii() or any(label in string.lower() for label in _IMPORTANT_API_KEY_LABELS):
+        candidates.append('api_keys')
+    if "/" in string or ":\\" in string:
+        candidates.append('file_paths')
+    if len(string) >= 16:
+        candidates.append('base64')
+    if "-----BEGIN" in string or "MII" in string:
+        candidates.append('crypto_keys')
+    return candidates
+
 def extract_important_strings_from_apk(apk_path: Path) -> dict:
-    patterns = {
-        'urls': re.compile(r'https?://[^\s<>"{}|\\^`\[\]]+'),
-        'ips': re.compile(r'\b(?:\d{1,3}\.){3}\d{1,3}\b'),
-        'emails': re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'),
-        'domains': re.compile(r'\b(?:[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?\.)+[a-zA-Z]{2,}\b'),
-        'api_keys': re.compile(r'(?:api[_-]?key|apikey|access[_-]?token|auth[_-]?token|secret[_-]?key)[\s:=]+["\']?([a-zA-Z0-9_\-]{20,})["\']?', re.IGNORECASE),
-        'file_paths': re.compile(r'(?:/[a-zA-Z0-9_.-]+)+/?|(?:[A-Z]:\\(?:[^\\\s]+\\)*[^\\\s]+)'),
-        'base64': re.compile(r'(?:[A-Za-z0-9+/]{4})*(?:[A-Za-z0-9+/]{2}==|[A-Za-z0-9+/]{3}=)?'),
-        'crypto_keys': re.compile(r'-----BEGIN [A-Z ]+-----[\s\S]+?-----END [A-Z ]+-----|MII[A-Za-z0-9+/=]{100,}')
-    }
-
-    results = {key: set() for key in patterns.keys()}
+    results = {key: set() for key in _IMPORTANT_PATTERNS.keys()}
 
     try:
         # First, get all strings from the APK
         all_strings = extract_strings_from_apk(apk_path, min_length=3)
 
-        # Search for patterns in each string
+        # One pass over the strings, running only the patterns that can match
         for string in all_strings:
-            for category, pattern in patterns.items():
-                matches = pattern.findall(string)
+            for category in _important_candidates(string):
+                matches = _IMPORTANT_PATTERNS[category].findall(string)
                 if matches:
-                    if category == 'api_keys':
-                        # For API keys, extract the captured group
-                        results[category].update(match if isinstance(match, str) else match for match in matches)
-                    else:
-                        results[category].update(matches if isinstance(matches, list) else [matches])
+                    # For API keys findall already returns the captured group
+                    results[category].update(matches)
 
         # Post-processing and filtering
         # Remove invalid IPs
@@ -128,14 +193,38 @@ _RE_IPV6 = re.compile(
     r'^(?:[0-9a-fA-F]{1,4}:){2,7}[0-9a-fA-F]{1,4}$'
 )
 
+# Every secret pattern is kept as a list of rules, one per branch:
+#   (name, kind, literals, min_length, pattern)
+# literals  - fixed substrings, at least one of which every match contains
+#             (compared case-insensitively for _API_KEY_RULES)
+# kind      - RULE_PREFIX: tried only if one of the literals is present
+#             RULE_LABEL:  "<label> = <token>" style, tried only if the string
+#                          contains a separator and one of the labels
+#             RULE_GENERIC: no usable literal, always tried
+# min_length - shortest possible match, shorter strings skip the rule
+# The classic single-regex form (_RE_CRYPTO_KEYS / _RE_API_KEYS) is the
+# alternation of the branches, in order.
+RULE_PREFIX  = "prefix"
+RULE_LABEL   = "label"
+RULE_GENERIC = "generic"
+
 # Covers PEM blocks, raw hex keys (128–512-bit), and SSH public-key blobs.
-_RE_CRYPTO_KEYS = re.compile(
-    r'-----BEGIN\s+(?:RSA |EC |DSA |OPENSSH |PGP )?(?:PRIVATE|PUBLIC) KEY-----'   # PEM header
-    r'|-----BEGIN CERTIFICATE-----'                                               # X.509 cert
-    r'|^[0-9a-fA-F]{32,128}$'                                                     # raw hex key (128–512 bit range)
-    r'|^(?:ssh-rsa|ssh-ed25519|ecdsa-sha2-nistp\d+)\s+[A-Za-z0-9+/=]{20,}',       # SSH pubkey
-    re.MULTILINE,
-)
+_CRYPTO_KEY_RULES = [
+    # PEM header
+    ("pem_key", RULE_PREFIX, ("-----BEGIN",), 26,
+     r'-----BEGIN\s+(?:RSA |EC |DSA |OPENSSH |PGP )?(?:PRIVATE|PUBLIC) KEY-----'),
+    # X.509 cert
+    ("x509_certificate", RULE_PREFIX, ("-----BEGIN CERTIFICATE-----",), 27,
+     r'-----BEGIN CERTIFICATE-----'),
+    # raw hex key (128–512 bit range)
+    ("raw_hex_key", RULE_GENERIC, (), 32,
+     r'^[0-9a-fA-F]{32,128}$'),
+    # SSH pubkey
+    ("ssh_public_key", RULE_PREFIX, ("ssh-rsa", "ssh-ed25519", "ecdsa-sha2-nistp"), 28,
+     r'^(?:ssh-rsa|ssh-ed25519|ecdsa-sha2-nistp\d+)\s+[A-Za-z0-9+/=]{20,}'),
+]
+
+_RE_CRYPTO_KEYS = re.compile("|".join(rule[4] for rule in _CRYPTO_KEY_RULES), re.MULTILINE)
 
 # At least 16 chars of base64 alphabet, length a multiple of 4, with ≥1 '='.
 # The second branch catches long unpadded payloads (≥32 chars, > 80 % b64 chars).
@@ -145,30 +234,41 @@ _RE_BASE64 = re.compile(
 )
 
 # Well-known vendor prefixes followed by opaque alphanumeric tokens.
-_RE_API_KEYS = re.compile(
+_API_KEY_RULES = [
     # Firebase / Google
-    r'AIza[0-9A-Za-z\-_]{35}'
+    ("google_api_key", RULE_PREFIX, ("AIza",), 39,
+     r'AIza[0-9A-Za-z\-_]{35}'),
     # AWS access key ID
-    r'|(?:AKIA|ASIA|AROA|AIDA)[0-9A-Z]{16}'
+    ("aws_access_key_id", RULE_PREFIX, ("AKIA", "ASIA", "AROA", "AIDA"), 20,
+     r'(?:AKIA|ASIA|AROA|AIDA)[0-9A-Z]{16}'),
     # AWS secret access key (preceded by common label)
-    r'|(?:aws_secret|secret_key|secretKey)\s*[=:]\s*[0-9A-Za-z/+]{40}'
+    ("aws_secret_access_key", RULE_LABEL, ("aws_secret", "secret_key", "secretKey"), 50,
+     r'(?:aws_secret|secret_key|secretKey)\s*[=:]\s*[0-9A-Za-z/+]{40}'),
     # GitHub personal access token (classic & fine-grained)
-    r'|(?:ghp|gho|ghu|ghs|ghr|github_pat)_[A-Za-z0-9_]{20,255}'
+    ("github_token", RULE_PREFIX, ("ghp_", "gho_", "ghu_", "ghs_", "ghr_", "github_pat_"), 24,
+     r'(?:ghp|gho|ghu|ghs|ghr|github_pat)_[A-Za-z0-9_]{20,255}'),
     # Stripe live / test secret
-    r'|sk_(?:live|test)_[0-9a-zA-Z]{24,}'
+    ("stripe_secret_key", RULE_PREFIX, ("sk_live_", "sk_test_"), 32,
+     r'sk_(?:live|test)_[0-9a-zA-Z]{24,}'),
     # Slack bot / user token
-    r'|xox[baprs]-[0-9A-Za-z\-]{10,}'
+    ("slack_token", RULE_PREFIX, ("xoxb-", "xoxa-", "xoxp-", "xoxr-", "xoxs-"), 15,
+     r'xox[baprs]-[0-9A-Za-z\-]{10,}'),
     # Twilio account SID
-    r'|AC[0-9a-f]{32}'
+    ("twilio_account_sid", RULE_PREFIX, ("AC",), 34,
+     r'AC[0-9a-f]{32}'),
     # SendGrid
-    r'|SG\.[A-Za-z0-9\-_]{22,}\.[A-Za-z0-9\-_]{43,}'
+    ("sendgrid_api_key", RULE_PREFIX, ("SG.",), 69,
+     r'SG\.[A-Za-z0-9\-_]{22,}\.[A-Za-z0-9\-_]{43,}'),
     # Generic "Bearer <token>" or "Authorization: <token>"
-    r'|(?:Bearer|Authorization)\s+[A-Za-z0-9\-_.~+/]{20,}'
+    ("bearer_token", RULE_PREFIX, ("Bearer", "Authorization"), 27,
+     r'(?:Bearer|Authorization)\s+[A-Za-z0-9\-_.~+/]{20,}'),
     # Generic high-entropy tokens labelled with common key names
-    r'|(?:api[_\-]?key|auth[_\-]?token|access[_\-]?token|client[_\-]?secret)'
-     r'\s*[=:\"\']\s*[A-Za-z0-9\-_.]{16,}',
-    re.IGNORECASE,
-)
+    ("labelled_token", RULE_LABEL, ("api", "auth", "access", "client"), 23,
+     r'(?:api[_\-]?key|auth[_\-]?token|access[_\-]?token|client[_\-]?secret)'
+     r'\s*[=:\"\']\s*[A-Za-z0-9\-_.]{16,}'),
+]
+
+_RE_API_KEYS = re.compile("|".join(rule[4] for rule in _API_KEY_RULES), re.IGNORECASE)
 
 # Bare hostnames / FQDNs (no scheme).  Excludes plain IPs (those hit _RE_IP).
 # Must have at least one dot, a known-length TLD (2–24 chars), optional port.
@@ -196,6 +296,154 @@ _RE_LINUX_CMD = re.compile(
     re.IGNORECASE
 )
 
+# Helpers shared by is_base64 / is_domain and the single-pass classifier
+_RE_HEX_ONLY = re.compile(r'[0-9a-fA-F]+')
+_RE_HAS_UPPER = re.compile(r'[A-Z]')
+_RE_TLD = re.compile(r'[a-zA-Z]{2,24}')
+
+#---------------------------------------------------------
+# LITERAL-PREFILTERED SECRET RULES
+#---------------------------------------------------------
+
+# Separators of "<label> = <token>" style rules
+_LABEL_SEPARATORS = "=:\"'"
+
+def _literal_trie_pattern(literals) -> str:
+    """
+    Build a regex matching any of the literals, factored as a trie so the
+    engine branches on each character once instead of retrying every
+    alternative at every position.
+    """
+    trie: dict = {}
+    for literal in literals:
+        node = trie
+        for ch in literal:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            return (body if len(branches) > 1 else "(?:" + body + ")") + "?"
+        return body
+
+    return build(trie)
+
+class _SecretRuleIndex:
+    """
+    Multi-literal prefilter over a list of secret rules.
+
+    search(s) is equivalent to re.search on the alternation of all rule
+    patterns, but one trie-compiled literal scan decides whether any prefix
+    rule can apply, label rules wait for a separator, and each rule's own
+    regex runs only when one of its literals is in the string.  Every rule
+    must honour its literals and min_length (see _API_KEY_RULES).
+    """
+
+    def __init__(self, rules, flags: int = 0):
+        self.flags = flags
+        self.ignore_case = bool(flags & re.IGNORECASE)
+        self.rules: list[tuple] = []
+        for rule in rules:
+            self.add_rule(*rule, rebuild=False)
+        self._rebuild()
+
+    def add_rule(self, name: str, kind: str, literals, min_length: int, pattern: str,
+                 rebuild: bool = True) -> None:
+        if kind not in (RULE_PREFIX, RULE_LABEL, RULE_GENERIC):
+            raise ValueError(f"Unknown rule kind for {name!r}: {kind!r}")
+        if kind != RULE_GENERIC and not literals:
+            raise ValueError(f"Rule {name!r} of kind {kind!r} needs at least one literal")
+        if any(not literal.isascii() for literal in literals):
+            raise ValueError(f"Rule {name!r}: literals must be ASCII")
+        self.rules.append((name, kind, tuple(literals), int(min_length), pattern))
+        if rebuild:
+            self._rebuild()
+
+    def _rebuild(self) -> None:
+        def compiled(kind):
+            return [(tuple(l.lower() for l in literals) if self.ignore_case else literals,
+                     min_length, re.compile(pattern, self.flags))
+                    for _, k, literals, min_length, pattern in self.rules if k == kind]
+
+        self.prefix_rules = compiled(RULE_PREFIX)
+        self.label_rules = compiled(RULE_LABEL)
+        self.generic_rules = [(min_length, regex) for _, min_length, regex in compiled(RULE_GENERIC)]
+        self.min_length = min((rule[3] for rule in self.rules), default=0)
+
+        prefix_literals = {literal for literals, _, _ in self.prefix_rules for literal in literals}
+        self.gate = re.compile(_literal_trie_pattern(prefix_literals)) if prefix_literals else None
+        self.combined = re.compile("|".join(rule[4] for rule in self.rules), self.flags)
+
+    def search(self, s: str) -> bool:
+        length = len(s)
+        if length < self.min_length or not self.rules:
+            return False
+
+        if self.ignore_case:
+            # Unicode case folding (e.g. KELVIN SIGN ~ 'k') is not mirrored by
+            # str.lower(), so non-ASCII input takes the plain regex.
+            if not s.isascii():
+                return bool(self.combined.search(s))
+            folded = s.lower()
+        else:
+            folded = s
+
+        if self.gate is not None and self.gate.search(folded):
+            for literals, min_length, regex in self.prefix_rules:
+                if length >= min_length and any(l in folded for l in literals) and regex.search(s):
+                    return True
+
+        if self.label_rules and any(sep in s for sep in _LABEL_SEPARATORS):
+            for literals, min_length, regex in self.label_rules:
+                if length >= min_length and any(l in folded for l in literals) and regex.search(s):
+                    return True
+
+        for min_length, regex in self.generic_rules:
+            if length >= min_length and regex.search(s):
+                return True
+        return False
+
+_CRYPTO_KEY_INDEX = _SecretRuleIndex(_CRYPTO_KEY_RULES, re.MULTILINE)
+_API_KEY_INDEX = _SecretRuleIndex(_API_KEY_RULES, re.IGNORECASE)
+
+def load_secret_rules(rules_path: Path) -> int:
+    """
+    Add API-key / crypto-key rules from a JSON file and return how many were
+    loaded.  The file maps "api_key" and/or "crypto_key" to a list of rules:
+
+        {"api_key": [{"name": "mapbox_token",
+                      "kind": "prefix",
+                      "literals": ["pk.ey", "sk.ey"],
+                      "min_length": 80,
+                      "pattern": "[ps]k\\.eyJ[A-Za-z0-9\\-_.]{76,}"}]}
+
+    "kind" defaults to "prefix" when literals are given and "generic"
+    otherwise; "min_length" defaults to 0.  Every match of the pattern must
+    contain one of the literals and be at least min_length long.
+    """
+    with open(rules_path, "r", encoding="utf-8") as f:
+        spec = json.load(f)
+
+    indexes = {CATEGORY_API_KEY: _API_KEY_INDEX, CATEGORY_CRYPTO_KEY: _CRYPTO_KEY_INDEX}
+    loaded = 0
+    for category, rules in spec.items():
+        if category not in indexes:
+            raise ValueError(f"Unknown rule category {category!r} (expected one of {tuple(indexes)})")
+        for rule in rules:
+            literals = tuple(rule.get("literals", ()))
+            kind = rule.get("kind", RULE_PREFIX if literals else RULE_GENERIC)
+            indexes[category].add_rule(rule["name"], kind, literals,
+                                       rule.get("min_length", 0), rule["pattern"])
+            loaded += 1
+
+    # verdicts memoized under the old rules are stale
+    categorize_string.cache_clear()
+    return loaded
+
 
 
 
@@ -230,7 +478,7 @@ def is_crypto_key(s: str) -> bool:
     Return True if the string looks like a cryptographic key or certificate.
     Matches PEM blocks, raw hex keys (128-512 bit), and SSH public-key blobs.
     """
-    return bool(_RE_CRYPTO_KEYS.search(s.strip()))
+    return _CRYPTO_KEY_INDEX.search(s.strip())
  
  
 def is_base64(s: str) -> bool:
@@ -247,14 +495,14 @@ def is_base64(s: str) -> bool:
     
     # Reject strings that are 100 % hex digits — those are hashes / raw keys
     # already caught by is_crypto_key.
-    if re.fullmatch(r'[0-9a-fA-F]+', stripped):
+    if _RE_HEX_ONLY.fullmatch(stripped):
         return False
     return True
  
  
 def is_api_key(s: str) -> bool:
     """Return True if the string matches a known API / secret-key format."""
-    return bool(_RE_API_KEYS.search(s.strip()))
+    return _API_KEY_INDEX.search(s.strip())
  
 def is_domain(s: str) -> bool:
     """
@@ -280,52 +528,678 @@ def is_domain(s: str) -> bool:
     
     # If the TLD is ALL-CAPS or mixed-case camelCase it's almost certainly
     # a class/package name, not a real domain.
-    if re.search(r'[A-Z]', tld):
+    if _RE_HAS_UPPER.search(tld):
         return False
     
     # If any non-first label starts with a digit it could be a version string.
     # Real FQDNs do allow digits but combined with the other checks this helps.
     # Require the TLD to be alphabetic only (no digits).
-    if not re.fullmatch(r'[a-zA-Z]{2,24}', tld):
+    if not _RE_TLD.fullmatch(tld):
         return False
     return True
 
 #---------------------------------------------------------------------------------------------------------------------
 
+@lru_cache(maxsize=32)
+def _printable_run_pattern(min_len: int, max_len: int) -> re.Pattern:
+    return re.compile(rb'[\x20-\x7e]{' + str(min_len).encode() + rb',' + str(max_len).encode() + rb'}')
+
 def _extract_strings_from_bytes(data: bytes, min_len: int = 4, max_len: int = 300) -> list[str]:
-    pattern = re.compile(rb'[\x20-\x7e]{' + str(min_len).encode() + rb',' + str(max_len).encode() + rb'}')
+    pattern = _printable_run_pattern(min_len, max_len)
     return [s.decode("ascii", errors="ignore") for s in pattern.findall(data)]
 
+def _locate_strings_in_bytes(data: bytes, min_len: int = 4, max_len: int = 300) -> list[tuple[int, str]]:
+    """Same strings as _extract_strings_from_bytes, each paired with its byte offset in data."""
+    pattern = _printable_run_pattern(min_len, max_len)
+    return [(m.start(), m.group().decode("ascii")) for m in pattern.finditer(data)]
+
+#---------------------------------------------------------
+# NUMPY BACKEND
+#---------------------------------------------------------
+
+STRING_BACKEND_REGEX = "regex"
+STRING_BACKEND_NUMPY = "numpy"
+
+STRING_BACKENDS = (STRING_BACKEND_REGEX, STRING_BACKEND_NUMPY)
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("NumPy is required for the numpy string backend.\nInstall with: pip install numpy")
+
+def _printable_pieces_numpy(data: bytes, min_len: int, max_len: int) -> list[tuple[int, int]]:
+    """
+    (start, end) of every piece _extract_strings_from_bytes would return.
+    Run boundaries come from the diff of a printable mask; only runs of at
+    least min_len bytes are kept.  Runs longer than max_len are cut into
+    max_len pieces plus a remainder of at least min_len, exactly as
+    findall() does.
+    """
+    _require_numpy()
+    if not data:
+        return []
+
+    buf = np.frombuffer(data, dtype=np.uint8)
+    printable = (buf - np.uint8(0x20)) < 0x5f      # 0x20..0x7e, wraps below 0x20
+    edges = np.diff(printable.view(np.int8), prepend=np.int8(0), append=np.int8(0))
+    del printable
+
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    del edges
+
+    keep = (ends - starts) >= min_len
+    starts = starts[keep].tolist()
+    ends = ends[keep].tolist()
+
+    pieces: list[tuple[int, int]] = []
+    for start, end in zip(starts, ends):
+        if end - start <= max_len:
+            pieces.append((start, end))
+            continue
+        cut = start + (end - start) // max_len * max_len
+        for i in range(start, cut, max_len):
+            pieces.append((i, i + max_len))
+        if end - cut >= min_len:
+            pieces.append((cut, end))
+    return pieces
+
+def _extract_strings_from_bytes_numpy(data: bytes, min_len: int = 4, max_len: int = 300) -> list[str]:
+    """Vectorized equivalent of _extract_strings_from_bytes."""
+    return [data[start:end].decode("ascii") for start, end in _printable_pieces_numpy(data, min_len, max_len)]
+
+def _locate_strings_in_bytes_numpy(data: bytes, min_len: int = 4, max_len: int = 300) -> list[tuple[int, str]]:
+    """Vectorized equivalent of _locate_strings_in_bytes."""
+    return [(start, data[start:end].decode("ascii"))
+            for start, end in _printable_pieces_numpy(data, min_len, max_len)]
+
+_BYTES_SCANNERS: dict[str, Callable[[bytes, int, int], list[str]]] = {
+    STRING_BACKEND_REGEX: _extract_strings_from_bytes,
+    STRING_BACKEND_NUMPY: _extract_strings_from_bytes_numpy,
+}
+
+# Same scans, but every string comes with its byte offset in the data
+_BYTES_LOCATORS: dict[str, Callable[[bytes, int, int], list[tuple[int, str]]]] = {
+    STRING_BACKEND_REGEX: _locate_strings_in_bytes,
+    STRING_BACKEND_NUMPY: _locate_strings_in_bytes_numpy,
+}
+
+#---------------------------------------------------------
+# CHUNKED STREAM SCANNING
+#---------------------------------------------------------
+
+_PRINTABLE_BYTES = bytes(range(0x20, 0x7f))
+
+
+def _iter_strings_from_stream(stream, min_len: int = 4, max_len: int = 300,
+                              chunk_size: int = 1 << 20,
+                              backend: str = STRING_BACKEND_REGEX,
+                              located: bool = False) -> Iterator:
+    """
+    Yield the same strings as _extract_strings_from_bytes(stream.read(), ...)
+    but consume the stream chunk_size bytes at a time.  With located set,
+    (offset, string) pairs are yielded instead, offsets counted from the
+    start of the stream.
+
+    findall() cuts a printable run into max_len pieces counted from the start
+    of the run, keeping a final remainder only if it is at least min_len long.
+    The printable run touching the end of each chunk is therefore split here
+    as well: its whole max_len pieces are emitted and only the remainder
+    (shorter than max_len) is carried into the next chunk.  Peak memory per
+    entry is about twice chunk_size, whatever the entry size.
+    """
+    scan = (_BYTES_LOCATORS if located else _BYTES_SCANNERS)[backend]
+    carry = b""
+    base = 0        # stream offset of buf[0]
+
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        buf = carry + chunk if carry else chunk
+        del chunk
+
+        # head ends on a non-printable byte, so every run in it is complete
+        head = buf.rstrip(_PRINTABLE_BYTES)
+        if located:
+            for offset, s in scan(head, min_len, max_len):
+                yield base + offset, s
+        else:
+            yield from scan(head, min_len, max_len)
+
+        tail_start = len(head)
+        del head
+        whole = (len(buf) - tail_start) // max_len * max_len
+        for i in range(tail_start, tail_start + whole, max_len):
+            piece = buf[i:i + max_len].decode("ascii")
+            yield (base + i, piece) if located else piece
+        carry = buf[tail_start + whole:]
+        base += tail_start + whole
+        del buf
+
+    if len(carry) >= min_len:
+        yield (base, carry.decode("ascii")) if located else carry.decode("ascii")
+
+#---------------------------------------------------------
+# DEX STRING POOL
+#---------------------------------------------------------
+
+STRING_MODE_REGEX = "regex"     # printable-ASCII scan over every entry
+STRING_MODE_DEX   = "dex"       # string_ids table for classes*.dex, regex for the rest
+
+STRING_MODES = (STRING_MODE_REGEX, STRING_MODE_DEX)
+
+_DEX_MAGIC           = b"dex\n"
+_DEX_HEADER_SIZE     = 0x70
+_DEX_STRING_IDS_SIZE = 0x38     # uint string_ids_size, uint string_ids_off
+
+_RE_SURROGATE = re.compile(r'[\ud800-\udfff]')
+
+
+def _decode_mutf8(raw: memoryview) -> str:
+    """
+    Decode a Modified UTF-8 string_data_item payload.
+    MUTF-8 encodes U+0000 as C0 80 and supplementary characters as
+    CESU-8 surrogate pairs, neither of which the stock utf-8 codec accepts.
+    """
+    data = bytes(raw).replace(b"\xc0\x80", b"\x00")
+    try:
+        text = data.decode("utf-8", errors="surrogatepass")
+    except UnicodeDecodeError:
+        return data.decode("utf-8", errors="replace")
+    if _RE_SURROGATE.search(text):
+        text = text.encode("utf-16-le", errors="surrogatepass").decode("utf-16-le", errors="replace")
+    return text
+
+
+def _extract_strings_from_dex(data: bytes, min_len: int = 4, max_len: int = 300,
+                              located: bool = False) -> list | None:
+    """
+    Return the entries of the DEX string_ids table whose length is within
+    [min_len, max_len], in table order.  Only the header, string_ids and the
+    referenced string_data_items are touched; code sections are never read.
+    With located set, (offset, string) pairs are returned, the offset being
+    that of the MUTF-8 bytes of the string_data_item.
+    Returns None if data is not a well-formed DEX file so the caller can fall
+    back to the regex scan.
+    """
+    if len(data) < _DEX_HEADER_SIZE or data[:4] != _DEX_MAGIC:
+        return None
+
+    ids_size, ids_off = struct.unpack_from("<II", data, _DEX_STRING_IDS_SIZE)
+    if ids_off + 4 * ids_size > len(data):
+        return None
+
+    view = memoryview(data)
+    ids = view[ids_off:ids_off + 4 * ids_size]
+    if sys.byteorder == "little":
+        offsets = ids.cast("I")
+    else:
+        offsets = array("I", ids)
+        offsets.byteswap()
+
+    results: list = []
+    try:
+        for p in offsets:
+            # string_data_item: uleb128 utf16_size, MUTF-8 bytes, NUL
+            b = data[p]
+            p += 1
+            utf16_size = b & 0x7f
+            shift = 7
+            while b & 0x80:
+                b = data[p]
+                p += 1
+                utf16_size |= (b & 0x7f) << shift
+                shift += 7
+
+            # A string has at least utf16_size / 2 code points (surrogate
+            # pairs) and at most utf16_size, so most entries are rejected
+            # before the terminator is even located.
+            if utf16_size < min_len or utf16_size > 2 * max_len:
+                continue
+
+            end = p + utf16_size
+            if data[end] == 0:
+                # One byte per UTF-16 unit and a terminator right after it:
+                # plain ASCII, no need to search for the NUL.
+                s = data[p:end].decode("ascii", errors="replace")
+            else:
+                end = data.find(b"\x00", p)
+                if end < 0:
+                    return None
+                s = _decode_mutf8(view[p:end])
+
+            if min_len <= len(s) <= max_len:
+                results.append((p, s) if located else s)
+    except IndexError:
+        return None
+    finally:
+        if isinstance(offsets, memoryview):
+            offsets.release()
+        ids.release()
+        view.release()
+
+    return results
+
+def _extract_strings_from_entry(apk: zipfile.ZipFile,
+                                entry: zipfile.ZipInfo,
+                                min_length: int = 5,
+                                max_length: int = 300,
+                                mode: str = STRING_MODE_REGEX,
+                                chunk_size: int | None = None,
+                                backend: str = STRING_BACKEND_REGEX,
+                                located: bool = False) -> Iterator:
+    """
+    Yield the strings of a single ZIP entry, or (offset, string) pairs with
+    located set (offsets into the uncompressed entry).  With chunk_size set,
+    entries larger than chunk_size are streamed through apk.open() instead
+    of being decompressed into memory in full.
+    """
+    is_dex = mode == STRING_MODE_DEX and entry.filename.lower().endswith(".dex")
+
+    if chunk_size and entry.file_size > chunk_size:
+        with apk.open(entry) as stream:
+            yield from _iter_strings_from_stream(stream, min_length, max_length, chunk_size, backend, located)
+        return
+
+    data = apk.read(entry)
+
+    strings = None
+    if is_dex:
+        strings = _extract_strings_from_dex(data, min_length, max_length, located)
+    if strings is None:
+        strings = (_BYTES_LOCATORS if located else _BYTES_SCANNERS)[backend](data, min_length, max_length)
+    yield from strings
+
+#---------------------------------------------------------
+# CROSS-APK STRING CACHE
+#---------------------------------------------------------
+
+class StringCache:
+    """
+    Persistent SQLite store of the strings extracted from individual ZIP
+    entries, shared across APKs and across runs.
+
+    Entries are keyed by the central-directory CRC32, compressed size and
+    uncompressed size, plus the extraction parameters that change the output
+    (min/max length and, for .dex entries, the mode).  An androidx dex chunk or
+    a Play Services .so seen in one APK is served from the cache for every
+    other APK that ships it, without being decompressed again.
+
+    The store is capped at max_bytes of serialized strings; the least
+    recently used rows are evicted first.  hits, misses and evictions count
+    what happened through this instance.  Several processes may share one
+    file (WAL mode); each enforces the cap from the total it last observed.
+    """
+
+    def __init__(self, path: Path, max_bytes: int = 1 << 30):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._conn = sqlite3.connect(str(self.path), timeout=60)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entry_strings ("
+            " crc32 INTEGER NOT NULL,"
+            " compress_size INTEGER NOT NULL,"
+            " file_size INTEGER NOT NULL,"
+            " params TEXT NOT NULL,"
+            " strings BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_used REAL NOT NULL,"
+            " PRIMARY KEY (crc32, compress_size, file_size, params))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entry_strings_lru ON entry_strings (last_used)")
+        self._conn.commit()
+        self._total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entry_strings").fetchone()[0]
+
+    @staticmethod
+    def _key(entry: zipfile.ZipInfo, params: str) -> tuple:
+        return (entry.CRC, entry.compress_size, entry.file_size, params)
+
+    def get(self, entry: zipfile.ZipInfo, params: str) -> list[str] | None:
+        key = self._key(entry, params)
+        row = self._conn.execute(
+            "SELECT strings FROM entry_strings"
+            " WHERE crc32 = ? AND compress_size = ? AND file_size = ? AND params = ?", key).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._conn.execute(
+            "UPDATE entry_strings SET last_used = ?"
+            " WHERE crc32 = ? AND compress_size = ? AND file_size = ? AND params = ?", (time.time(), *key))
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, entry: zipfile.ZipInfo, params: str, strings: list[str]) -> None:
+        blob = zlib.compress(json.dumps(strings).encode("ascii"), 1)
+        if len(blob) > self.max_bytes:
+            return
+        key = self._key(entry, params)
+        old = self._conn.execute(
+            "SELECT size FROM entry_strings"
+            " WHERE crc32 = ? AND compress_size = ? AND file_size = ? AND params = ?", key).fetchone()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO entry_strings"
+            " (crc32, compress_size, file_size, params, strings, size, last_used)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)", (*key, blob, len(blob), time.time()))
+        self._total += len(blob) - (old[0] if old else 0)
+        self._evict()
+
+    def _evict(self) -> None:
+        while self._total > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT rowid, size FROM entry_strings ORDER BY last_used LIMIT 64").fetchall()
+            if not rows:
+                self._total = 0
+                break
+            for rowid, size in rows:
+                self._conn.execute("DELETE FROM entry_strings WHERE rowid = ?", (rowid,))
+                self._total -= size
+                self.evictions += 1
+                if self._total <= self.max_bytes:
+                    break
+
+    def flush(self) -> None:
+        self._conn.commit()
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size_bytes": self._total}
+
+    def close(self) -> None:
+        self._conn.commit()
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _cache_params(entry: zipfile.ZipInfo, min_length: int, max_length: int,
+                  mode: str, chunk_size: int | None) -> str:
+    """The extraction parameters that change an entry's strings."""
+    # Only a .dex entry read whole in DEX mode goes through the string pool.
+    if (mode == STRING_MODE_DEX
+            and entry.filename.lower().endswith(".dex")
+            and not (chunk_size and entry.file_size > chunk_size)):
+        return f"{min_length}:{max_length}:{STRING_MODE_DEX}"
+    return f"{min_length}:{max_length}"
+
+#---------------------------------------------------------
+# LOW-MEMORY DEDUPLICATION
+#---------------------------------------------------------
+
+class HashedStringSet:
+    """
+    Set of strings that stores only a 64-bit hash per member, in an
+    array('Q') open-addressing table with linear probing (kept at most half
+    full, doubled when needed).  About 16 bytes per unique string instead of
+    the str object plus the set and list slots of the exact path.
+
+    Collisions: two different strings whose 64-bit hashes are equal cannot
+    be told apart, so the second one is reported as already present and
+    dropped.  Duplicates are never let through.  For n unique strings the
+    chance of any such false duplicate is about n**2 / 2**65 (under 1e-5
+    at ten million strings).  Hash value 0 marks an empty slot, so a hash of
+    0 is stored as 1, which is just one more possible collision.
+
+    hash_func defaults to the built-in hash(), which is a 64-bit SipHash of
+    the string and is cached on the str object, but is salted per process.
+    Pass a stable function if tables must agree across processes.
+
+    With bloom_bits > 0, a Bloom filter of that many bits (two probes
+    derived from the same hash) sits in front of the table, so most first
+    sightings skip the probe sequence.
+    """
+
+    _EMPTY = 0
+    _MASK64 = (1 << 64) - 1
+
+    def __init__(self, capacity: int = 1 << 16, bloom_bits: int = 0,
+                 hash_func: Callable[[str], int] = hash):
+        size = 1
+        while size < 2 * max(capacity, 1):
+            size <<= 1
+        self._table = array("Q", [0]) * size
+        self._mask = size - 1
+        self._count = 0
+        self._hash = hash_func
+
+        self._bloom = bytearray((bloom_bits + 7) // 8) if bloom_bits > 0 else None
+        self._bloom_bits = len(self._bloom) * 8 if self._bloom is not None else 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _digest(self, s: str) -> int:
+        h = self._hash(s) & self._MASK64
+        return h or 1
+
+    def _bloom_add(self, h: int) -> bool:
+        """Set both probe bits; True if either was clear (h certainly new)."""
+        bloom = self._bloom
+        fresh = False
+        for bit in (h % self._bloom_bits, (h >> 32) % self._bloom_bits):
+            byte, flag = bit >> 3, 1 << (bit & 7)
+            if not bloom[byte] & flag:
+                bloom[byte] |= flag
+                fresh = True
+        return fresh
+
+    def add(self, s: str) -> bool:
+        """Insert s; return True if it was not already present."""
+        h = self._digest(s)
+        bloom_fresh = self._bloom is not None and self._bloom_add(h)
+
+        table, mask = self._table, self._mask
+        i = h & mask
+        if not bloom_fresh:
+            while True:
+                slot = table[i]
+                if slot == self._EMPTY:
+                    break
+                if slot == h:
+                    return False
+                i = (i + 1) & mask
+        else:
+            while table[i] != self._EMPTY:
+                i = (i + 1) & mask
+
+        table[i] = h
+        self._count += 1
+        if 2 * self._count > len(table):
+            self._grow()
+        return True
+
+    def __contains__(self, s: str) -> bool:
+        h = self._digest(s)
+        table, mask = self._table, self._mask
+        i = h & mask
+        while True:
+            slot = table[i]
+            if slot == self._EMPTY:
+                return False
+            if slot == h:
+                return True
+            i = (i + 1) & mask
+
+    def _grow(self) -> None:
+        old = self._table
+        size = len(old) * 2
+        table = array("Q", [0]) * size
+        mask = size - 1
+        for h in old:
+            if h != self._EMPTY:
+                i = h & mask
+                while table[i] != self._EMPTY:
+                    i = (i + 1) & mask
+                table[i] = h
+        self._table, self._mask = table, mask
+
+#---------------------------------------------------------
+# PARALLEL ENTRY SCANNING
+#---------------------------------------------------------
+
+def _shard_entries_by_size(entries: list[tuple[int, zipfile.ZipInfo]], shards: int) -> list[list[int]]:
+    """
+    Split entries into at most `shards` groups of roughly equal uncompressed
+    size (largest entry first onto the lightest shard).  Returns infolist()
+    positions, since ZipInfo objects are rebuilt by each worker.
+    """
+    heap = [(0, n, []) for n in range(shards)]
+    for index, entry in sorted(entries, key=lambda item: item[1].file_size, reverse=True):
+        load, n, indices = heapq.heappop(heap)
+        indices.append(index)
+        heapq.heappush(heap, (load + entry.file_size, n, indices))
+    return [indices for _, _, indices in heap if indices]
+
+def _scan_entry_shard(apk_path: Path, indices: list[int], min_length: int, max_length: int,
+                      mode: str, chunk_size: int | None, backend: str) -> dict[int, list[str] | None]:
+    """Worker: open the APK independently and extract the strings of one shard."""
+    results: dict[int, list[str] | None] = {}
+    with zipfile.ZipFile(apk_path, "r") as apk:
+        infos = apk.infolist()
+        for index in indices:
+            try:
+                results[index] = list(dict.fromkeys(_extract_strings_from_entry(
+                    apk, infos[index], min_length, max_length, mode, chunk_size, backend)))
+            except Exception:
+                results[index] = None
+    return results
+
+def _scan_entries_parallel(apk_path: Path, entries: list[tuple[int, zipfile.ZipInfo]], workers: int,
+                           min_length: int, max_length: int, mode: str, chunk_size: int | None,
+                           backend: str) -> dict[int, list[str] | None]:
+    """Scan entries across a process pool; None marks an entry that failed."""
+    shards = _shard_entries_by_size(entries, workers)
+    results: dict[int, list[str] | None] = {}
+    if not shards:
+        return results
+    with ProcessPoolExecutor(max_workers=len(shards)) as pool:
+        futures = [pool.submit(_scan_entry_shard, apk_path, indices, min_length, max_length,
+                               mode, chunk_size, backend)
+                   for indices in shards]
+        for future in futures:
+            results.update(future.result())
+    return results
+
 def _extract_strings_from_apk(apk_path: Path, 
                              min_length: int = 5,
                              max_length: int = 300,
-                             extensions: tuple[str, ...] = (".dex", ".xml", ".json", ".txt", ".js", ".smali", "") ) \
+                             extensions: tuple[str, ...] = (".dex", ".xml", ".json", ".txt", ".js", ".smali", ""),
+                             mode: str = STRING_MODE_REGEX,
+                             chunk_size: int | None = None,
+                             backend: str = STRING_BACKEND_REGEX,
+                             cache: StringCache | None = None,
+                             workers: int = 1,
+                             sink: Callable[[str], object] | None = None,
+                             bloom_bits: int = 0) \
     -> List[str] | None:
+    """
+    Return the unique strings of the selected entries in first-seen order.
+
+    With sink set, the low-memory mode is used instead: unique strings are
+    passed to sink as soon as they are found, deduplication keeps only
+    64-bit hashes (see HashedStringSet, bloom_bits sizes its optional Bloom
+    filter) and an empty list is returned.  Strings already emitted from
+    an entry that fails part-way are not taken back.
+    """
     
+    if mode not in STRING_MODES:
+        raise ValueError(f"Unknown string extraction mode: {mode!r} (expected one of {STRING_MODES})")
+    if backend not in STRING_BACKENDS:
+        raise ValueError(f"Unknown string scanning backend: {backend!r} (expected one of {STRING_BACKENDS})")
+    if backend == STRING_BACKEND_NUMPY:
+        _require_numpy()
+    if chunk_size is not None and chunk_size <= 0:
+        raise ValueError(f"chunk_size must be a positive number of bytes, got {chunk_size}")
+    if workers < 1:
+        raise ValueError(f"workers must be at least 1, got {workers}")
+
     if not os.path.isfile(apk_path):
         raise FileNotFoundError(f"APK not found: {apk_path}")
  
     seen: set[str] = set()
     results: list[str] = []
+    hashed = HashedStringSet(bloom_bits=bloom_bits) if sink is not None else None
  
     with zipfile.ZipFile(apk_path, "r") as apk:
-        for entry in apk.infolist():
+        candidates = []
+        for index, entry in enumerate(apk.infolist()):
             name_lower = entry.filename.lower()
             _, ext = os.path.splitext(name_lower)
  
             if extensions and ext not in extensions:
                 continue
- 
+            candidates.append((index, entry))
+
+        # Parallel mode: cache hits are resolved here, every other entry is
+        # scanned up front by the pool.  The merge below then walks entries in
+        # infolist() order, so first-seen ordering matches the serial path.
+        scanned: dict[int, list[str] | None] = {}
+        if workers > 1:
+            to_scan = candidates
+            if cache is not None:
+                to_scan = []
+                for index, entry in candidates:
+                    params = _cache_params(entry, min_length, max_length, mode, chunk_size)
+                    strings = cache.get(entry, params)
+                    if strings is None:
+                        to_scan.append((index, entry))
+                    else:
+                        scanned[index] = strings
+            scanned.update(_scan_entries_parallel(apk_path, to_scan, workers, min_length, max_length,
+                                                  mode, chunk_size, backend))
+            if cache is not None:
+                for index, entry in to_scan:
+                    if scanned[index] is not None:
+                        cache.put(entry, _cache_params(entry, min_length, max_length, mode, chunk_size),
+                                  scanned[index])
+
+        for index, entry in candidates:
+            # Strings are deduplicated as they are produced so a streamed entry
+            # never holds more than its unique strings; an entry that fails
+            # part-way is rolled back, as if it had been skipped.
+            added = len(results)
             try:
-                data = apk.read(entry.filename)
+                if workers > 1:
+                    strings = scanned.pop(index)
+                    if strings is None:
+                        continue
+                elif cache is not None:
+                    params = _cache_params(entry, min_length, max_length, mode, chunk_size)
+                    strings = cache.get(entry, params)
+                    if strings is None:
+                        strings = list(dict.fromkeys(_extract_strings_from_entry(
+                            apk, entry, min_length, max_length, mode, chunk_size, backend)))
+                        cache.put(entry, params, strings)
+                else:
+                    strings = _extract_strings_from_entry(apk, entry, min_length, max_length,
+                                                          mode, chunk_size, backend)
+                if hashed is not None:
+                    for s in strings:
+                        if hashed.add(s):
+                            sink(s)
+                    continue
+                for s in strings:
+                    if s not in seen:
+                        seen.add(s)
+                        results.append(s)
             except Exception:
+                seen.difference_update(results[added:])
+                del results[added:]
                 continue
  
-            for s in _extract_strings_from_bytes(data, min_length, max_length):
-                if s not in seen:
-                    seen.add(s)
-                    results.append(s)
- 
+    if cache is not None:
+        cache.flush()
     return results
 
 #---------------------------------------------------------------------------------------------------------------------
@@ -350,23 +1224,90 @@ CATEGORY_ORDER = [CATEGORY_CRYPTO_KEY,
                   CATEGORY_LINUX_CMD,
                   CATEGORY_OTHER]
 
+#---------------------------------------------------------
+# SINGLE-PASS CLASSIFIER
+#---------------------------------------------------------
+
+# Shortest possible match of each pattern family.  A string shorter than the
+# bound can never match, so the regex is skipped entirely.  The secret rule
+# indexes carry their own bounds.
+_MIN_LEN_BASE64     = 16
+_MAX_LEN_IPV4       = 21    # "255.255.255.255:65535"
+_MAX_LEN_IPV6       = 39
+
+_HEX_DIGITS   = frozenset("0123456789abcdefABCDEF")
+_URL_STARTERS = frozenset("hHfFwW")     # http(s)://, ftp://, file://, www.
+
+_CATEGORY_CACHE_SIZE = 1 << 16
+
+
+def _is_domain_label_ok(stripped: str) -> bool:
+    """TLD checks of is_domain, applied after _RE_DOMAINS has matched."""
+    tld = stripped.rsplit(".", 1)[-1].split(":")[0]
+    if _RE_HAS_UPPER.search(tld):
+        return False
+    return bool(_RE_TLD.fullmatch(tld))
+
+
+@lru_cache(maxsize=_CATEGORY_CACHE_SIZE)
 def categorize_string(s: str) -> str:
-    if is_crypto_key(s):
+    """
+    Return the category of a single string.
+
+    Equivalent to running the is_* predicates in CATEGORY_ORDER, but the
+    string is stripped once, each pattern is tried at most once, and the
+    cheap length / first-character checks below skip regexes that cannot
+    match.  Verdicts are memoized, so strings repeated across APKs
+    (androidx, Play Services, ...) are classified only once per process.
+    """
+    stripped = s.strip()
+    if not stripped:
+        return CATEGORY_OTHER
+
+    length = len(stripped)
+    first = stripped[0]
+
+    if _CRYPTO_KEY_INDEX.search(stripped):
         return CATEGORY_CRYPTO_KEY
-    if is_api_key(s):
+
+    # is_base64 defers to is_api_key; that verdict is already known here.
+    if _API_KEY_INDEX.search(stripped):
         return CATEGORY_API_KEY
-    if is_base64(s):
+
+    if (length >= _MIN_LEN_BASE64
+            and _RE_BASE64.match(stripped)
+            and not _RE_HEX_ONLY.fullmatch(stripped)):
         return CATEGORY_BASE64
-    if is_ip_address(s):
-        return CATEGORY_IP
-    if is_domain(s):
+
+    # \d in the IPv4 pattern also accepts non-ASCII decimal digits.
+    if (first in _HEX_DIGITS or first.isdecimal()) and length <= _MAX_LEN_IPV6:
+        if ((length <= _MAX_LEN_IPV4 and _RE_IP.match(stripped))
+                or _RE_IPV6.match(stripped)):
+            return CATEGORY_IP
+
+    # Computed once: is_domain needs it as an exclusion, the URL check reuses it.
+    is_url_match = first in _URL_STARTERS and bool(_RE_URL.match(stripped))
+
+    if (not is_url_match
+            and "." in stripped
+            and first.isalnum()
+            and _RE_DOMAINS.match(stripped)
+            and _is_domain_label_ok(stripped)):
         return CATEGORY_DOMAIN
-    if is_url(s):
+
+    if is_url_match:
         return CATEGORY_URL
-    if is_file_path(s):
-        return CATEGORY_FILE_PATH
-    if is_linux_command(s):
-        return CATEGORY_LINUX_CMD
+
+    if (first == "/" or first == "."
+            or (first.isalpha() and stripped[1:3] == ":\\")):
+        if _RE_FILE_PATH.match(stripped):
+            return CATEGORY_FILE_PATH
+
+    if first.isalpha():
+        m = _RE_LINUX_CMD.match(stripped)
+        if m and m.group(1).lower() in _LINUX_COMMANDS:
+            return CATEGORY_LINUX_CMD
+
     return CATEGORY_OTHER
 
 def categorize_strings(strings: list[str]) -> dict[str, list[str]]:
@@ -381,9 +1322,194 @@ def categorize_strings(strings: list[str]) -> dict[str, list[str]]:
 
 def extract_string_and_categorize_from_apk(apk_path: Path,
                                            min_length: int = 5,
-                                           max_length: int = 300) -> dict[str, list[str]]:
+                                           max_length: int = 300,
+                                           mode: str = STRING_MODE_REGEX,
+                                           chunk_size: int | None = None,
+                                           backend: str = STRING_BACKEND_REGEX,
+                                           cache: StringCache | None = None,
+                                           workers: int = 1) -> dict[str, list[str]]:
     
-    strings = _extract_strings_from_apk(apk_path, min_len=min_len, max_len=max_len)
+    strings = _extract_strings_from_apk(apk_path, min_length=min_length, max_length=max_length,
+                                        mode=mode, chunk_size=chunk_size, backend=backend,
+                                        cache=cache, workers=workers)
     return categorize_strings(strings)
 
-#---------------------------------------------------------------------------------------------------------------------
\ No newline at end of file
+#---------------------------------------------------------------------------------------------------------------------
+
+#---------------------------------------------------------
+# STREAMING RECORD SINKS
+#---------------------------------------------------------
+
+RECORD_FORMAT_NDJSON  = "ndjson"
+RECORD_FORMAT_PARQUET = "parquet"
+
+RECORD_FORMATS = (RECORD_FORMAT_NDJSON, RECORD_FORMAT_PARQUET)
+
+RECORD_FIELDS = ("apk", "entry", "offset", "category", "string")
+
+_RECORD_SUFFIXES = {".ndjson": RECORD_FORMAT_NDJSON,
+                    ".jsonl": RECORD_FORMAT_NDJSON,
+                    ".parquet": RECORD_FORMAT_PARQUET}
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("PyArrow is required for Parquet output.\nInstall with: pip install pyarrow")
+
+class NdjsonRecordSink:
+    """
+    Write (apk, entry, offset, category, string) records as one JSON object
+    per line.  Lines are buffered and written batch_size records at a time.
+    """
+
+    def __init__(self, path: Path, batch_size: int = 10_000):
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.written = 0
+        self._lines: list[str] = []
+        self._fh = open(self.path, "w", encoding="utf-8", newline="\n")
+
+    def write(self, apk: str, entry: str, offset: int, category: str, string: str) -> None:
+        self._lines.append(json.dumps({"apk": apk, "entry": entry, "offset": offset,
+                                       "category": category, "string": string},
+                                      ensure_ascii=False) + "\n")
+        if len(self._lines) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._lines:
+            self._fh.write("".join(self._lines))
+            self.written += len(self._lines)
+            self._lines.clear()
+        self._fh.flush()
+
+    def close(self) -> None:
+        if not self._fh.closed:
+            self.flush()
+            self._fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class ParquetRecordSink:
+    """
+    Write records to a Parquet file, one row group per batch_size records.
+    apk, entry and category are dictionary-encoded, so readers that select
+    only some categories (or only some columns) skip most of the file.
+    """
+
+    def __init__(self, path: Path, batch_size: int = 65_536):
+        _require_pyarrow()
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.written = 0
+        self._columns: dict[str, list] = {field: [] for field in RECORD_FIELDS}
+        self._schema = pa.schema([("apk", pa.string()),
+                                  ("entry", pa.string()),
+                                  ("offset", pa.int64()),
+                                  ("category", pa.string()),
+                                  ("string", pa.string())])
+        self._writer = pq.ParquetWriter(str(self.path), self._schema,
+                                        use_dictionary=["apk", "entry", "category"],
+                                        compression="zstd")
+
+    def write(self, apk: str, entry: str, offset: int, category: str, string: str) -> None:
+        columns = self._columns
+        columns["apk"].append(apk)
+        columns["entry"].append(entry)
+        columns["offset"].append(offset)
+        columns["category"].append(category)
+        columns["string"].append(string)
+        if len(columns["string"]) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        count = len(self._columns["string"])
+        if not count:
+            return
+        self._writer.write_table(pa.table(self._columns, schema=self._schema))
+        self.written += count
+        for values in self._columns.values():
+            values.clear()
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self.flush()
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def open_record_sink(path: Path, fmt: str | None = None, batch_size: int | None = None):
+    """
+    Open an NDJSON or Parquet record sink.  Without fmt the format follows
+    the file suffix (.ndjson / .jsonl / .parquet).
+    """
+    if fmt is None:
+        fmt = _RECORD_SUFFIXES.get(Path(path).suffix.lower())
+        if fmt is None:
+            raise ValueError(f"Cannot infer the record format of {path} (expected one of {tuple(_RECORD_SUFFIXES)})")
+    if fmt not in RECORD_FORMATS:
+        raise ValueError(f"Unknown record format: {fmt!r} (expected one of {RECORD_FORMATS})")
+
+    sink_class = NdjsonRecordSink if fmt == RECORD_FORMAT_NDJSON else ParquetRecordSink
+    return sink_class(path) if batch_size is None else sink_class(path, batch_size)
+
+def stream_categorized_strings_from_apk(apk_path: Path,
+                                        sink,
+                                        min_length: int = 5,
+                                        max_length: int = 300,
+                                        extensions: tuple[str, ...] = (".dex", ".xml", ".json", ".txt", ".js", ".smali", ""),
+                                        mode: str = STRING_MODE_REGEX,
+                                        chunk_size: int | None = None,
+                                        backend: str = STRING_BACKEND_REGEX,
+                                        bloom_bits: int = 0) -> int:
+    """
+    Streaming counterpart of extract_string_and_categorize_from_apk.
+
+    Each unique string is categorized and written to sink (see
+    open_record_sink) as soon as it is found, together with the entry it
+    came from and its byte offset in the uncompressed entry (first
+    occurrence).  Deduplication keeps only 64-bit hashes, so memory does not
+    grow with the APK.  Records already written from an entry that fails
+    part-way are kept.  Returns the number of records written.
+    """
+    if mode not in STRING_MODES:
+        raise ValueError(f"Unknown string extraction mode: {mode!r} (expected one of {STRING_MODES})")
+    if backend not in STRING_BACKENDS:
+        raise ValueError(f"Unknown string scanning backend: {backend!r} (expected one of {STRING_BACKENDS})")
+    if backend == STRING_BACKEND_NUMPY:
+        _require_numpy()
+    if chunk_size is not None and chunk_size <= 0:
+        raise ValueError(f"chunk_size must be a positive number of bytes, got {chunk_size}")
+
+    if not os.path.isfile(apk_path):
+        raise FileNotFoundError(f"APK not found: {apk_path}")
+
+    apk_name = os.path.basename(apk_path)
+    seen = HashedStringSet(bloom_bits=bloom_bits)
+    count = 0
+
+    with zipfile.ZipFile(apk_path, "r") as apk:
+        for entry in apk.infolist():
+            _, ext = os.path.splitext(entry.filename.lower())
+            if extensions and ext not in extensions:
+                continue
+            try:
+                for offset, s in _extract_strings_from_entry(apk, entry, min_length, max_length,
+                                                             mode, chunk_size, backend, located=True):
+                    if seen.add(s):
+                        sink.write(apk_name, entry.filename, offset, categorize_string(s), s)
+                        count += 1
+            except Exception:
+                continue
+
+    sink.flush()
+    return count
+
@@ -0,0 +1,145 @@
+import os
+import re
+import sys
+import time
+import zipfile
+import argparse
+
+from pathlib import Path
+
+from apk_strings_extractor import (
+    STRING_BACKENDS,
+    _BYTES_SCANNERS,
+    _IMPORTANT_PATTERNS,
+    _find_text_runs,
+    _important_candidates,
+)
+
+def _time_call(fn, *args, repeat: int = 3):
+    """Return (best wall time in seconds, result of the last call)."""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def _load_entries(apk_path: Path) -> dict[str, list[bytes]]:
+    """Group the decompressed .dex and lib/*.so entries of an APK."""
+    inputs = {"dex": [], "native": []}
+    with zipfile.ZipFile(apk_path, "r") as apk:
+        for entry in apk.infolist():
+            name = entry.filename
+            if name.endswith(".dex"):
+                inputs["dex"].append(apk.read(entry))
+            elif name.startswith("lib/") and name.endswith(".so"):
+                inputs["native"].append(apk.read(entry))
+    return inputs
+
+def benchmark_backends(apk_path: Path, min_length: int = 5, max_length: int = 300, repeat: int = 3):
+    """Print MB/s of every available bytes backend on the dex and native-library entries."""
+    inputs = _load_entries(apk_path)
+
+    for kind, blobs in inputs.items():
+        total = sum(len(b) for b in blobs)
+        if not total:
+            print(f"{kind:<7} no entries")
+            continue
+
+        reference = None
+        for backend in STRING_BACKENDS:
+            scan = _BYTES_SCANNERS[backend]
+            try:
+                elapsed, strings = _time_call(
+                    lambda: [s for b in blobs for s in scan(b, min_length, max_length)], repeat=repeat)
+            except ImportError as e:
+                print(f"{kind:<7} {backend:<6} skipped ({e.msg.splitlines()[0]})")
+                continue
+
+            if reference is None:
+                reference = strings
+            same = "identical" if strings == reference else "MISMATCH"
+            print(f"{kind:<7} {backend:<6} {total / elapsed / 1e6:8.1f} MB/s "
+                  f"({total / 1e6:.1f} MB, {len(strings)} strings, {same})")
+
+#---------------------------------------------------------
+# LEGACY SCAN (extract_strings_from_apk / extract_important_strings_from_apk)
+#---------------------------------------------------------
+
+# Reference copy of the original important-string patterns, kept here so the
+# legacy scan can be measured against its replacement.
+_LEGACY_IMPORTANT_PATTERNS = dict(_IMPORTANT_PATTERNS,
+                                  base64=re.compile(r'(?:[A-Za-z0-9+/]{4})*(?:[A-Za-z0-9+/]{2}==|[A-Za-z0-9+/]{3}=)?'))
+
+def _legacy_two_pass_scan(blobs: list[bytes], min_length: int) -> set[str]:
+    """The original scan: a str regex over the decoded entry, then a bytes regex over the raw one."""
+    strings = set()
+    for data in blobs:
+        text = data.decode('utf-8', errors='ignore')
+        strings.update(re.findall(r'[\x20-\x7E]{' + str(min_length) + r',}', text))
+        found = re.findall(b'[\x20-\x7E]{' + str(min_length).encode() + b',}', data)
+        strings.update(s.decode('ascii', errors='ignore') for s in found)
+    return strings
+
+def _one_pass_scan(blobs: list[bytes], min_length: int) -> set[str]:
+    strings = set()
+    for data in blobs:
+        strings.update(_find_text_runs(data, min_length))
+    return strings
+
+def _legacy_important_pass(strings: set[str]) -> int:
+    found = 0
+    for string in strings:
+        for pattern in _LEGACY_IMPORTANT_PATTERNS.values():
+            found += len(pattern.findall(string))
+    return found
+
+def _gated_important_pass(strings: set[str]) -> int:
+    found = 0
+    for string in strings:
+        for category in _important_candidates(string):
+            found += len(_IMPORTANT_PATTERNS[category].findall(string))
+    return found
+
+def benchmark_legacy(apk_path: Path, min_length: int = 3, repeat: int = 3):
+    """Print MB/s of the original and the one-pass scan, and of both important-string passes."""
+    with zipfile.ZipFile(apk_path, "r") as apk:
+        blobs = [apk.read(entry) for entry in apk.infolist()]
+    total = sum(len(b) for b in blobs)
+
+    results = {}
+    for name, scan in (("two-pass", _legacy_two_pass_scan), ("one-pass", _one_pass_scan)):
+        elapsed, strings = _time_call(scan, blobs, min_length, repeat=repeat)
+        results[name] = strings
+        print(f"scan      {name:<9} {total / elapsed / 1e6:8.1f} MB/s ({total / 1e6:.1f} MB, {len(strings)} strings)")
+
+    # Both important passes run over the same strings, so only the matching differs
+    strings = results["one-pass"]
+    for name, match in (("8-pattern", _legacy_important_pass), ("gated", _gated_important_pass)):
+        elapsed, found = _time_call(match, strings, repeat=repeat)
+        print(f"important {name:<9} {len(strings) / elapsed / 1e3:8.1f} k strings/s ({found} matches)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the string scanning backends on an APK.")
+    parser.add_argument("path", help="Path to an APK file")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="Runs per backend, best time is reported")
+    parser.add_argument("--min-length", type=int, default=None,
+                        help="Shortest string kept (default: 5, or 3 with --legacy, the legacy extractor's value)")
+    parser.add_argument("--max-length", type=int, default=300)
+    parser.add_argument("--legacy", action="store_true",
+                        help="Benchmark the legacy extract_strings_from_apk scan and important-string pass instead")
+
+    args = parser.parse_args()
+    if not os.path.isfile(args.path):
+        print(f"Error: {args.path} does not exist!")
+        sys.exit(1)
+
+    if args.legacy:
+        benchmark_legacy(Path(args.path), 3 if args.min_length is None else args.min_length, args.repeat)
+    else:
+        benchmark_backends(Path(args.path), 5 if args.min_length is None else args.min_length, args.max_length, args.repeat)
+
+if __name__ == "__main__":
+    main()
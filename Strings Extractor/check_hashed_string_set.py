@@ -0,0 +1,146 @@
+import os
+import sys
+import random
+import string
+import zipfile
+import argparse
+import tempfile
+
+from pathlib import Path
+
+from apk_strings_extractor import (
+    HashedStringSet,
+    _extract_strings_from_apk,
+    categorize_strings,
+    stream_categorized_strings_from_apk,
+)
+
+# Self-checks of the hashed low-memory dedup mode: its collision handling,
+# agreement with an exact set(), and sink output equal to the exact path.
+# Run directly; exits with status 1 if any check fails.
+
+class CheckFailed(AssertionError):
+    pass
+
+def _check(condition, message):
+    if not condition:
+        raise CheckFailed(message)
+
+def check_forced_collisions():
+    """Distinct strings with equal hashes: the second is dropped, never emitted twice."""
+    hashes = {"first": 42, "second": 42, "zero": 0, "one": 1}
+    seen = HashedStringSet(capacity=4, hash_func=lambda s: hashes.get(s, hash(s)))
+    _check(seen.add("first"), "first string of a colliding pair not added")
+    _check(not seen.add("second"), "colliding string reported as new")
+    _check("second" in seen, "colliding string not reported as present")
+    _check(not seen.add("first"), "duplicate reported as new")
+    # Hash 0 marks empty slots, so it is stored as 1 and collides with it
+    _check(seen.add("zero"), "string hashing to 0 not added")
+    _check(not seen.add("one"), "string hashing to 1 not treated as colliding with hash 0")
+    _check(len(seen) == 2, f"expected 2 members, got {len(seen)}")
+
+def check_low_bit_collisions_across_growth(count: int = 5000):
+    """Hashes sharing all their low bits keep probing correctly while the table doubles."""
+    seen = HashedStringSet(capacity=1, hash_func=lambda s: (int(s) << 24) | 0x5A5A5A)
+    for n in range(count):
+        _check(seen.add(str(n)), f"{n} not added")
+    _check(len(seen) == count, f"expected {count} members, got {len(seen)}")
+    for n in range(count):
+        _check(not seen.add(str(n)), f"{n} added twice after growth")
+    for n in range(count, count + 100):
+        _check(str(n) not in seen, f"{n} reported present but never added")
+
+def check_agreement_with_set(inserts: int = 200_000, seed: int = 0):
+    """add() answers exactly like an exact set(), without and with the Bloom filter."""
+    rnd = random.Random(seed)
+    pool = ["".join(rnd.choices(string.ascii_letters, k=rnd.randint(5, 20))) for _ in range(inserts // 2)]
+    sequence = [rnd.choice(pool) for _ in range(inserts)]
+    # 64 bits saturate at once (every lookup probes); 1 << 20 bits mostly skip the probe
+    for bloom_bits in (0, 64, 1 << 20):
+        seen = HashedStringSet(capacity=16, bloom_bits=bloom_bits)
+        exact = set()
+        for s in sequence:
+            new = s not in exact
+            exact.add(s)
+            _check(seen.add(s) == new, f"add({s!r}) disagrees with set() (bloom_bits={bloom_bits})")
+        _check(len(seen) == len(exact), f"{len(seen)} members vs {len(exact)} in set() (bloom_bits={bloom_bits})")
+
+def write_synthetic_apk(path, entries: int = 12, seed: int = 0):
+    """APK-shaped ZIP whose .dex / .txt / .xml entries share many of their strings."""
+    rnd = random.Random(seed)
+    words = ["".join(rnd.choices(string.ascii_letters + string.digits, k=rnd.randint(5, 30))) for _ in range(3000)]
+    words += ["https://example.com/api/v1", "admin@example.com", "192.168.1.10", "com.example.app.MainActivity"]
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as apk:
+        for n in range(entries):
+            name = ("classes%d.dex" % (n + 1), "assets/t%d.txt" % n, "res/x%d.xml" % n)[n % 3]
+            body = b"\x00".join(rnd.choice(words).encode() for _ in range(2000))
+            apk.writestr(name, b"dex\n035\x00" + body if name.endswith(".dex") else body)
+
+class _ListRecordSink:
+    def __init__(self):
+        self.records = []
+
+    def write(self, apk, entry, offset, category, s):
+        self.records.append((category, s))
+
+    def flush(self):
+        pass
+
+def check_sink_matches_exact_path(apk_path):
+    """The hashed sink paths emit the exact path's strings, in the same order."""
+    exact = _extract_strings_from_apk(apk_path)
+    _check(exact, f"no strings extracted from {apk_path}")
+    for workers in (1, 2):
+        for bloom_bits in (0, 1 << 16):
+            emitted = []
+            returned = _extract_strings_from_apk(apk_path, workers=workers, sink=emitted.append, bloom_bits=bloom_bits)
+            _check(returned == [], "sink mode returned strings")
+            _check(emitted == exact,
+                   f"sink output differs from the exact path (workers={workers}, bloom_bits={bloom_bits}): "
+                   f"{len(emitted)} vs {len(exact)} strings")
+
+    records = _ListRecordSink()
+    count = stream_categorized_strings_from_apk(apk_path, records)
+    _check(count == len(records.records), f"{count} records reported, {len(records.records)} written")
+    categorized = {(category, s) for category, strings in categorize_strings(exact).items() for s in strings}
+    _check(set(records.records) == categorized, "streamed records differ from categorize_strings of the exact path")
+
+CHECKS = {
+    "forced collisions": check_forced_collisions,
+    "low-bit collisions across growth": check_low_bit_collisions_across_growth,
+    "agreement with set()": check_agreement_with_set,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Self-check the hashed low-memory dedup mode of the strings extractor.")
+    parser.add_argument("--apk", help="Also compare the sink and exact paths on this APK (a synthetic one is always used)")
+    args = parser.parse_args()
+
+    if args.apk and not os.path.isfile(args.apk):
+        print(f"Error: {args.apk} does not exist!")
+        sys.exit(1)
+
+    failed = 0
+    with tempfile.TemporaryDirectory() as temp_dir:
+        synthetic = Path(temp_dir) / "synthetic.apk"
+        write_synthetic_apk(synthetic)
+        checks = dict(CHECKS)
+        checks["sink output (synthetic APK)"] = lambda: check_sink_matches_exact_path(synthetic)
+        if args.apk:
+            checks[f"sink output ({args.apk})"] = lambda: check_sink_matches_exact_path(Path(args.apk))
+
+        for name, check in checks.items():
+            try:
+                check()
+                print(f"ok    {name}")
+            except CheckFailed as e:
+                failed += 1
+                print(f"FAIL  {name}: {e}")
+
+    if failed:
+        print(f"{failed} of {len(checks)} checks failed")
+        sys.exit(1)
+    print(f"All {len(checks)} checks passed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import os
+import sys
+import time
+import shutil
+import argparse
+import importlib.util
+
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Common"))
+from axml_reader import read_uses_sdk
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+# backend name -> (script, function returning (min_sdk, version, message)).  The apktool
+# script's get_min_sdk_from_apk prefers aapt2 badging, so its two paths are separate rows.
+BACKENDS = {
+    "axml": ("check_minimum_required_android_version_axml.py", "get_min_sdk_from_apk"),
+    "pyaxmlparser": ("check_minimum_required_android_version_pyaxmlparser.py", "get_min_sdk_from_apk"),
+    "aapt2-badging": ("check_minimum_required_android_version_apktool.py", "get_min_sdk_with_badging"),
+    "apktool": ("check_minimum_required_android_version_apktool.py", "get_min_sdk_with_apktool"),
+}
+
+# backend name -> external tool it needs on PATH
+REQUIRED_TOOLS = {"aapt2-badging": "aapt2", "apktool": "apktool"}
+
+def _load_backend(name: str):
+    """The min-SDK function of a backend, or None (with the reason) if it cannot run here."""
+    tool = REQUIRED_TOOLS.get(name)
+    if tool is not None and shutil.which(tool) is None:
+        return None, f"{tool} not on PATH"
+    script, function = BACKENDS[name]
+    spec = importlib.util.spec_from_file_location(f"min_sdk_{name.replace('-', '_')}", os.path.join(_HERE, script))
+    module = importlib.util.module_from_spec(spec)
+    try:
+        spec.loader.exec_module(module)
+    except ImportError as e:
+        return None, str(e)
+    return getattr(module, function), None
+
+def benchmark_min_sdk(apk_files: list[Path], backends: list[str], repeat: int = 1):
+    """Print the per-APK time of each backend and check that they agree."""
+    results: dict[str, list] = {}
+    for name in backends:
+        get_min_sdk, reason = _load_backend(name)
+        if get_min_sdk is None:
+            print(f"{name:<13} skipped ({reason})")
+            continue
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            results[name] = [get_min_sdk(apk)[0] for apk in apk_files]
+        elapsed = (time.perf_counter() - start) / repeat
+        print(f"{name:<13} {elapsed * 1000 / max(len(apk_files), 1):10.3f} ms/APK {elapsed:8.3f} s total")
+
+    # Manifest bytes the axml reader actually inflated
+    inflated = file_size = 0
+    for apk in apk_files:
+        stats: dict[str, int] = {}
+        try:
+            read_uses_sdk(apk, stats)
+        except Exception:
+            continue
+        # STORED manifests are sliced, not inflated
+        inflated += stats["inflated"] if stats["inflated"] else stats["compressed_read"]
+        file_size += stats.get("file_size", 0)
+    if file_size:
+        print(f"axml reader inflated {inflated / file_size:.1%} of the manifest bytes")
+
+    reference = results.get("axml")
+    for name, values in results.items():
+        if name != "axml" and reference is not None:
+            mismatches = [str(apk) for apk, a, b in zip(apk_files, reference, values) if a != b]
+            if mismatches:
+                print(f"{name} disagrees with axml on {len(mismatches)} APKs, e.g. {mismatches[0]}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the minimum-SDK backends (binary AXML reader, pyaxmlparser, aapt2 badging, apktool).")
+    parser.add_argument("path", help="Path to an APK file or directory containing APKs")
+    parser.add_argument("-b", "--backend", action="append", choices=list(BACKENDS),
+                        help="Backend to run (repeatable; default: all)")
+    parser.add_argument("-r", "--repeat", type=int, default=1, help="Runs per backend")
+
+    args = parser.parse_args()
+    if os.path.isfile(args.path):
+        apk_files = [Path(args.path)]
+    elif os.path.isdir(args.path):
+        apk_files = sorted(Path(args.path).glob("*.apk"))
+    else:
+        print(f"Error: {args.path} does not exist!")
+        sys.exit(1)
+
+    benchmark_min_sdk(apk_files, args.backend or list(BACKENDS), args.repeat)
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,10 @@ from pathlib import Path
 import shutil
 import tempfile
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Common"))
+from aapt2_daemon import get_shared_pool
+from aapt2_badging import collect_badging
+
 API_TO_VERSION = {
     1: "1.0", 2: "1.1", 3: "1.5", 4: "1.6", 5: "2.0", 6: "2.0.1",
     7: "2.1", 8: "2.2", 9: "2.3", 10: "2.3.3", 11: "3.0", 12: "3.1",
@@ -14,14 +18,40 @@ API_TO_VERSION = {
     31: "12", 32: "12L", 33: "13", 34: "14"
 }
 
-def get_min_sdk_from_apk(apk_path):
-    """Extract minimum SDK using apktool"""
+def _min_sdk_result(min_sdk):
+    if min_sdk is None:
+        return 1, "1.0", "No minSdkVersion specified, assuming API 1 (Android 1.0)"
+    if not isinstance(min_sdk, int):
+        # Preview codename (e.g. 'Tiramisu')
+        return min_sdk, "Preview", f"Minimum SDK: {min_sdk} (preview)"
+    version = API_TO_VERSION.get(min_sdk, "Unknown")
+    return min_sdk, version, f"Minimum SDK: API {min_sdk} (Android {version})"
+
+def _check_apk_path(apk_path):
+    """Error message for a path that is not an existing .apk file, else None"""
+    if not apk_path.exists():
+        return "APK file does not exist"
+    if not apk_path.is_file() or apk_path.suffix.lower() != '.apk':
+        return "Path is not an APK file"
+    return None
+
+def get_min_sdk_with_badging(apk_path):
+    """Extract minimum SDK from aapt2 dump badging only"""
+    if get_shared_pool() is None:
+        return None, None, "aapt2 not found on PATH"
+    try:
+        # One badging pass, shared with the native-code extractor
+        return _min_sdk_result(collect_badging(apk_path)["min_sdk"])
+    except Exception as e:
+        return None, None, f"Error running aapt2 for {apk_path}: {e}"
+
+def get_min_sdk_with_apktool(apk_path):
+    """Extract minimum SDK by decoding the APK with apktool only"""
     try:
         apk_path = Path(apk_path)
-        if not apk_path.exists():
-            return None, None, "APK file does not exist"
-        if not apk_path.is_file() or apk_path.suffix.lower() != '.apk':
-            return None, None, "Path is not an APK file"
+        error = _check_apk_path(apk_path)
+        if error:
+            return None, None, error
 
         # Create temporary directory
         with tempfile.TemporaryDirectory() as temp_dir:
@@ -37,17 +67,31 @@ def get_min_sdk_from_apk(apk_path):
             with open(yaml_path, 'r') as f:
                 for line in f:
                     if 'minSdkVersion' in line:
-                        min_sdk = int(line.split(':')[-1].strip().strip("'"))
-                        version = API_TO_VERSION.get(min_sdk, "Unknown")
-                        return min_sdk, version, f"Minimum SDK: API {min_sdk} (Android {version})"
+                        value = line.split(':')[-1].strip().strip("'")
+                        return _min_sdk_result(int(value) if value.isdigit() else value)
             
-            return 1, "1.0", "No minSdkVersion specified, assuming API 1 (Android 1.0)"
+            return _min_sdk_result(None)
 
     except subprocess.CalledProcessError:
         return None, None, "Error running apktool - make sure it's installed"
     except Exception as e:
         return None, None, f"Error during analysis: {str(e)}"
 
+def get_min_sdk_from_apk(apk_path):
+    """Extract minimum SDK from aapt2 dump badging, or with apktool if aapt2 is not installed or fails"""
+    apk_path = Path(apk_path)
+    error = _check_apk_path(apk_path)
+    if error:
+        return None, None, error
+
+    if get_shared_pool() is not None:
+        min_sdk, version, message = get_min_sdk_with_badging(apk_path)
+        if min_sdk is not None:
+            return min_sdk, version, message
+        print(f"{message}; falling back to apktool")
+
+    return get_min_sdk_with_apktool(apk_path)
+
 def main():
     if len(sys.argv) < 2:
         print("Usage: python3 check_minimum_required_android_version_apktool.py <path_to_apk>")
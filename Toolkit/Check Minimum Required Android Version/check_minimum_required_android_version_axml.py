@@ -0,0 +1,81 @@
+import os
+import sys
+import zipfile
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Common"))
+from axml_reader import read_uses_sdk
+
+API_TO_VERSION = {
+    1: "1.0", 2: "1.1", 3: "1.5", 4: "1.6", 5: "2.0", 6: "2.0.1",
+    7: "2.1", 8: "2.2", 9: "2.3", 10: "2.3.3", 11: "3.0", 12: "3.1",
+    13: "3.2", 14: "4.0", 15: "4.0.3", 16: "4.1", 17: "4.2", 18: "4.3",
+    19: "4.4", 20: "4.4W", 21: "5.0", 22: "5.1", 23: "6.0", 24: "7.0",
+    25: "7.1", 26: "8.0", 27: "8.1", 28: "9", 29: "10", 30: "11",
+    31: "12", 32: "12L", 33: "13", 34: "14"
+}
+
+def get_sdk_levels_from_apk(apk_path):
+    """
+    min / target / max SDK from the binary AndroidManifest.xml.  Only the
+    manifest is inflated, and only up to its first <uses-sdk> element.
+    """
+    return read_uses_sdk(Path(apk_path))
+
+def _min_sdk_result(min_sdk):
+    if min_sdk is None:
+        return 1, "1.0", "No minSdkVersion specified, assuming API 1 (Android 1.0)"
+    if isinstance(min_sdk, int):
+        version = API_TO_VERSION.get(min_sdk, "Unknown")
+        return min_sdk, version, f"Minimum SDK: API {min_sdk} (Android {version})"
+    if min_sdk.startswith("@"):
+        # Resource reference that needs resources.arsc
+        return min_sdk, "Unknown", f"Minimum SDK: {min_sdk} (not a numeric API level)"
+    # Preview codename (e.g. 'Tiramisu'), labelled like the apktool / aapt2 backend
+    return min_sdk, "Preview", f"Minimum SDK: {min_sdk} (preview)"
+
+def get_sdk_info_from_apk(apk_path):
+    """
+    get_min_sdk_from_apk's (min_sdk, version, message) plus the levels dict
+    of get_sdk_levels_from_apk (None on error), from one <uses-sdk> read.
+    """
+    try:
+        apk_path = Path(apk_path)
+        if not apk_path.exists():
+            return None, None, "APK file does not exist", None
+        if not apk_path.is_file() or apk_path.suffix.lower() != '.apk':
+            return None, None, "Path is not an APK file", None
+
+        levels = get_sdk_levels_from_apk(apk_path)
+        return (*_min_sdk_result(levels["min_sdk"]), levels)
+
+    except zipfile.BadZipFile:
+        return None, None, "Invalid APK file format", None
+    except Exception as e:
+        return None, None, f"Error during analysis: {str(e)}", None
+
+def get_min_sdk_from_apk(apk_path):
+    """Extract minimum SDK by reading <uses-sdk> straight from the binary manifest"""
+    return get_sdk_info_from_apk(apk_path)[:3]
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python check_minimum_required_android_version_axml.py <path_to_apk>")
+        sys.exit(1)
+
+    apk_path = sys.argv[1]
+    # The manifest is parsed once for the minimum, target and maximum SDK
+    min_sdk, version, message, levels = get_sdk_info_from_apk(apk_path)
+
+    print(f"APK: {apk_path}")
+    if min_sdk is not None:
+        print(f"Minimum SDK Version: API {min_sdk}")
+        print(f"Android Version: {version}")
+        if levels["target_sdk"] is not None:
+            print(f"Target SDK Version: API {levels['target_sdk']}")
+        if levels["max_sdk"] is not None:
+            print(f"Maximum SDK Version: API {levels['max_sdk']}")
+    print(f"Message: {message}")
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,9 @@ import sys
 import zipfile
 from pathlib import Path
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Common"))
+from apk_index import ApkIndex
+
 def is_ndk_apk(apk_path):
     """
     Check if the given APK file contains NDK components
@@ -28,10 +31,10 @@ def is_ndk_apk(apk_path):
         if not apk_path.is_file() or apk_path.suffix.lower() != '.apk':
             return False, "Path is not an APK file"
 
-        # Open APK as ZIP file
-        with zipfile.ZipFile(apk_path, 'r') as apk:
+        # Read only the central directory of the APK
+        with ApkIndex(apk_path) as apk:
             # Get list of all files in APK
-            file_list = apk.namelist()
+            file_list = apk.names
             
             # Check for native libraries
             for file_path in file_list:
@@ -70,7 +73,7 @@ def main():
     if len(sys.argv) > 1:
         path = sys.argv[1]
     else:
-    	print("Usage: python3 check_ndk_based_apk.py <path_to_apk>")
+        print("Usage: python3 check_ndk_based_apk.py <path_to_apk>")
         sys.exit(1)
 
     # Analyze the path
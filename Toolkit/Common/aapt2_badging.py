@@ -0,0 +1,136 @@
+import os
+import re
+import sys
+import json
+import argparse
+import threading
+
+from collections import OrderedDict
+from pathlib import Path
+
+from aapt2_daemon import get_shared_pool, Aapt2DaemonPool
+
+#---------------------------------------------------------
+# AAPT2 DUMP BADGING
+#---------------------------------------------------------
+
+# name='value' pairs of "package:" / "uses-permission:" lines
+_RE_ATTR = re.compile(r"([\w-]+)='([^']*)'")
+# 'value' items of "sdkVersion:'21'" / "native-code: 'arm64-v8a' 'x86'" lines
+_RE_QUOTED = re.compile(r"'([^']*)'")
+
+# Results kept per APK, so every entry point run on the same file in one
+# process shares a single badging pass.
+_BADGING_CACHE_SIZE = 256
+
+_badging_cache: OrderedDict = OrderedDict()
+_badging_lock = threading.Lock()
+
+def _sdk_level(value: str):
+    """API level as an int; preview codenames ("Tiramisu") are kept as strings."""
+    value = value.strip()
+    return int(value) if value.isdigit() else value or None
+
+def parse_badging(lines) -> dict:
+    """
+    Parse `aapt2 dump badging` output into package, version, SDK levels,
+    uses-permission names and native-code ABIs.  Fields the APK does not
+    declare are None (or empty lists).
+    """
+    info = {
+        "package": None,
+        "version_code": None,
+        "version_name": None,
+        "min_sdk": None,
+        "target_sdk": None,
+        "permissions": [],
+        "native_code": [],
+        "alt_native_code": [],
+    }
+    permissions = info["permissions"]
+
+    for line in lines:
+        key, sep, rest = line.partition(":")
+        if not sep:
+            continue
+        if key == "package":
+            attrs = dict(_RE_ATTR.findall(rest))
+            info["package"] = attrs.get("name")
+            info["version_code"] = attrs.get("versionCode")
+            info["version_name"] = attrs.get("versionName")
+        elif key == "sdkVersion" or key == "minSdkVersion":
+            values = _RE_QUOTED.findall(rest)
+            info["min_sdk"] = _sdk_level(values[0]) if values else None
+        elif key == "targetSdkVersion":
+            values = _RE_QUOTED.findall(rest)
+            info["target_sdk"] = _sdk_level(values[0]) if values else None
+        elif key == "uses-permission":
+            name = dict(_RE_ATTR.findall(rest)).get("name")
+            if name is not None and name not in permissions:
+                permissions.append(name)
+        elif key == "native-code":
+            info["native_code"] = _RE_QUOTED.findall(rest)
+        elif key == "alt-native-code":
+            info["alt_native_code"] = _RE_QUOTED.findall(rest)
+    return info
+
+def collect_badging(apk_path, pool: Aapt2DaemonPool | None = None, timeout: float | None = None) -> dict:
+    """
+    Run one `aapt2 dump badging` pass on an APK (through the shared aapt2
+    daemon pool unless pool is given) and return parse_badging's result.
+    Results are cached by path, size and mtime.  Raises FileNotFoundError
+    if aapt2 is not available, or the pool's errors (Aapt2Error,
+    TimeoutError, Aapt2DaemonCrashed).
+    """
+    stat = os.stat(apk_path)
+    key = (os.path.realpath(apk_path), stat.st_size, stat.st_mtime_ns)
+    with _badging_lock:
+        if key in _badging_cache:
+            _badging_cache.move_to_end(key)
+            return _badging_cache[key]
+
+    if pool is None:
+        pool = get_shared_pool()
+        if pool is None:
+            raise FileNotFoundError("aapt2 not found. Please install Android SDK build-tools and add it to PATH")
+
+    info = parse_badging(pool.dump("badging", str(apk_path), timeout))
+    with _badging_lock:
+        _badging_cache[key] = info
+        while len(_badging_cache) > _BADGING_CACHE_SIZE:
+            _badging_cache.popitem(last=False)
+    return info
+
+#---------------------------------------------------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Collect package, version, SDK levels, permissions and native-code ABIs "
+                                                 "of APK files with one aapt2 dump badging pass each.")
+    parser.add_argument("path", help="Path to an APK file or directory containing APKs")
+    parser.add_argument("-o", "--output", help="Write the results to this JSON file instead of printing them")
+    args = parser.parse_args()
+
+    if os.path.isfile(args.path):
+        apk_files = [args.path]
+    elif os.path.isdir(args.path):
+        apk_files = sorted(str(p) for p in Path(args.path).glob("*.apk"))
+    else:
+        print(f"Error: {args.path} does not exist!")
+        sys.exit(1)
+
+    results = {}
+    for apk_file in apk_files:
+        try:
+            results[apk_file] = collect_badging(apk_file)
+        except Exception as e:
+            print(f"Error running aapt2 for {apk_file}: {e}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
+        print(f"Saved JSON to {args.output}")
+    else:
+        print(json.dumps(results, indent=4))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+import os
+import time
+import atexit
+import shutil
+import selectors
+import threading
+import subprocess
+
+#---------------------------------------------------------
+# AAPT2 DAEMON
+#---------------------------------------------------------
+
+# `aapt2 daemon` prints "Ready" on stdout once, then reads one command per
+# block: the subcommand and each argument on its own line, ended by an
+# empty line.  A command's output goes to stdout, which aapt2 flushes before
+# it prints "Done" on stderr, preceded there by "Error" if the command
+# failed.  Nothing on stdout marks the end of a command.
+_READY = "Ready"
+_DONE  = "Done"
+_ERROR = "Error"
+_QUIT  = "quit"
+
+_STARTUP_TIMEOUT  = 30.0
+_SHUTDOWN_TIMEOUT = 5.0
+_READ_SIZE = 1 << 16
+
+class Aapt2Error(RuntimeError):
+    """An aapt2 command failed; the message holds its stderr."""
+
+class Aapt2DaemonCrashed(RuntimeError):
+    """The aapt2 daemon process exited while running a command."""
+
+class Aapt2Daemon:
+    """One long-lived `aapt2 daemon` process, used by one thread at a time."""
+
+    def __init__(self, aapt2_path: str = "aapt2"):
+        self.aapt2_path = aapt2_path
+        self._process = subprocess.Popen([aapt2_path, "daemon"],
+                                         stdin=subprocess.PIPE,
+                                         stdout=subprocess.PIPE,
+                                         stderr=subprocess.PIPE,
+                                         bufsize=0)
+        # Both pipes are read by one selector loop, so a full stderr pipe can
+        # never block stdout and stdout is read up to stderr's "Done"
+        self._selector = selectors.DefaultSelector()
+        self._buffers = {"stdout": bytearray(), "stderr": bytearray()}
+        for name in self._buffers:
+            stream = getattr(self._process, name)
+            os.set_blocking(stream.fileno(), False)
+            self._selector.register(stream, selectors.EVENT_READ, name)
+
+        try:
+            deadline = time.monotonic() + _STARTUP_TIMEOUT
+            line = self._take_line("stdout")
+            while line is None:
+                self._poll(deadline, _STARTUP_TIMEOUT)
+                line = self._take_line("stdout")
+        except (TimeoutError, Aapt2DaemonCrashed):
+            self.kill()
+            raise
+        if line != _READY:
+            self.kill()
+            raise Aapt2DaemonCrashed(f"Unexpected aapt2 daemon greeting: {line!r}")
+
+    def _read(self, stream, name: str) -> bool:
+        """Append what a pipe has ready to its buffer; False if nothing was."""
+        try:
+            data = os.read(stream.fileno(), _READ_SIZE)
+        except BlockingIOError:
+            return False
+        if not data:
+            try:
+                code = self._process.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                code = None
+            raise Aapt2DaemonCrashed(f"aapt2 daemon closed its {name} (exit code {code})")
+        self._buffers[name] += data
+        return True
+
+    def _poll(self, deadline: float, timeout: float) -> None:
+        """Wait until either pipe has data and read it; TimeoutError past the deadline."""
+        remaining = deadline - time.monotonic()
+        events = self._selector.select(remaining) if remaining > 0 else []
+        if not events:
+            raise TimeoutError(f"aapt2 daemon did not answer within {timeout:.1f}s")
+        for key, _ in events:
+            self._read(key.fileobj, key.data)
+
+    def _take_line(self, name: str) -> str | None:
+        buffer = self._buffers[name]
+        end = buffer.find(b"\n")
+        if end < 0:
+            return None
+        line = bytes(buffer[:end]).decode("utf-8", errors="replace").rstrip("\r")
+        del buffer[:end + 1]
+        return line
+
+    @property
+    def alive(self) -> bool:
+        return self._process.poll() is None
+
+    def run(self, args: list[str], timeout: float) -> list[str]:
+        """
+        Run one command and return its stdout lines.  Raises Aapt2Error if
+        aapt2 reports a failure, TimeoutError or Aapt2DaemonCrashed if the
+        daemon must be discarded.
+        """
+        if not args or any("\n" in arg for arg in args):
+            raise ValueError(f"aapt2 daemon arguments must be non-empty single lines: {args!r}")
+        try:
+            self._process.stdin.write(("\n".join(args) + "\n\n").encode("utf-8"))
+            self._process.stdin.flush()
+        except (BrokenPipeError, OSError, ValueError):
+            raise Aapt2DaemonCrashed("aapt2 daemon stdin is closed") from None
+
+        deadline = time.monotonic() + timeout
+        errors: list[str] = []
+        failed = False
+        while True:
+            line = self._take_line("stderr")
+            if line is None:
+                self._poll(deadline, timeout)
+            elif line == _DONE:
+                break
+            elif line == _ERROR:
+                failed = True
+            else:
+                errors.append(line)
+
+        # Everything the command wrote to stdout is in the pipe by now
+        while self._read(self._process.stdout, "stdout"):
+            pass
+        output = [line.rstrip("\r") for line in bytes(self._buffers["stdout"]).decode("utf-8", errors="replace").split("\n")]
+        if output[-1] == "":
+            output.pop()
+        self._buffers["stdout"].clear()
+
+        if failed:
+            raise Aapt2Error("\n".join(errors) or f"aapt2 {args[0]} failed")
+        return output
+
+    def kill(self) -> None:
+        if self.alive:
+            self._process.kill()
+        self._process.wait()
+        self._selector.close()
+
+    def close(self) -> None:
+        """Ask the daemon to quit, killing it if it does not within a few seconds."""
+        if self.alive:
+            try:
+                self._process.stdin.write((_QUIT + "\n").encode())
+                self._process.stdin.flush()
+                self._process.wait(timeout=_SHUTDOWN_TIMEOUT)
+            except (OSError, ValueError, subprocess.TimeoutExpired):
+                pass
+        self.kill()
+
+class Aapt2DaemonPool:
+    """
+    Up to `workers` aapt2 daemons shared by any number of threads.
+
+    A caller blocks until a daemon is free, so at most `workers` commands
+    run at once.  A daemon that crashes or exceeds the per-command timeout
+    is killed and replaced by a fresh one on the next request; a command
+    whose daemon crashed is retried once on a new daemon.
+    """
+
+    def __init__(self, aapt2_path: str = "aapt2", workers: int | None = None, timeout: float = 60.0):
+        if workers is not None and workers < 1:
+            raise ValueError(f"workers must be at least 1, got {workers}")
+        self.aapt2_path = aapt2_path
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.restarts = 0
+        self.timeouts = 0
+        self._idle: list[Aapt2Daemon] = []
+        self._all: list[Aapt2Daemon] = []
+        self._slots = threading.BoundedSemaphore(self.workers)
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _acquire(self) -> Aapt2Daemon:
+        self._slots.acquire()
+        try:
+            with self._lock:
+                if self._closed:
+                    raise RuntimeError("aapt2 daemon pool is closed")
+                while self._idle:
+                    daemon = self._idle.pop()
+                    if daemon.alive:
+                        return daemon
+                    self._all.remove(daemon)
+                    self.restarts += 1
+            daemon = Aapt2Daemon(self.aapt2_path)
+            with self._lock:
+                self._all.append(daemon)
+            return daemon
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _release(self, daemon: Aapt2Daemon, healthy: bool) -> None:
+        with self._lock:
+            if healthy and not self._closed:
+                self._idle.append(daemon)
+            else:
+                if daemon in self._all:
+                    self._all.remove(daemon)
+                daemon.kill()
+        self._slots.release()
+
+    def run(self, args: list[str], timeout: float | None = None) -> list[str]:
+        """Run one aapt2 command (e.g. ["dump", "permissions", apk]) and return its stdout lines."""
+        timeout = self.timeout if timeout is None else timeout
+        for attempt in range(2):
+            daemon = self._acquire()
+            healthy = False
+            try:
+                output = daemon.run(args, timeout)
+                healthy = True
+                return output
+            except Aapt2Error:
+                healthy = True
+                raise
+            except TimeoutError:
+                self.timeouts += 1
+                raise
+            except Aapt2DaemonCrashed:
+                self.restarts += 1
+                if attempt:
+                    raise
+            finally:
+                self._release(daemon, healthy)
+
+    def dump(self, what: str, apk_path: str, timeout: float | None = None) -> list[str]:
+        return self.run(["dump", what, str(apk_path)], timeout)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            daemons, self._all, self._idle = self._all, [], []
+        for daemon in daemons:
+            daemon.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+#---------------------------------------------------------------------------------------------------------------------
+
+# Process-wide pool shared by every script in the toolkit (see get_shared_pool)
+_shared_pool: Aapt2DaemonPool | None = None
+_shared_pool_lock = threading.Lock()
+
+def get_shared_pool(workers: int | None = None, timeout: float = 60.0) -> Aapt2DaemonPool | None:
+    """
+    Return the process-wide aapt2 daemon pool, creating it on first call
+    (workers / timeout only apply then).  Returns None if aapt2 is not on
+    PATH.  The pool is closed at interpreter exit.
+    """
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            aapt2_path = shutil.which("aapt2")
+            if aapt2_path is None:
+                return None
+            _shared_pool = Aapt2DaemonPool(aapt2_path, workers=workers, timeout=timeout)
+            atexit.register(_shared_pool.close)
+        return _shared_pool
@@ -0,0 +1,262 @@
+import os
+import gzip
+import json
+import hashlib
+import argparse
+import tempfile
+
+from pathlib import Path
+
+try:
+    from androguard.misc import AnalyzeAPK
+except ImportError:
+    AnalyzeAPK = None
+
+#---------------------------------------------------------
+# CONTENT-ADDRESSED ANDROGUARD ANALYSIS CACHE
+#---------------------------------------------------------
+
+# AnalyzeAPK is by far the slowest step of the graph extractors, so its
+# result is kept on disk as a compact intermediate of plain JSON data:
+#   {"format": 2, "sha256": ..., "androguard": "4.1.2",
+#    "methods": [{"class": "Lcom/a/B;", "name": "m", "descriptor": "()V",
+#                 "external": false,
+#                 "blocks": [[start, [instruction, ...], [[offset, child start, "DEXBasicBlock:<child name>"], ...]], ...],
+#                 "calls":  [[callee method index, offset], ...]}, ...]}
+# Entries live at <root>/<sha256[:2]>/<sha256>.<androguard version>.json.gz,
+# so a new androguard version misses the cache instead of reusing its
+# predecessor's output.  The modification time of an entry is its last use,
+# and the least recently used entries are evicted past the size cap.
+CACHE_FORMAT_VERSION = 2
+CACHE_ENV = "APK_ANALYSIS_CACHE"
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "apk-static-toolkit" / "analysis"
+DEFAULT_MAX_BYTES = 2 << 30
+
+_ENTRY_SUFFIX = ".json.gz"
+
+def _require_androguard():
+    if AnalyzeAPK is None:
+        raise ImportError("Androguard is required for APK analysis.\nInstall with: pip install androguard")
+
+def androguard_version() -> str:
+    _require_androguard()
+    from importlib.metadata import version
+    return version("androguard")
+
+def apk_sha256(apk_path) -> str:
+    digest = hashlib.sha256()
+    with open(apk_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _method_key(method):
+    return (str(method.class_name), str(method.name), str(method.descriptor))
+
+def _branch_label(block):
+    """
+    The third item of a childs tuple is the child DEXBasicBlock itself; it is
+    kept as the "DEXBasicBlock:<name>" label the GraphML export gave it.
+    """
+    if block is None or isinstance(block, (str, int)):
+        return block
+    block_id = getattr(block, "name", None) or getattr(block, "idx", None)
+    return f"DEXBasicBlock:{block_id}" if block_id is not None else str(block)
+
+def _instruction_text(ins) -> str:
+    """
+    str() of an instruction.  Switch / array payloads are not Instruction
+    subclasses and str() would give their object address, so they are
+    rendered the same way from their name and output.
+    """
+    return f"{ins.get_name()} {ins.get_output()}"
+
+def extract_analysis(obj_analysis) -> list[dict]:
+    """
+    Methods, basic blocks, instructions and call xrefs of an androguard
+    Analysis object, as the plain data stored in a cache entry.
+    """
+    methods = list(obj_analysis.get_methods())
+    method_ids = {_method_key(method): i for i, method in enumerate(methods)}
+
+    records = []
+    for method in methods:
+        class_name, name, descriptor = _method_key(method)
+        blocks = []
+        bb = method.basic_blocks
+        if bb:
+            for block in bb.get():
+                children = []
+                for (off, child, btype) in block.childs:
+                    # Child may be block or integer offset
+                    target_offset = child.start if hasattr(child, "start") else child
+                    children.append([off, target_offset, _branch_label(btype)])
+                blocks.append([block.start, [_instruction_text(ins) for ins in block.get_instructions()], children])
+
+        calls = []
+        for _, callee, offset in method.get_xref_to():
+            callee_id = method_ids.get(_method_key(callee))
+            if callee_id is not None:
+                calls.append([callee_id, offset])
+        # get_xref_to() is a set ordered by object identity; sort so entries are reproducible
+        calls.sort(key=lambda call: (call[1], call[0]))
+
+        records.append({
+            "class": class_name,
+            "name": name,
+            "descriptor": descriptor,
+            "external": bool(method.is_external()),
+            "blocks": blocks,
+            "calls": calls,
+        })
+    return records
+
+class AnalysisCache:
+    """
+    On-disk cache of extract_analysis() results, keyed by the SHA-256 of
+    the APK and the installed androguard version.
+    """
+
+    def __init__(self, root=None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root or os.environ.get(CACHE_ENV) or DEFAULT_CACHE_DIR)
+        self.max_bytes = max_bytes
+
+    def path_for(self, sha256: str, version: str | None = None) -> Path:
+        version = version or androguard_version()
+        return self.root / sha256[:2] / f"{sha256}.{version}{_ENTRY_SUFFIX}"
+
+    def entries(self) -> list[tuple[Path, int, float]]:
+        """(path, size, last use) of every cache entry."""
+        found = []
+        if self.root.is_dir():
+            for path in self.root.glob(f"??/*{_ENTRY_SUFFIX}"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                found.append((path, stat.st_size, stat.st_mtime))
+        return found
+
+    def get(self, apk_path, sha256: str | None = None) -> dict | None:
+        """The cached analysis of an APK, or None on a miss (unreadable entries count as misses)."""
+        path = self.path_for(sha256 or apk_sha256(apk_path))
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                record = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, ValueError) as e:
+            print(f"Discarding unreadable cache entry {path}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+        if record.get("format") != CACHE_FORMAT_VERSION:
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass    # evicted by another process since it was read
+        return record
+
+    def put(self, apk_path, methods: list[dict], sha256: str | None = None) -> dict:
+        """Store the analysis of an APK, then evict down to the size cap."""
+        sha256 = sha256 or apk_sha256(apk_path)
+        version = androguard_version()
+        record = {"format": CACHE_FORMAT_VERSION, "sha256": sha256, "androguard": version, "methods": methods}
+        path = self.path_for(sha256, version)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Written beside the entry and renamed over it, so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw, gzip.open(raw, "wt", encoding="utf-8", compresslevel=6) as f:
+                json.dump(record, f, separators=(",", ":"))
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self.evict(keep=path)
+        return record
+
+    def load_or_analyze(self, apk_path) -> dict:
+        """The cached analysis of an APK, running AnalyzeAPK and caching its result on a miss."""
+        _require_androguard()
+        sha256 = apk_sha256(apk_path)
+        record = self.get(apk_path, sha256)
+        if record is None:
+            _, _, obj_analysis = AnalyzeAPK(str(apk_path))
+            record = self.put(apk_path, extract_analysis(obj_analysis), sha256)
+        return record
+
+    def evict(self, max_bytes: int | None = None, keep: Path | None = None) -> int:
+        """Delete least recently used entries until the cache fits max_bytes; returns the bytes freed."""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        entries = sorted(self.entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        freed = 0
+        for path, size, _ in entries:
+            if total - freed <= max_bytes:
+                break
+            if path == keep:
+                continue
+            path.unlink(missing_ok=True)
+            freed += size
+        return freed
+
+    def invalidate(self, apk_or_sha256=None) -> int:
+        """
+        Delete the entries of one APK (given by path or SHA-256), for every
+        androguard version, or with no argument the whole cache; returns the
+        number of entries deleted.
+        """
+        if apk_or_sha256 is None:
+            entries = [path for path, _, _ in self.entries()]
+        else:
+            sha256 = str(apk_or_sha256).lower()
+            if os.path.isfile(apk_or_sha256):
+                sha256 = apk_sha256(apk_or_sha256)
+            entries = list((self.root / sha256[:2]).glob(f"{sha256}.*{_ENTRY_SUFFIX}"))
+        for path in entries:
+            path.unlink(missing_ok=True)
+        return len(entries)
+
+def cached_analysis(apk_path, cache: AnalysisCache | None = None) -> dict:
+    """load_or_analyze() on the default cache (or the one given)."""
+    return (cache or AnalysisCache()).load_or_analyze(apk_path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the on-disk cache of androguard APK analyses.",
+                                     epilog="Example: python3 analysis_cache.py invalidate app.apk")
+    parser.add_argument("--cache-dir", default=None,
+                        help=f"Cache directory (default: ${CACHE_ENV} or {DEFAULT_CACHE_DIR})")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("stats", help="Print the number and total size of the cache entries")
+    warm = commands.add_parser("warm", help="Analyze APKs into the cache")
+    warm.add_argument("apks", nargs="+", help="APK files")
+    invalidate = commands.add_parser("invalidate", help="Delete the entries of APKs (by path or SHA-256)")
+    invalidate.add_argument("apks", nargs="*", help="APK files or SHA-256 digests")
+    invalidate.add_argument("--all", action="store_true", help="Delete every entry")
+    evict = commands.add_parser("evict", help="Delete least recently used entries down to a size")
+    evict.add_argument("--max-size", type=float, required=True, help="Size to keep, in MiB")
+    args = parser.parse_args()
+
+    cache = AnalysisCache(args.cache_dir)
+    if args.command == "stats":
+        entries = cache.entries()
+        print(f"{len(entries)} entries, {sum(size for _, size, _ in entries) / 2**20:.1f} MiB in {cache.root}")
+    elif args.command == "warm":
+        for apk in args.apks:
+            try:
+                record = cache.load_or_analyze(apk)
+                print(f"{apk}: {len(record['methods'])} methods cached as {record['sha256']}")
+            except Exception as e:
+                print(f"Error analyzing {apk}: {e}")
+    elif args.command == "invalidate":
+        if not args.apks and not args.all:
+            parser.error("invalidate needs APKs / SHA-256 digests or --all")
+        deleted = cache.invalidate() if args.all else sum(cache.invalidate(apk) for apk in args.apks)
+        print(f"Deleted {deleted} cache entries")
+    else:
+        freed = cache.evict(int(args.max_size * 2**20))
+        print(f"Freed {freed / 2**20:.1f} MiB")
+
+if __name__ == "__main__":
+    main()
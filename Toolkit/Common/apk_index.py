@@ -0,0 +1,310 @@
+import os
+import mmap
+import zlib
+import struct
+import zipfile
+
+from array import array
+from pathlib import Path
+
+#---------------------------------------------------------
+# ZIP RECORDS
+#---------------------------------------------------------
+
+_EOCD_SIG          = b"PK\x05\x06"
+_EOCD_STRUCT       = struct.Struct("<4s4H2LH")        # 22 bytes, then the comment
+_EOCD_MAX_COMMENT  = 0xFFFF
+
+_ZIP64_LOCATOR_SIG    = b"PK\x06\x07"
+_ZIP64_LOCATOR_STRUCT = struct.Struct("<4sLQL")     # 20 bytes, right before the EOCD
+_ZIP64_EOCD_SIG       = b"PK\x06\x06"
+_ZIP64_EOCD_STRUCT    = struct.Struct("<4sQ2H2L4Q")  # 56 bytes
+
+_CDIR_SIG    = b"PK\x01\x02"
+_CDIR_STRUCT = struct.Struct("<4s6H3L5H2L")         # 46 bytes, then name / extra / comment
+
+_LOCAL_SIG    = b"PK\x03\x04"
+_LOCAL_STRUCT = struct.Struct("<4s5H3L2H")          # 30 bytes, then name / extra / data
+
+_ZIP64_EXTRA_ID = 0x0001
+_UTF8_FLAG      = 0x800
+
+_U32_MAX = 0xFFFFFFFF
+
+#---------------------------------------------------------
+# CENTRAL-DIRECTORY INDEX
+#---------------------------------------------------------
+
+class ApkIndex:
+    """
+    File listing of an APK (ZIP) built from its central directory only.
+
+    The file is memory-mapped and only the End-of-Central-Directory record
+    (ZIP64 included) and the central directory are parsed; no local header
+    or file data is read.  Entry i is described by names[i] and the compact
+    arrays crcs / compressed_sizes / file_sizes / header_offsets / methods.
+    Raises zipfile.BadZipFile if the file is not a ZIP archive.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.names: list[str] = []
+        self.crcs = array("L")
+        self.compressed_sizes = array("Q")
+        self.file_sizes = array("Q")
+        self.header_offsets = array("Q")
+        self.methods = array("H")
+        self._positions: dict[str, int] | None = None
+        self._map = None
+
+        with open(self.path, "rb") as fh:
+            if os.fstat(fh.fileno()).st_size < _EOCD_STRUCT.size:
+                raise zipfile.BadZipFile(f"File is not a zip file: {self.path}")
+            self._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._parse()
+        except (struct.error, IndexError, ValueError) as e:
+            self.close()
+            raise zipfile.BadZipFile(f"Corrupt central directory in {self.path}: {e}") from None
+        except zipfile.BadZipFile:
+            self.close()
+            raise
+
+    def _find_eocd(self) -> int:
+        m = self._map
+        size = len(m)
+        pos = m.rfind(_EOCD_SIG, max(0, size - _EOCD_STRUCT.size - _EOCD_MAX_COMMENT))
+        while pos >= 0:
+            # The record must end exactly at its comment; a signature inside
+            # the comment (or file data) fails this check.
+            comment_len = struct.unpack_from("<H", m, pos + 20)[0] if pos + 22 <= size else -1
+            if pos + _EOCD_STRUCT.size + comment_len == size:
+                return pos
+            pos = m.rfind(_EOCD_SIG, max(0, size - _EOCD_STRUCT.size - _EOCD_MAX_COMMENT), pos)
+        raise zipfile.BadZipFile(f"File is not a zip file: {self.path}")
+
+    def _parse(self) -> None:
+        m = self._map
+        eocd = self._find_eocd()
+        _, disk, cd_disk, _, count, cd_size, cd_offset, _ = _EOCD_STRUCT.unpack_from(m, eocd)
+        if disk or cd_disk:
+            raise zipfile.BadZipFile(f"Multi-disk archives are not supported: {self.path}")
+
+        locator = eocd - _ZIP64_LOCATOR_STRUCT.size
+        if locator >= 0 and m[locator:locator + 4] == _ZIP64_LOCATOR_SIG:
+            _, _, zip64_eocd, _ = _ZIP64_LOCATOR_STRUCT.unpack_from(m, locator)
+            if m[zip64_eocd:zip64_eocd + 4] != _ZIP64_EOCD_SIG:
+                raise zipfile.BadZipFile(f"Corrupt ZIP64 end of central directory in {self.path}")
+            (_, _, _, _, _, _, _, count, cd_size, cd_offset) = _ZIP64_EOCD_STRUCT.unpack_from(m, zip64_eocd)
+
+        if cd_offset + cd_size > eocd:
+            raise zipfile.BadZipFile(f"Central directory out of bounds in {self.path}")
+
+        names = self.names
+        crcs = self.crcs
+        compressed_sizes = self.compressed_sizes
+        file_sizes = self.file_sizes
+        header_offsets = self.header_offsets
+        methods = self.methods
+        unpack = _CDIR_STRUCT.unpack_from
+        fixed = _CDIR_STRUCT.size
+
+        pos = cd_offset
+        end = cd_offset + cd_size
+        for _ in range(count):
+            (sig, _, _, flags, method, _, _, crc, csize, usize,
+             name_len, extra_len, comment_len, _, _, _, offset) = unpack(m, pos)
+            if sig != _CDIR_SIG:
+                raise zipfile.BadZipFile(f"Bad central directory header at {pos} in {self.path}")
+
+            name_start = pos + fixed
+            raw_name = m[name_start:name_start + name_len]
+            names.append(raw_name.decode("utf-8" if flags & _UTF8_FLAG else "cp437"))
+
+            if usize == _U32_MAX or csize == _U32_MAX or offset == _U32_MAX:
+                usize, csize, offset = self._zip64_extra(name_start + name_len, extra_len,
+                                                         usize, csize, offset)
+
+            crcs.append(crc)
+            compressed_sizes.append(csize)
+            file_sizes.append(usize)
+            header_offsets.append(offset)
+            methods.append(method)
+            pos = name_start + name_len + extra_len + comment_len
+
+        if pos > end:
+            raise zipfile.BadZipFile(f"Central directory overruns its size in {self.path}")
+
+    def _zip64_extra(self, start: int, length: int, usize: int, csize: int, offset: int) -> tuple[int, int, int]:
+        """Replace the saturated 32-bit fields with those of the ZIP64 extra field."""
+        m = self._map
+        pos = start
+        end = start + length
+        while pos + 4 <= end:
+            tag, size = struct.unpack_from("<HH", m, pos)
+            pos += 4
+            if tag == _ZIP64_EXTRA_ID:
+                # Only the saturated fields are present, in this order
+                field = pos
+                if usize == _U32_MAX:
+                    usize = struct.unpack_from("<Q", m, field)[0]
+                    field += 8
+                if csize == _U32_MAX:
+                    csize = struct.unpack_from("<Q", m, field)[0]
+                    field += 8
+                if offset == _U32_MAX:
+                    offset = struct.unpack_from("<Q", m, field)[0]
+                break
+            pos += size
+        return usize, csize, offset
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return self.index_of(name) is not None
+
+    def namelist(self) -> list[str]:
+        return list(self.names)
+
+    def index_of(self, name: str) -> int | None:
+        """Position of an entry by name (last one wins, as in zipfile)."""
+        if self._positions is None:
+            self._positions = {n: i for i, n in enumerate(self.names)}
+        return self._positions.get(name)
+
+    def data_offset(self, i: int) -> int:
+        """File offset of the data of entry i (reads its 30-byte local header)."""
+        m = self._map
+        header = self.header_offsets[i]
+        sig, *_, name_len, extra_len = _LOCAL_STRUCT.unpack_from(m, header)
+        if sig != _LOCAL_SIG:
+            raise zipfile.BadZipFile(f"Bad local file header for {self.names[i]} in {self.path}")
+        return header + _LOCAL_STRUCT.size + name_len + extra_len
+
+    def open_range_reader(self, i: int, chunk_size: int = 1 << 16) -> "EntryRangeReader":
+        return EntryRangeReader(self, i, chunk_size)
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+#---------------------------------------------------------
+# RANGE READS
+#---------------------------------------------------------
+
+class EntryRangeReader:
+    """
+    Random-access reads of the uncompressed bytes of one entry.
+
+    STORED entries are sliced straight out of the mapping.  DEFLATED entries
+    are inflated forward only as far as the furthest byte requested, and
+    everything outside the requested ranges is dropped as it goes by, except
+    ranges registered beforehand with retain().  A read behind the inflate
+    position that was not retained restarts inflation from the start of the
+    entry.  compressed_read / inflated count the work actually done.
+    """
+
+    def __init__(self, index: ApkIndex, i: int, chunk_size: int = 1 << 16):
+        self.name = index.names[i]
+        self.size = index.file_sizes[i]
+        self.method = index.methods[i]
+        if self.method not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            raise NotImplementedError(f"Compression method {self.method} is not supported ({self.name})")
+
+        self.compressed_read = 0
+        self.inflated = 0
+        self.restarts = 0
+        self._map = index._map
+        self._start = index.data_offset(i)
+        self._csize = index.compressed_sizes[i]
+        self._chunk_size = chunk_size
+        self._retained: list[list] = []     # [start, stop, bytes kept so far]
+        self._reset()
+
+    def _reset(self) -> None:
+        self._inflater = zlib.decompressobj(-zlib.MAX_WBITS)
+        self._src_pos = 0
+        self._pos = 0
+        for _, _, buf in self._retained:
+            del buf[:]
+
+    def retain(self, start: int, end: int) -> None:
+        """
+        Keep [start, end) when it is inflated past, for later reads behind the
+        inflate position.  A range that starts inside one already retained
+        and filled up to the inflate position extends it.
+        """
+        end = min(end, self.size)
+        if self.method != zipfile.ZIP_DEFLATED or start >= end:
+            return
+        for kept in self._retained:
+            if kept[0] <= start and kept[0] + len(kept[2]) == self._pos:
+                kept[1] = max(kept[1], end)
+                return
+        self._retained.append([start, end, bytearray()])
+
+    def read(self, offset: int, size: int) -> bytes:
+        """Up to size bytes at offset (fewer at the end of the entry)."""
+        end = min(offset + size, self.size)
+        if offset >= end:
+            return b""
+
+        if self.method == zipfile.ZIP_STORED:
+            self.compressed_read += end - offset
+            return self._map[self._start + offset:self._start + end]
+
+        for start, stop, buf in self._retained:
+            if start <= offset and end <= start + len(buf):
+                return bytes(buf[offset - start:end - start])
+
+        if offset < self._pos:
+            self.restarts += 1
+            self._reset()
+        wanted = bytearray()
+        self._inflate_to(end, offset, wanted)
+        return bytes(wanted)
+
+    def _inflate_to(self, target: int, offset: int, wanted: bytearray) -> None:
+        """Inflate up to target, copying [offset, target) into wanted and filling retained ranges."""
+        inflater = self._inflater
+        while self._pos < target and not inflater.eof:
+            src = inflater.unconsumed_tail
+            if not src:
+                take = min(self._chunk_size, self._csize - self._src_pos)
+                if take <= 0:
+                    break
+                begin = self._start + self._src_pos
+                src = self._map[begin:begin + take]
+                self._src_pos += take
+                self.compressed_read += take
+
+            # Never inflate past target, so a later forward read loses nothing
+            out = inflater.decompress(src, min(target - self._pos, self._chunk_size))
+            if not out:
+                continue
+            lo = self._pos
+            hi = lo + len(out)
+            self.inflated += len(out)
+
+            if hi > offset:
+                wanted += out[max(offset - lo, 0):]
+            for start, stop, buf in self._retained:
+                filled = start + len(buf)
+                if lo <= filled < hi and filled < stop:
+                    buf += out[filled - lo:min(hi, stop) - lo]
+            self._pos = hi
+
+#---------------------------------------------------------------------------------------------------------------------
+
+def native_library_names(index: ApkIndex) -> list[str]:
+    """Base names of the lib/**.so entries, in central-directory order."""
+    return [os.path.basename(name) for name in index.names
+            if name.startswith("lib/") and name.endswith(".so")]
@@ -0,0 +1,169 @@
+import os
+import sys
+import json
+import argparse
+
+from pathlib import Path
+from functools import cached_property
+
+from apk_index import ApkIndex, native_library_names
+from axml_reader import iter_index_manifest_elements, manifest_permissions, uses_sdk_levels
+
+RESOURCES_NAME = "resources.arsc"
+
+#---------------------------------------------------------
+# SHARED PARSED-APK SESSION
+#---------------------------------------------------------
+
+class ApkSession:
+    """
+    One APK opened once for any number of extractors.
+
+    The ZIP central directory, the decoded manifest elements and the raw
+    resource table are each built on first access and then reused.
+    Extractors that derive something other extractors also need can share
+    it through memoize(key, compute), as the permission extractors do.
+    """
+
+    def __init__(self, apk_path):
+        self.path = Path(apk_path)
+        self._memo: dict = {}
+
+    @cached_property
+    def index(self) -> ApkIndex:
+        """Central-directory listing (raises zipfile.BadZipFile for non-ZIP files)."""
+        return ApkIndex(self.path)
+
+    @property
+    def file_names(self) -> list[str]:
+        return self.index.names
+
+    @cached_property
+    def manifest_elements(self) -> list[tuple[int, str, dict]]:
+        """(depth, name, attributes) of every manifest element, decoded in one pass."""
+        return list(iter_index_manifest_elements(self.index))
+
+    @cached_property
+    def resources(self) -> bytes | None:
+        """Uncompressed resources.arsc, or None if the APK has none."""
+        return self.read_entry(RESOURCES_NAME)
+
+    def read_entry(self, name: str) -> bytes | None:
+        """Uncompressed bytes of an entry, or None if the APK has no such entry."""
+        i = self.index.index_of(name)
+        if i is None:
+            return None
+        reader = self.index.open_range_reader(i)
+        return reader.read(0, reader.size)
+
+    def memoize(self, key, compute):
+        """compute(self) the first time key is asked for, the stored value afterwards."""
+        if key not in self._memo:
+            self._memo[key] = compute(self)
+        return self._memo[key]
+
+    def close(self) -> None:
+        """Close the APK and drop everything parsed from it; a later access reopens it."""
+        index = self.__dict__.pop("index", None)
+        if index is not None:
+            index.close()
+        for name in ("manifest_elements", "resources"):
+            self.__dict__.pop(name, None)
+        self._memo.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+#---------------------------------------------------------
+# EXTRACTORS
+#---------------------------------------------------------
+
+# name -> function(session) returning the extractor's result
+EXTRACTORS = {}
+
+def register_extractor(name: str, func=None):
+    """Register func(session) under name; usable as a decorator."""
+    if func is None:
+        return lambda f: register_extractor(name, f)
+    EXTRACTORS[name] = func
+    return func
+
+def _permission_lists(session: ApkSession) -> dict:
+    return session.memoize("manifest_permissions", lambda s: manifest_permissions(s.manifest_elements))
+
+@register_extractor("permissions")
+def extract_permissions(session: ApkSession) -> list[str]:
+    return _permission_lists(session)["permissions"]
+
+@register_extractor("permissions_sdk23")
+def extract_permissions_sdk23(session: ApkSession) -> list[str]:
+    return _permission_lists(session)["permissions_sdk23"]
+
+@register_extractor("declared_permissions")
+def extract_declared_permissions(session: ApkSession) -> list[dict]:
+    return _permission_lists(session)["declared_permissions"]
+
+@register_extractor("native_libraries")
+def extract_native_libraries(session: ApkSession) -> list[str]:
+    return native_library_names(session.index)
+
+@register_extractor("abis")
+def extract_abis(session: ApkSession) -> list[str]:
+    """ABI directories under lib/ that hold at least one .so"""
+    return sorted({name.split("/")[1] for name in session.file_names
+                   if name.startswith("lib/") and name.endswith(".so") and name.count("/") >= 2})
+
+@register_extractor("sdk_levels")
+def extract_sdk_levels(session: ApkSession) -> dict:
+    return uses_sdk_levels(session.manifest_elements)
+
+@register_extractor("package")
+def extract_package(session: ApkSession) -> str | None:
+    for depth, name, attributes in session.manifest_elements:
+        if depth == 1 and name == "manifest":
+            return attributes.get("package")
+    return None
+
+def analyze(apk, extractors=None) -> dict:
+    """
+    Run the named extractors (default: all registered) against one
+    ApkSession and return {name: result}.  apk is a path or an open
+    ApkSession, which is then left open.  An extractor that fails is
+    reported and its result is None; the others still run.
+    """
+    names = list(EXTRACTORS) if extractors is None else list(extractors)
+    unknown = [name for name in names if name not in EXTRACTORS]
+    if unknown:
+        raise ValueError(f"Unknown extractors: {unknown} (expected some of {list(EXTRACTORS)})")
+
+    session = apk if isinstance(apk, ApkSession) else ApkSession(apk)
+    results = {}
+    try:
+        for name in names:
+            try:
+                results[name] = EXTRACTORS[name](session)
+            except Exception as e:
+                print(f"Error running {name} on {session.path}: {e}")
+                results[name] = None
+    finally:
+        if session is not apk:
+            session.close()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Run several extractors over one parse of an APK and print the results as JSON.")
+    parser.add_argument("apk", help="Path to an APK file")
+    parser.add_argument("-e", "--extractor", action="append", choices=list(EXTRACTORS),
+                        help="Extractor to run (repeatable; default: all)")
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.apk):
+        print(f"Error: {args.apk} does not exist!")
+        sys.exit(1)
+    print(json.dumps(analyze(args.apk, args.extractor), indent=4))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+import sys
+import struct
+
+from array import array
+from pathlib import Path
+
+from apk_index import ApkIndex
+
+#---------------------------------------------------------
+# BINARY AXML CONSTANTS
+#---------------------------------------------------------
+
+MANIFEST_NAME = "AndroidManifest.xml"
+
+_RES_XML_TYPE               = 0x0003
+_RES_STRING_POOL_TYPE       = 0x0001
+_RES_XML_RESOURCE_MAP_TYPE  = 0x0180
+_RES_XML_START_ELEMENT_TYPE = 0x0102
+_RES_XML_END_ELEMENT_TYPE   = 0x0103
+
+# Compressed bytes read / inflated per step; manifests are small, so
+# a small step keeps the memory of one read low
+_MANIFEST_CHUNK_SIZE = 1 << 13
+
+_UTF8_FLAG = 0x100
+_NO_INDEX = 0xFFFFFFFF
+
+_CHUNK_HEADER = struct.Struct("<HHI")           # type, header size, chunk size
+_STRING_POOL_HEADER = struct.Struct("<5I")      # string / style count, flags, strings / styles start
+_ELEMENT_EXT = struct.Struct("<2I6H")           # ns, name, attribute start / size / count, id / class / style index
+_ATTRIBUTE = struct.Struct("<3IHBBI")           # ns, name, raw value, value size, res0, data type, data
+
+# Res_value data types
+_TYPE_REFERENCE   = 0x01
+_TYPE_STRING      = 0x03
+_TYPE_INT_DEC     = 0x10
+_TYPE_INT_HEX     = 0x11
+_TYPE_INT_BOOLEAN = 0x12
+
+# android: attribute resource IDs (attribute names may be stripped by obfuscators)
+ATTR_NAME                 = 0x01010003
+ATTR_PROTECTION_LEVEL     = 0x01010009
+ATTR_MIN_SDK_VERSION      = 0x0101020C
+ATTR_TARGET_SDK_VERSION   = 0x01010270
+ATTR_MAX_SDK_VERSION      = 0x01010271
+
+_ATTRIBUTE_IDS = {
+    "name": ATTR_NAME,
+    "protectionLevel": ATTR_PROTECTION_LEVEL,
+    "minSdkVersion": ATTR_MIN_SDK_VERSION,
+    "targetSdkVersion": ATTR_TARGET_SDK_VERSION,
+    "maxSdkVersion": ATTR_MAX_SDK_VERSION,
+}
+
+#---------------------------------------------------------
+# CHUNK STREAM
+#---------------------------------------------------------
+
+class _StringPool:
+    """
+    Strings of an AXML string pool, decoded on first use.  body is the
+    chunk without its 8-byte chunk header (kept as read, not copied).
+    """
+
+    def __init__(self, body: bytes, header_size: int):
+        count, _, flags, strings_start, _ = _STRING_POOL_HEADER.unpack_from(body, 0)
+        header_size -= 8
+        count = min(count, max(len(body) - header_size, 0) // 4)
+        # 4 bytes per string instead of a tuple of ints
+        self._offsets = array("I", body[header_size:header_size + 4 * count])
+        if sys.byteorder == "big":
+            self._offsets.byteswap()
+        self._chunk = body
+        self._base = strings_start - 8
+        self._utf8 = bool(flags & _UTF8_FLAG)
+        self._cache: dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def get(self, i: int) -> str | None:
+        if i >= len(self._offsets):
+            return None
+        value = self._cache.get(i)
+        if value is None:
+            try:
+                value = self._decode(self._base + self._offsets[i])
+            except (IndexError, struct.error):
+                value = ""
+            self._cache[i] = value
+        return value
+
+    def _decode(self, pos: int) -> str:
+        chunk = self._chunk
+        if self._utf8:
+            # UTF-16 length (skipped), then UTF-8 byte length; each 1 or 2 bytes
+            pos += 2 if chunk[pos] & 0x80 else 1
+            length = chunk[pos]
+            if length & 0x80:
+                length = (length & 0x7F) << 8 | chunk[pos + 1]
+                pos += 1
+            pos += 1
+            return chunk[pos:pos + length].decode("utf-8", errors="replace")
+
+        length = struct.unpack_from("<H", chunk, pos)[0]
+        pos += 2
+        if length & 0x8000:
+            length = (length & 0x7FFF) << 16 | struct.unpack_from("<H", chunk, pos)[0]
+            pos += 2
+        return chunk[pos:pos + 2 * length].decode("utf-16-le", errors="replace")
+
+def _attribute_value(strings: _StringPool, raw: int, data_type: int, data: int):
+    # The typed value wins over the raw string, as on the device
+    if data_type == _TYPE_STRING:
+        return strings.get(data) or ""
+    if data_type in (_TYPE_INT_DEC, _TYPE_INT_HEX):
+        return data - (1 << 32) if data & 0x80000000 else data
+    if data_type == _TYPE_INT_BOOLEAN:
+        return data != 0
+    if data_type == _TYPE_REFERENCE:
+        return f"@{data:08x}"
+    if raw != _NO_INDEX and strings.get(raw) is not None:
+        return strings.get(raw)
+    return data
+
+def iter_axml_elements(read, size: int):
+    """
+    Walk a binary AXML document chunk by chunk, reading it strictly front to
+    back through read(offset, size) (bytes slicing or an EntryRangeReader),
+    and yield (depth, element_name, attributes) for every start tag.
+    attributes maps attribute names to decoded values; android: attributes
+    known by resource ID are keyed by their usual name even if the name
+    string was stripped.  Stop iterating to stop reading.
+    Raises ValueError if the data is not binary AXML.
+    """
+    kind, header_size, _ = _CHUNK_HEADER.unpack(read(0, 8).ljust(8, b"\x00"))
+    if kind != _RES_XML_TYPE:
+        raise ValueError(f"Not a binary AXML document (chunk type 0x{kind:04x})")
+
+    strings = None
+    resource_ids = ()
+    names_by_id = {resource_id: name for name, resource_id in _ATTRIBUTE_IDS.items()}
+    depth = 0
+    pos = max(header_size, 8)
+    while pos + 8 <= size:
+        header = read(pos, 8)
+        if len(header) < 8:
+            break
+        kind, header_size, chunk_size = _CHUNK_HEADER.unpack(header)
+        if chunk_size < 8:
+            break
+        # Chunk bodies follow their header, so the stream is only ever read forward
+        if kind == _RES_STRING_POOL_TYPE and strings is None:
+            body = read(pos + 8, chunk_size - 8)
+            if len(body) < chunk_size - 8 or len(body) < _STRING_POOL_HEADER.size:
+                break       # truncated document
+            strings = _StringPool(body, header_size)
+            pos += chunk_size
+            continue
+        if kind in (_RES_XML_RESOURCE_MAP_TYPE, _RES_XML_START_ELEMENT_TYPE):
+            chunk = header + read(pos + 8, chunk_size - 8)
+            if len(chunk) < chunk_size:
+                break       # truncated document
+        pos += chunk_size
+
+        if kind == _RES_XML_RESOURCE_MAP_TYPE:
+            resource_ids = struct.unpack_from(f"<{max(chunk_size - header_size, 0) // 4}I", chunk, header_size)
+        elif kind == _RES_XML_START_ELEMENT_TYPE and strings is not None:
+            depth += 1
+            _, name, attr_start, attr_size, attr_count, _, _, _ = _ELEMENT_EXT.unpack_from(chunk, header_size)
+            attributes = {}
+            at = header_size + attr_start
+            for _ in range(attr_count):
+                if at + _ATTRIBUTE.size > len(chunk):
+                    break
+                _, attr_name, raw, _, _, data_type, data = _ATTRIBUTE.unpack_from(chunk, at)
+                at += attr_size or _ATTRIBUTE.size
+                key = names_by_id.get(resource_ids[attr_name]) if attr_name < len(resource_ids) else None
+                if key is None:
+                    key = strings.get(attr_name) or f"0x{attr_name:x}"
+                attributes[key] = _attribute_value(strings, raw, data_type, data)
+            yield depth, strings.get(name) or "", attributes
+        elif kind == _RES_XML_END_ELEMENT_TYPE:
+            depth -= 1
+
+def iter_index_manifest_elements(index: ApkIndex, stats: dict | None = None):
+    """
+    iter_axml_elements over the AndroidManifest.xml of an open ApkIndex,
+    inflating it through a range reader only as far as the caller
+    iterates.  If stats is given, it receives the compressed / inflated
+    byte counts and the manifest's full size when iteration ends.
+    """
+    i = index.index_of(MANIFEST_NAME)
+    if i is None:
+        raise FileNotFoundError(f"{MANIFEST_NAME} not found in {index.path}")
+    reader = index.open_range_reader(i, _MANIFEST_CHUNK_SIZE)
+    try:
+        yield from iter_axml_elements(reader.read, reader.size)
+    finally:
+        if stats is not None:
+            stats.update(compressed_read=reader.compressed_read, inflated=reader.inflated,
+                         compressed_size=index.compressed_sizes[i], file_size=index.file_sizes[i])
+
+def iter_manifest_elements(apk_path, stats: dict | None = None):
+    """iter_index_manifest_elements over the APK at apk_path."""
+    with ApkIndex(apk_path) as index:
+        yield from iter_index_manifest_elements(index, stats)
+
+#---------------------------------------------------------
+# USES-SDK
+#---------------------------------------------------------
+
+def _sdk_level(value):
+    """API level as an int; preview codenames and unresolved references are kept as strings."""
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    return value
+
+def uses_sdk_levels(elements) -> dict:
+    """
+    min / target / max SDK of the first <uses-sdk> among (depth, name,
+    attributes) elements; iteration stops there.  Attributes (or the whole
+    element) that are absent are None.
+    """
+    levels = {"min_sdk": None, "target_sdk": None, "max_sdk": None}
+    for depth, name, attributes in elements:
+        if name == "uses-sdk" and depth == 2:
+            levels["min_sdk"] = _sdk_level(attributes.get("minSdkVersion"))
+            levels["target_sdk"] = _sdk_level(attributes.get("targetSdkVersion"))
+            levels["max_sdk"] = _sdk_level(attributes.get("maxSdkVersion"))
+            break
+    return levels
+
+def read_uses_sdk(apk_path: Path, stats: dict | None = None) -> dict:
+    """uses_sdk_levels of an APK, read without inflating the rest of the manifest."""
+    elements = iter_manifest_elements(apk_path, stats)
+    try:
+        return uses_sdk_levels(elements)
+    finally:
+        elements.close()
+
+#---------------------------------------------------------
+# PERMISSIONS
+#---------------------------------------------------------
+
+# Elements whose android:name is a requested permission; the sdk-23 forms
+# (only requested on API 23+) are kept apart from plain <uses-permission>
+USES_PERMISSION_TAG = "uses-permission"
+USES_PERMISSION_SDK23_TAGS = ("uses-permission-sdk-23", "uses-permission-sdk-m")
+
+_PROTECTION_LEVELS = {0: "normal", 1: "dangerous", 2: "signature", 3: "signatureOrSystem", 4: "internal"}
+_PROTECTION_FLAGS = {
+    0x10: "privileged", 0x20: "development", 0x40: "appop", 0x80: "pre23",
+    0x100: "installer", 0x200: "verifier", 0x400: "preinstalled", 0x800: "setup",
+    0x1000: "instant", 0x2000: "runtime", 0x4000: "oem", 0x8000: "vendorPrivileged",
+    0x10000: "textClassifier", 0x20000: "configurator", 0x40000: "incidentReportApprover",
+    0x80000: "appPredictor", 0x100000: "module", 0x200000: "companion", 0x400000: "retailDemo",
+    0x800000: "recents", 0x1000000: "role", 0x2000000: "knownSigner",
+}
+
+def protection_level_name(value) -> str | None:
+    """'signature|privileged' style name of an android:protectionLevel value."""
+    if not isinstance(value, int) or isinstance(value, bool):
+        return value
+    names = [_PROTECTION_LEVELS.get(value & 0xF, f"0x{value & 0xF:x}")]
+    names += [name for flag, name in _PROTECTION_FLAGS.items() if value & flag]
+    return "|".join(names)
+
+def manifest_permissions(elements) -> dict:
+    """
+    Permissions from one pass over (depth, name, attributes) manifest
+    elements: "permissions" lists the <uses-permission> names at any depth
+    (in first-occurrence order, without duplicates; androguard's
+    get_permissions() also reads only that tag, but as an unordered set),
+    "permissions_sdk23" the <uses-permission-sdk-23> / <uses-permission-sdk-m>
+    names, and "declared_permissions" the <permission> elements with their
+    protection level.
+    """
+    permissions: list[str] = []
+    permissions_sdk23: list[str] = []
+    seen: set[str] = set()
+    seen_sdk23: set[str] = set()
+    declared: list[dict] = []
+    for _, name, attributes in elements:
+        if name == USES_PERMISSION_TAG or name in USES_PERMISSION_SDK23_TAGS:
+            permission = attributes.get("name")
+            if not isinstance(permission, str) or not permission:
+                continue
+            if name == USES_PERMISSION_TAG and permission not in seen:
+                seen.add(permission)
+                permissions.append(permission)
+            elif name != USES_PERMISSION_TAG and permission not in seen_sdk23:
+                seen_sdk23.add(permission)
+                permissions_sdk23.append(permission)
+        elif name == "permission":
+            permission = attributes.get("name")
+            if isinstance(permission, str) and permission:
+                declared.append({"name": permission,
+                                 "protection_level": protection_level_name(attributes.get("protectionLevel", 0))})
+    return {"permissions": permissions, "permissions_sdk23": permissions_sdk23, "declared_permissions": declared}
+
+def read_manifest_permissions(apk_path: Path) -> dict:
+    """manifest_permissions of an APK, from one forward pass over the binary manifest."""
+    return manifest_permissions(iter_manifest_elements(apk_path))
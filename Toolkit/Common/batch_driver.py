@@ -0,0 +1,142 @@
+import os
+import sys
+import time
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+#---------------------------------------------------------
+# APK DISCOVERY
+#---------------------------------------------------------
+
+def iter_apk_files(root, recursive: bool = True, extensions=(".apk",), exclude=()):
+    """
+    Yield the paths of APK files under root, walking it with os.scandir as
+    it goes (nothing is listed up front, so a corpus of any size starts
+    immediately).  Directories in exclude (e.g. the output directory) and
+    symlinked directories are not entered.
+    """
+    extensions = tuple(ext.lower() for ext in extensions)
+    excluded = {os.path.realpath(path) for path in exclude}
+    pending = [os.fspath(root)]
+    while pending:
+        directory = pending.pop()
+        try:
+            with os.scandir(directory) as entries:
+                subdirs = []
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if recursive and os.path.realpath(entry.path) not in excluded:
+                                subdirs.append(entry.path)
+                        elif entry.name.lower().endswith(extensions) and entry.is_file():
+                            yield entry.path
+                    except OSError:
+                        continue
+        except OSError as e:
+            print(f"Error reading directory {directory}: {e}")
+            continue
+        # Depth-first, in scandir order
+        pending.extend(reversed(subdirs))
+
+def output_base_for(apk_path, root, output_dir) -> str:
+    """
+    Output path (without suffix) for an APK found under root: its path
+    relative to root, mirrored under output_dir.
+    """
+    relative = os.path.relpath(apk_path, root)
+    return os.path.join(output_dir, os.path.splitext(relative)[0])
+
+#---------------------------------------------------------
+# BATCH EXECUTION
+#---------------------------------------------------------
+
+class BatchProgress:
+    """Periodic 'N APKs done, M failed, X APK/s' line on stderr."""
+
+    def __init__(self, interval: float = 5.0, stream=None):
+        self.interval = interval
+        self.stream = stream or sys.stderr
+        self.done = 0
+        self.failed = 0
+        self.start = time.monotonic()
+        self._last = self.start
+
+    def update(self, failed: bool = False) -> None:
+        self.done += 1
+        self.failed += failed
+        now = time.monotonic()
+        if now - self._last >= self.interval:
+            self._last = now
+            self._print(now)
+
+    def _print(self, now: float, final: str = "") -> None:
+        elapsed = max(now - self.start, 1e-9)
+        print(f"[batch]{final} {self.done} APKs done, {self.failed} failed, "
+              f"{self.done / elapsed:.1f} APK/s, {elapsed:.0f}s elapsed", file=self.stream, flush=True)
+
+    def finish(self) -> None:
+        self._print(time.monotonic(), " finished:")
+
+def run_batch(worker, apk_paths, workers: int | None = None, threads: bool = False,
+              max_pending: int | None = None, progress: BatchProgress | None = None):
+    """
+    Run worker(apk_path) for every path of the (possibly lazy) apk_paths
+    iterable on a pool of `workers` processes (threads if threads=True,
+    for workers that wait on an external tool) and yield
+    (apk_path, result, error) as each APK finishes, in completion order.
+    error is the exception raised by worker, or None.
+
+    worker must be picklable for process pools (a module-level function or
+    a functools.partial of one).  At most max_pending APKs (default
+    4 * workers) are queued at once, so paths are consumed as the pool
+    drains.  workers=1 runs everything in this process.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 4 * workers
+    progress = progress if progress is not None else BatchProgress()
+
+    if workers == 1:
+        for apk_path in apk_paths:
+            try:
+                result, error = worker(apk_path), None
+            except Exception as e:
+                result, error = None, e
+            progress.update(error is not None)
+            yield apk_path, result, error
+        progress.finish()
+        return
+
+    executor_class = ThreadPoolExecutor if threads else ProcessPoolExecutor
+    with executor_class(max_workers=workers) as executor:
+        paths = iter(apk_paths)
+        pending = {}
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < max_pending:
+                apk_path = next(paths, None)
+                if apk_path is None:
+                    exhausted = True
+                    break
+                pending[executor.submit(worker, apk_path)] = apk_path
+            if not pending:
+                break
+
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                apk_path = pending.pop(future)
+                error = future.exception()
+                result = None if error is not None else future.result()
+                progress.update(error is not None)
+                yield apk_path, result, error
+    progress.finish()
+
+def add_batch_arguments(parser, jobs: bool = True) -> None:
+    """
+    Add the batch driver's options to an argparse parser: --no-recursive,
+    and -j/--jobs unless the script sizes its pool with its own option.
+    """
+    if jobs:
+        parser.add_argument("-j", "--jobs", type=int, default=None,
+                            help="Number of APKs processed in parallel (default: CPU count)")
+    parser.add_argument("--no-recursive", dest="recursive", action="store_false",
+                        help="Only process APKs directly inside the directory, not in its subdirectories")
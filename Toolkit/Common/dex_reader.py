@@ -0,0 +1,266 @@
+import re
+import sys
+import struct
+
+from array import array
+
+from apk_index import ApkIndex
+
+#---------------------------------------------------------
+# DEX CONSTANTS
+#---------------------------------------------------------
+
+DEX_MAGIC = b"dex\n"
+
+# classes.dex, classes2.dex, ... at the root of the APK, as apktool and ART load them
+DEX_ENTRY_PATTERN = re.compile(r"classes(\d*)\.dex")
+
+_HEADER = struct.Struct("<8s I 20s 6I 12I")     # magic ... map_off, then (size, off) of 6 id sections
+_HEADER_SIZE = 0x70
+_ENDIAN_CONSTANT = 0x12345678
+
+_METHOD_ID = struct.Struct("<HHI")              # class_idx, proto_idx, name_idx
+_CLASS_DEF = struct.Struct("<8I")               # class_idx ... class_data_off, static_values_off
+_CODE_ITEM_INSNS_SIZE = 12                      # uint insns_size; the insns follow at +16
+
+# invoke-* opcodes whose operand is a method_ids index
+OP_INVOKE_VIRTUAL               = 0x6E
+OP_INVOKE_SUPER                 = 0x6F
+OP_INVOKE_DIRECT                = 0x70
+OP_INVOKE_STATIC                = 0x71
+OP_INVOKE_INTERFACE             = 0x72
+OP_INVOKE_VIRTUAL_RANGE         = 0x74
+OP_INVOKE_SUPER_RANGE           = 0x75
+OP_INVOKE_DIRECT_RANGE          = 0x76
+OP_INVOKE_STATIC_RANGE          = 0x77
+OP_INVOKE_INTERFACE_RANGE       = 0x78
+OP_INVOKE_POLYMORPHIC           = 0xFA
+OP_INVOKE_POLYMORPHIC_RANGE     = 0xFB
+
+INVOKE_OPCODES = frozenset(range(OP_INVOKE_VIRTUAL, OP_INVOKE_INTERFACE + 1)) \
+    | frozenset(range(OP_INVOKE_VIRTUAL_RANGE, OP_INVOKE_INTERFACE_RANGE + 1)) \
+    | {OP_INVOKE_POLYMORPHIC, OP_INVOKE_POLYMORPHIC_RANGE}
+
+# Pseudo-instructions: a nop (0x00) opcode with the payload ident in the high byte
+_PACKED_SWITCH_PAYLOAD = 0x0100
+_SPARSE_SWITCH_PAYLOAD = 0x0200
+_FILL_ARRAY_DATA_PAYLOAD = 0x0300
+
+def _instruction_units() -> bytes:
+    """Length in 16-bit code units of every opcode (unused opcodes count as 1)."""
+    units = [1] * 256
+    for first, last, n in (
+            (0x02, 0x02, 2), (0x03, 0x03, 3),       # move/from16, move/16
+            (0x05, 0x05, 2), (0x06, 0x06, 3),       # move-wide/from16, move-wide/16
+            (0x08, 0x08, 2), (0x09, 0x09, 3),       # move-object/from16, move-object/16
+            (0x13, 0x13, 2), (0x14, 0x14, 3),       # const/16, const
+            (0x15, 0x16, 2), (0x17, 0x17, 3),       # const/high16, const-wide/16, const-wide/32
+            (0x18, 0x18, 5), (0x19, 0x1A, 2),       # const-wide, const-wide/high16, const-string
+            (0x1B, 0x1B, 3), (0x1C, 0x1C, 2),       # const-string/jumbo, const-class
+            (0x1F, 0x20, 2), (0x22, 0x23, 2),       # check-cast, instance-of, new-instance, new-array
+            (0x24, 0x26, 3),                        # filled-new-array(/range), fill-array-data
+            (0x29, 0x29, 2), (0x2A, 0x2C, 3),       # goto/16, goto/32, packed- / sparse-switch
+            (0x2D, 0x3D, 2),                        # cmp*, if-*
+            (0x44, 0x6D, 2),                        # aget / aput / iget / iput / sget / sput
+            (0x6E, 0x72, 3), (0x74, 0x78, 3),       # invoke-kind(/range)
+            (0x90, 0xAF, 2), (0xD0, 0xE2, 2),       # binop, binop/lit16, binop/lit8
+            (0xFA, 0xFB, 4), (0xFC, 0xFD, 3),       # invoke-polymorphic(/range), invoke-custom(/range)
+            (0xFE, 0xFF, 2)):                       # const-method-handle, const-method-type
+        for op in range(first, last + 1):
+            units[op] = n
+    return bytes(units)
+
+_INSTRUCTION_UNITS = _instruction_units()
+
+#---------------------------------------------------------
+# DEX FILE
+#---------------------------------------------------------
+
+def _read_uleb128(data, pos: int) -> tuple[int, int]:
+    value = shift = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        value |= (b & 0x7F) << shift
+        if b < 0x80:
+            return value, pos
+        shift += 7
+
+def decode_mutf8(raw: bytes) -> str:
+    """
+    Decode a Modified UTF-8 string: U+0000 is C0 80 and supplementary
+    characters are CESU-8 surrogate pairs, neither of which the stock
+    utf-8 codec accepts.
+    """
+    raw = raw.replace(b"\xc0\x80", b"\x00")
+    try:
+        text = raw.decode("utf-8", errors="surrogatepass")
+    except UnicodeDecodeError:
+        return raw.decode("utf-8", errors="replace")
+    if any("\ud800" <= c <= "\udfff" for c in text):
+        text = text.encode("utf-16-le", errors="surrogatepass").decode("utf-16-le", errors="replace")
+    return text
+
+class DexFile:
+    """
+    The id tables and code of one DEX file, read straight from its bytes.
+
+    Only the header is parsed up front.  Strings, type descriptors and
+    method references are resolved on demand (and cached), and code is
+    decoded as far as its instruction lengths, so nothing but the invoke-*
+    operands is ever materialized.  Raises ValueError if data is not a
+    little-endian DEX file.
+    """
+
+    def __init__(self, data: bytes):
+        if len(data) < _HEADER_SIZE or data[:4] != DEX_MAGIC:
+            raise ValueError("Not a DEX file")
+        fields = _HEADER.unpack_from(data, 0)
+        if fields[5] != _ENDIAN_CONSTANT:
+            raise ValueError("Big-endian DEX files are not supported")
+        (self.string_ids_size, self._string_ids_off,
+         self.type_ids_size, self._type_ids_off,
+         _, _, _, _,
+         self.method_ids_size, self._method_ids_off,
+         self.class_defs_size, self._class_defs_off) = fields[9:21]
+        if self._method_ids_off + 8 * self.method_ids_size > len(data):
+            raise ValueError("Truncated DEX file")
+
+        self.data = data
+        self.version = data[4:7].decode("ascii", errors="replace")
+        # Code units of the whole file; every code_item is 4-byte aligned
+        if sys.byteorder == "little":
+            self._units = memoryview(data)[:len(data) & ~1].cast("H")
+        else:
+            self._units = array("H", data[:len(data) & ~1])
+            self._units.byteswap()
+        self._strings: dict[int, str] = {}
+
+    def string(self, i: int) -> str:
+        value = self._strings.get(i)
+        if value is None:
+            data = self.data
+            offset = struct.unpack_from("<I", data, self._string_ids_off + 4 * i)[0]
+            # string_data_item: uleb128 utf16_size, MUTF-8 bytes, NUL
+            _, start = _read_uleb128(data, offset)
+            end = data.find(b"\x00", start)
+            value = self._strings[i] = decode_mutf8(data[start:end if end >= 0 else len(data)])
+        return value
+
+    def type_descriptor(self, i: int) -> str:
+        """Descriptor of type_ids[i], e.g. 'Landroid/app/Activity;'."""
+        return self.string(struct.unpack_from("<I", self.data, self._type_ids_off + 4 * i)[0])
+
+    def method_ref(self, i: int) -> tuple[str, str]:
+        """(class descriptor, method name) of method_ids[i]."""
+        class_idx, _, name_idx = _METHOD_ID.unpack_from(self.data, self._method_ids_off + 8 * i)
+        return self.type_descriptor(class_idx), self.string(name_idx)
+
+    def iter_code_items(self):
+        """
+        (method_idx, first code unit, end code unit) of every method with
+        code, in class_defs / class_data order.
+        """
+        data = self.data
+        units = len(self._units)
+        for c in range(self.class_defs_size):
+            class_data_off = _CLASS_DEF.unpack_from(data, self._class_defs_off + 32 * c)[6]
+            if not class_data_off:
+                continue
+            static_fields, pos = _read_uleb128(data, class_data_off)
+            instance_fields, pos = _read_uleb128(data, pos)
+            direct_methods, pos = _read_uleb128(data, pos)
+            virtual_methods, pos = _read_uleb128(data, pos)
+            for _ in range(2 * (static_fields + instance_fields)):
+                _, pos = _read_uleb128(data, pos)
+
+            for count in (direct_methods, virtual_methods):
+                # method_idx is delta-encoded, restarting with each list
+                method_idx = 0
+                for _ in range(count):
+                    delta, pos = _read_uleb128(data, pos)
+                    _, pos = _read_uleb128(data, pos)
+                    code_off, pos = _read_uleb128(data, pos)
+                    method_idx += delta
+                    if not code_off:
+                        continue
+                    insns_size = struct.unpack_from("<I", data, code_off + _CODE_ITEM_INSNS_SIZE)[0]
+                    start = (code_off + 16) >> 1
+                    yield method_idx, start, min(start + insns_size, units)
+
+    def _scan_invokes(self, start: int, end: int, is_invoke: bytes, append) -> None:
+        """append() the method_ids operand of every invoke in code units [start, end)."""
+        units = self._units
+        lengths = _INSTRUCTION_UNITS
+        pc = start
+        while pc < end:
+            unit = units[pc]
+            op = unit & 0xFF
+            if is_invoke[op]:
+                append(units[pc + 1])
+            elif op == 0 and unit:
+                # Switch / array payloads are data, not instructions
+                if unit == _PACKED_SWITCH_PAYLOAD:
+                    pc += 4 + 2 * units[pc + 1]
+                    continue
+                if unit == _SPARSE_SWITCH_PAYLOAD:
+                    pc += 2 + 4 * units[pc + 1]
+                    continue
+                if unit == _FILL_ARRAY_DATA_PAYLOAD:
+                    size = units[pc + 2] | units[pc + 3] << 16
+                    pc += 4 + (units[pc + 1] * size + 1) // 2
+                    continue
+            pc += lengths[op]
+
+    def iter_method_invokes(self, opcodes=INVOKE_OPCODES):
+        """
+        (method_idx, array('I') of invoked method_idx in code order) for
+        every method with code, counting only the given invoke opcodes.
+        """
+        is_invoke = bytes(op in opcodes for op in range(256))
+        try:
+            for method_idx, start, end in self.iter_code_items():
+                calls = array("I")
+                self._scan_invokes(start, end, is_invoke, calls.append)
+                yield method_idx, calls
+        except (IndexError, struct.error) as e:
+            raise ValueError(f"Malformed DEX code: {e}") from None
+
+    def invoked_method_ids(self, opcodes=INVOKE_OPCODES) -> set[int]:
+        """method_idx of every method invoked anywhere in the file."""
+        is_invoke = bytes(op in opcodes for op in range(256))
+        invoked: set[int] = set()
+        try:
+            for _, start, end in self.iter_code_items():
+                self._scan_invokes(start, end, is_invoke, invoked.add)
+        except (IndexError, struct.error) as e:
+            raise ValueError(f"Malformed DEX code: {e}") from None
+        return invoked
+
+    def close(self) -> None:
+        if isinstance(self._units, memoryview):
+            self._units.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+#---------------------------------------------------------------------------------------------------------------------
+
+def dex_entry_names(index: ApkIndex) -> list[str]:
+    """Names of the classes*.dex entries of an open ApkIndex, in load order."""
+    entries = []
+    for name in index.names:
+        match = DEX_ENTRY_PATTERN.fullmatch(name)
+        if match:
+            entries.append((int(match.group(1) or 1), name))
+    return [name for _, name in sorted(entries)]
+
+def iter_apk_dex(apk_path):
+    """(entry name, bytes) of the classes*.dex files of an APK, in load order."""
+    with ApkIndex(apk_path) as index:
+        for name in dex_entry_names(index):
+            reader = index.open_range_reader(index.index_of(name))
+            yield name, reader.read(0, reader.size)
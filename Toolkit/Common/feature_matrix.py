@@ -0,0 +1,278 @@
+import os
+import sys
+import json
+
+from array import array
+from collections.abc import Mapping
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import scipy.sparse as sp
+except ImportError:
+    sp = None
+
+#---------------------------------------------------------
+# ON-DISK CSR FEATURE MATRIX
+#---------------------------------------------------------
+
+# A matrix directory holds the CSR arrays as raw little-endian files that
+# only ever grow, plus the row / column labels as one JSON string per line:
+#   indptr.u64   rows + 1 row offsets
+#   indices.u32  column of every non-zero, sorted within each row
+#   data.u32     value of every non-zero (count matrices only; else all 1)
+#   vocab.txt    feature name of every column, in first-seen order
+#   apks.txt     APK path of every row
+#   meta.json    row / non-zero / column counts and the committed byte size
+#                of every file; anything past those sizes is discarded
+MATRIX_FORMAT_VERSION = 1
+
+_INDPTR_FILE  = "indptr.u64"
+_INDICES_FILE = "indices.u32"
+_DATA_FILE    = "data.u32"
+_VOCAB_FILE   = "vocab.txt"
+_APKS_FILE    = "apks.txt"
+_META_FILE    = "meta.json"
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("NumPy is required to load feature matrices.\nInstall with: pip install numpy")
+
+def _require_scipy():
+    if sp is None:
+        raise ImportError("SciPy is required for CSR feature matrices.\nInstall with: pip install scipy")
+
+def _write_array(fh, values: array) -> None:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    values.tofile(fh)
+
+def _split_labels(data: bytes) -> list[str]:
+    # Split on "\n" only: str.splitlines() would also break at U+2028 & co.,
+    # which json.dumps(ensure_ascii=False) leaves unescaped
+    return [json.loads(line) for line in data.decode("utf-8").split("\n")[:-1]]
+
+def read_matrix_meta(path) -> dict | None:
+    try:
+        with open(os.path.join(path, _META_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+class FeatureMatrixWriter:
+    """
+    Append APKs as rows of a sparse APK x feature matrix stored in the
+    directory path, growing the feature vocabulary as new names appear.
+
+    add() takes an iterable of feature names (binary matrix) or, with
+    counts=True, a mapping of feature name to count.  Rows are buffered and
+    committed batch_size at a time: arrays and labels are appended, then
+    meta.json is replaced, so an interrupted run leaves the last committed
+    batch readable.  Opening an existing directory resumes appending to it.
+    """
+
+    def __init__(self, path, counts: bool = False, batch_size: int = 10_000):
+        if array("I").itemsize != 4 or array("Q").itemsize != 8:
+            raise NotImplementedError("array('I') / array('Q') must be 32 / 64-bit on this platform")
+        self.path = str(path)
+        self.batch_size = batch_size
+        os.makedirs(self.path, exist_ok=True)
+
+        meta = read_matrix_meta(self.path)
+        if meta is None:
+            self.counts = counts
+            self.rows = 0
+            self.nnz = 0
+            self.vocabulary: dict[str, int] = {}
+            sizes = {}
+        else:
+            if meta.get("version") != MATRIX_FORMAT_VERSION:
+                raise ValueError(f"Unsupported feature matrix version {meta.get('version')} in {self.path}")
+            if meta["counts"] != counts:
+                raise ValueError(f"{self.path} holds a {'count' if meta['counts'] else 'binary'} matrix")
+            self.counts = meta["counts"]
+            self.rows = meta["rows"]
+            self.nnz = meta["nnz"]
+            sizes = meta["sizes"]
+            with open(os.path.join(self.path, _VOCAB_FILE), "rb") as f:
+                vocab = _split_labels(f.read(sizes[_VOCAB_FILE]))
+            self.vocabulary = {name: i for i, name in enumerate(vocab)}
+
+        files = [_INDPTR_FILE, _INDICES_FILE, _VOCAB_FILE, _APKS_FILE] + ([_DATA_FILE] if self.counts else [])
+        self._files = {}
+        for name in files:
+            fh = open(os.path.join(self.path, name), "ab")
+            # Drop whatever an interrupted run appended after the last commit
+            fh.truncate(sizes.get(name, 0))
+            fh.seek(0, os.SEEK_END)
+            self._files[name] = fh
+
+        self._indptr = array("Q", [0] if meta is None else [])
+        self._indices = array("I")
+        self._data = array("I")
+        self._apks: list[str] = []
+        self._new_vocab: list[str] = []
+
+    def add(self, apk_path: str, features) -> int:
+        """Append one APK as a row and return its row index."""
+        vocabulary = self.vocabulary
+        if isinstance(features, Mapping):
+            items = features.items()
+        else:
+            items = ((name, 1) for name in features)
+
+        row: dict[int, int] = {}
+        for name, value in items:
+            if not value:
+                continue
+            column = vocabulary.get(name)
+            if column is None:
+                column = vocabulary[name] = len(vocabulary)
+                self._new_vocab.append(name)
+            row[column] = row.get(column, 0) + value if self.counts else 1
+
+        columns = sorted(row)
+        self._indices.extend(columns)
+        if self.counts:
+            self._data.extend(row[column] for column in columns)
+        self.nnz += len(columns)
+        self._indptr.append(self.nnz)
+        self._apks.append(str(apk_path))
+        self.rows += 1
+        if len(self._apks) >= self.batch_size:
+            self.flush()
+        return self.rows - 1
+
+    def flush(self) -> None:
+        # A new matrix still commits its leading indptr 0 when empty
+        if not self._apks and not self._indptr:
+            return
+        files = self._files
+        _write_array(files[_INDPTR_FILE], self._indptr)
+        _write_array(files[_INDICES_FILE], self._indices)
+        if self.counts:
+            _write_array(files[_DATA_FILE], self._data)
+        files[_VOCAB_FILE].write("".join(json.dumps(name, ensure_ascii=False) + "\n"
+                                         for name in self._new_vocab).encode("utf-8"))
+        files[_APKS_FILE].write("".join(json.dumps(apk, ensure_ascii=False) + "\n"
+                                        for apk in self._apks).encode("utf-8"))
+        for fh in files.values():
+            fh.flush()
+
+        meta = {
+            "version": MATRIX_FORMAT_VERSION,
+            "counts": self.counts,
+            "rows": self.rows,
+            "nnz": self.nnz,
+            "columns": len(self.vocabulary),
+            "sizes": {name: fh.tell() for name, fh in files.items()},
+        }
+        tmp_path = os.path.join(self.path, _META_FILE + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(self.path, _META_FILE))
+
+        for values in (self._indptr, self._indices, self._data):
+            del values[:]
+        self._apks.clear()
+        self._new_vocab.clear()
+
+    def close(self) -> None:
+        if self._files:
+            self.flush()
+            for fh in self._files.values():
+                fh.close()
+            self._files = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+#---------------------------------------------------------
+# LOADING
+#---------------------------------------------------------
+
+def _read_labels(path: str, size: int) -> list[str]:
+    with open(path, "rb") as f:
+        return _split_labels(f.read(size))
+
+def load_feature_arrays(path) -> dict:
+    """
+    The committed CSR arrays of a matrix directory as NumPy arrays
+    (indptr uint64, indices uint32, data uint32 or None for binary
+    matrices), with the vocab and apks label lists and the shape.
+    """
+    _require_numpy()
+    meta = read_matrix_meta(path)
+    if meta is None:
+        raise FileNotFoundError(f"No feature matrix in {path}")
+    rows, nnz = meta["rows"], meta["nnz"]
+    arrays = {
+        "indptr": np.fromfile(os.path.join(path, _INDPTR_FILE), dtype="<u8", count=rows + 1),
+        "indices": np.fromfile(os.path.join(path, _INDICES_FILE), dtype="<u4", count=nnz),
+        "data": np.fromfile(os.path.join(path, _DATA_FILE), dtype="<u4", count=nnz) if meta["counts"] else None,
+        "vocab": _read_labels(os.path.join(path, _VOCAB_FILE), meta["sizes"][_VOCAB_FILE]),
+        "apks": _read_labels(os.path.join(path, _APKS_FILE), meta["sizes"][_APKS_FILE]),
+    }
+    arrays["shape"] = (rows, len(arrays["vocab"]))
+    return arrays
+
+def load_feature_matrix(path):
+    """(scipy.sparse.csr_matrix, vocab, apks) of a matrix directory; binary matrices are uint8."""
+    _require_scipy()
+    arrays = load_feature_arrays(path)
+    data = arrays["data"]
+    if data is None:
+        data = np.ones(len(arrays["indices"]), dtype=np.uint8)
+    matrix = sp.csr_matrix((data, arrays["indices"].astype(np.int32, copy=False),
+                            arrays["indptr"].astype(np.int64, copy=False)), shape=arrays["shape"])
+    return matrix, arrays["vocab"], arrays["apks"]
+
+def load_bitpacked_rows(path):
+    """
+    (rows x ceil(columns / 8) uint8 array, vocab, apks): one bit per
+    feature, in np.packbits' big bit order (np.unpackbits(rows, axis=1)
+    gives the dense 0/1 matrix).
+    """
+    arrays = load_feature_arrays(path)
+    rows, columns = arrays["shape"]
+    packed = np.zeros((rows, (columns + 7) // 8), dtype=np.uint8)
+    indptr, indices = arrays["indptr"], arrays["indices"]
+    row_ids = np.repeat(np.arange(rows, dtype=np.int64), np.diff(indptr).astype(np.int64))
+    np.bitwise_or.at(packed, (row_ids, indices >> 3), (0x80 >> (indices & 7)).astype(np.uint8))
+    return packed, arrays["vocab"], arrays["apks"]
+
+def main():
+    import time
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Load a feature matrix directory and print its shape, size and load time.")
+    parser.add_argument("path", help="Matrix directory written by the matrix sink")
+    parser.add_argument("--bitpacked", action="store_true", help="Load as NumPy bit-packed rows instead of CSR")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.bitpacked:
+        matrix, vocab, apks = load_bitpacked_rows(args.path)
+        nbytes = matrix.nbytes
+    elif sp is not None:
+        matrix, vocab, apks = load_feature_matrix(args.path)
+        nbytes = matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+    else:
+        arrays = load_feature_arrays(args.path)
+        vocab, apks = arrays["vocab"], arrays["apks"]
+        nbytes = sum(arrays[name].nbytes for name in ("indptr", "indices", "data") if arrays[name] is not None)
+    elapsed = time.perf_counter() - start
+
+    meta = read_matrix_meta(args.path)
+    print(f"{len(apks)} APKs x {len(vocab)} features, {meta['nnz']} non-zeros")
+    print(f"Loaded in {elapsed:.2f} s, {nbytes / 2**20:.1f} MiB of arrays")
+
+if __name__ == "__main__":
+    main()
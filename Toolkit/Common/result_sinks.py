@@ -0,0 +1,317 @@
+import os
+import json
+import sqlite3
+
+from pathlib import Path
+
+from feature_matrix import FeatureMatrixWriter
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+#---------------------------------------------------------
+# PER-APK RESULT SINKS
+#---------------------------------------------------------
+
+SINK_FILES   = "files"
+SINK_NDJSON  = "ndjson"
+SINK_SQLITE  = "sqlite"
+SINK_PARQUET = "parquet"
+SINK_MATRIX  = "matrix"
+
+SINK_FORMATS = (SINK_FILES, SINK_NDJSON, SINK_SQLITE, SINK_PARQUET, SINK_MATRIX)
+
+# Kinds of record fields, for the SQLite / Parquet column types
+FIELD_LIST   = "list"     # list of strings
+FIELD_COUNTS = "counts"   # mapping of string to count
+FIELD_JSON   = "json"     # anything else, stored as JSON text
+
+SINK_SUFFIXES = {SINK_NDJSON: ".ndjson", SINK_SQLITE: ".sqlite", SINK_PARQUET: ".parquet", SINK_MATRIX: ".matrix"}
+
+_SUFFIX_FORMATS = {".ndjson": SINK_NDJSON,
+                   ".jsonl": SINK_NDJSON,
+                   ".sqlite": SINK_SQLITE,
+                   ".sqlite3": SINK_SQLITE,
+                   ".db": SINK_SQLITE,
+                   ".parquet": SINK_PARQUET,
+                   ".matrix": SINK_MATRIX}
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("PyArrow is required for Parquet output.\nInstall with: pip install pyarrow")
+
+class FileResultSink:
+    """
+    The extractors' default output: one JSON + XML file pair per APK,
+    written by the extractor's save(apk_path, record, output_base).  The
+    directory of output_base is created first.
+    """
+
+    def __init__(self, save):
+        self.save = save
+        self.written = 0
+
+    def write(self, apk_path: str, record: dict, output_base: str | None = None) -> None:
+        if output_base:
+            os.makedirs(os.path.dirname(output_base) or ".", exist_ok=True)
+        self.save(apk_path, record, output_base)
+        self.written += 1
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class NdjsonResultSink:
+    """
+    One JSON object per APK ({"apk": path, **record}) in a single file.
+    Lines are buffered and written batch_size APKs at a time.
+    """
+
+    def __init__(self, path, batch_size: int = 1000):
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.written = 0
+        self._lines: list[str] = []
+        self._fh = open(self.path, "w", encoding="utf-8", newline="\n")
+
+    def write(self, apk_path: str, record: dict, output_base: str | None = None) -> None:
+        self._lines.append(json.dumps({"apk": str(apk_path), **record}, ensure_ascii=False) + "\n")
+        if len(self._lines) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._lines:
+            self._fh.write("".join(self._lines))
+            self.written += len(self._lines)
+            self._lines.clear()
+        self._fh.flush()
+
+    def close(self) -> None:
+        if not self._fh.closed:
+            self.flush()
+            self._fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class SqliteResultSink:
+    """
+    One row per APK in an SQLite table (apk TEXT PRIMARY KEY plus one
+    column per field, values as JSON text).  The database runs in WAL mode
+    and rows are inserted batch_size at a time in one transaction; an APK
+    written again replaces its row.  Columns missing from an existing table
+    are added.
+    """
+
+    def __init__(self, path, fields: dict[str, str], table: str = "results", batch_size: int = 1000):
+        self.path = Path(path)
+        self.fields = list(fields)
+        self.table = table
+        self.batch_size = batch_size
+        self.written = 0
+        self._rows: list[tuple] = []
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+
+        columns = ", ".join(f'"{field}" TEXT' for field in self.fields)
+        with self._conn:
+            self._conn.execute(f'CREATE TABLE IF NOT EXISTS "{table}" (apk TEXT PRIMARY KEY{", " if columns else ""}{columns})')
+            existing = {row[1] for row in self._conn.execute(f'PRAGMA table_info("{table}")')}
+            for field in self.fields:
+                if field not in existing:
+                    self._conn.execute(f'ALTER TABLE "{table}" ADD COLUMN "{field}" TEXT')
+
+        placeholders = ", ".join("?" * (len(self.fields) + 1))
+        names = ", ".join(["apk"] + [f'"{field}"' for field in self.fields])
+        self._insert = f'INSERT OR REPLACE INTO "{table}" ({names}) VALUES ({placeholders})'
+
+    def write(self, apk_path: str, record: dict, output_base: str | None = None) -> None:
+        row = [str(apk_path)]
+        for field in self.fields:
+            value = record.get(field)
+            row.append(None if value is None else json.dumps(value, ensure_ascii=False))
+        self._rows.append(tuple(row))
+        if len(self._rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._rows:
+            return
+        with self._conn:
+            self._conn.executemany(self._insert, self._rows)
+        self.written += len(self._rows)
+        self._rows.clear()
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self.flush()
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class ParquetResultSink:
+    """
+    One row per APK in a Parquet file, one row group per batch_size APKs.
+    FIELD_LIST fields are list<string> columns, other fields JSON text.
+    """
+
+    def __init__(self, path, fields: dict[str, str], batch_size: int = 10_000):
+        _require_pyarrow()
+        self.path = Path(path)
+        self.fields = dict(fields)
+        self.batch_size = batch_size
+        self.written = 0
+        self._columns: dict[str, list] = {field: [] for field in ["apk", *self.fields]}
+        self._schema = pa.schema([("apk", pa.string())] +
+                                 [(field, pa.list_(pa.string()) if kind == FIELD_LIST else pa.string())
+                                  for field, kind in self.fields.items()])
+        self._writer = pq.ParquetWriter(str(self.path), self._schema, compression="zstd")
+
+    def write(self, apk_path: str, record: dict, output_base: str | None = None) -> None:
+        columns = self._columns
+        columns["apk"].append(str(apk_path))
+        for field, kind in self.fields.items():
+            value = record.get(field)
+            if value is not None and kind != FIELD_LIST:
+                value = json.dumps(value, ensure_ascii=False)
+            columns[field].append(value)
+        if len(columns["apk"]) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        count = len(self._columns["apk"])
+        if not count:
+            return
+        self._writer.write_table(pa.table(self._columns, schema=self._schema))
+        self.written += count
+        for values in self._columns.values():
+            values.clear()
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self.flush()
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class FeatureMatrixResultSink:
+    """
+    One row per APK in sparse APK x feature matrices (see
+    feature_matrix.FeatureMatrixWriter), one matrix directory per feature
+    field under path: a FIELD_LIST field gives a binary matrix of its
+    distinct values (e.g. every permission seen so far), a FIELD_COUNTS
+    field a count matrix.  Rows are committed batch_size APKs at a time
+    and existing matrices are appended to.
+    """
+
+    def __init__(self, path, fields: dict[str, str], batch_size: int = 10_000):
+        self.path = Path(path)
+        self._writers = {field: FeatureMatrixWriter(self.path / field, counts=kind == FIELD_COUNTS,
+                                                    batch_size=batch_size)
+                         for field, kind in fields.items() if kind in (FIELD_LIST, FIELD_COUNTS)}
+        if not self._writers:
+            raise ValueError("The matrix sink needs a list or counts field to use as features")
+        self.written = 0
+
+    def write(self, apk_path: str, record: dict, output_base: str | None = None) -> None:
+        for field, writer in self._writers.items():
+            writer.add(apk_path, record.get(field) or ())
+        self.written += 1
+
+    def flush(self) -> None:
+        for writer in self._writers.values():
+            writer.flush()
+
+    def close(self) -> None:
+        for writer in self._writers.values():
+            writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def open_result_sink(fmt: str | None = None, path=None, fields: dict[str, str] | None = None,
+                     save=None, batch_size: int | None = None):
+    """
+    Open a result sink.  "files" (the default) writes through the
+    extractor's save function; the other formats write every APK to the
+    single file (or, for "matrix", the directory) at path.  Without fmt
+    the format follows the suffix of path (.ndjson / .jsonl / .sqlite /
+    .db / .parquet / .matrix), or "files" if no path is given.
+    """
+    if fmt is None:
+        if path is None:
+            fmt = SINK_FILES
+        else:
+            fmt = _SUFFIX_FORMATS.get(Path(path).suffix.lower())
+            if fmt is None:
+                raise ValueError(f"Cannot infer the sink format of {path} (expected one of {tuple(_SUFFIX_FORMATS)})")
+    if fmt not in SINK_FORMATS:
+        raise ValueError(f"Unknown sink format: {fmt!r} (expected one of {SINK_FORMATS})")
+
+    if fmt == SINK_FILES:
+        if save is None:
+            raise ValueError("The files sink needs the extractor's save function")
+        return FileResultSink(save)
+
+    if path is None:
+        raise ValueError(f"The {fmt} sink needs an output path")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    kwargs = {} if batch_size is None else {"batch_size": batch_size}
+    if fmt == SINK_NDJSON:
+        return NdjsonResultSink(path, **kwargs)
+    if fmt == SINK_SQLITE:
+        return SqliteResultSink(path, fields or {}, **kwargs)
+    if fmt == SINK_MATRIX:
+        return FeatureMatrixResultSink(path, fields or {}, **kwargs)
+    return ParquetResultSink(path, fields or {}, **kwargs)
+
+def add_sink_arguments(parser) -> None:
+    """Add the --sink and -o/--output options to an argparse parser."""
+    parser.add_argument("--sink", choices=SINK_FORMATS, default=None,
+                        help="Output format: per-APK JSON + XML files (default), one NDJSON / SQLite / "
+                             "Parquet file for all APKs, or a sparse APK x feature matrix directory "
+                             "(inferred from the -o suffix if not given)")
+    parser.add_argument("-o", "--output", default=None,
+                        help="Output file of the ndjson / sqlite / parquet sinks, or directory of the matrix sink")
+
+def open_sink_from_args(args, default_base: str, fields: dict[str, str], save):
+    """
+    Open the sink selected by add_sink_arguments' options.  Without -o the
+    corpus sinks write to default_base plus the format's suffix.
+    """
+    fmt = args.sink
+    if fmt is None:
+        fmt = SINK_FILES if args.output is None else None
+    path = args.output
+    if path is None and fmt not in (None, SINK_FILES):
+        path = default_base + SINK_SUFFIXES[fmt]
+    return open_result_sink(fmt, path, fields, save)